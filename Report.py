@@ -1,19 +1,15 @@
 import customtkinter as ctk
 from PIL import Image
 import random
-import os
-import sys
-import subprocess
+from app import App
 import matplotlib
 matplotlib.use("Agg")   # Prevent backend issues
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
-# --- Create root window ---
-root = ctk.CTk()
-root.title("Analysis Report")
-root.geometry("1920x1080")
-root.resizable(True, True)
+# --- Screen frame inside the app window ---
+shell = App.instance()
+root = shell.view("report", "Analysis Report")
 
 # ------------------ MAIN BACKGROUND ------------------
 #bg_image = ctk.CTkImage(Image.open("Image (27).jfif"), size=(1920, 1080))
@@ -38,9 +34,7 @@ scroll_bg_label.lower()
 
 # --- Back Button ---
 def go_back():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__), "homepage 1.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("homepage")
 
 back_button = ctk.CTkButton(root, text="← Back", width=140, height=60,
                             fg_color="#63B1F1", text_color="black",
@@ -60,7 +54,7 @@ case_frame.pack(padx=200, pady=20)
 ctk.CTkLabel(case_frame, text="Case ID:", font=("Arial", 20, "bold"),
              width=150, height=70).pack(side="left", padx=10)
 
-generated_case_id = "CASE-" + str(random.randint(1000, 9999))
+generated_case_id = shell.store.allocate_case_id()
 
 case_entry = ctk.CTkEntry(case_frame, width=200, font=("Arial", 16))
 case_entry.pack(side="left")
@@ -130,4 +124,5 @@ footer_label = ctk.CTkLabel(
 footer_label.pack(pady=40)
 
 # run the app
-root.mainloop()
+if __name__ == "__main__":
+    shell.run()
@@ -0,0 +1,150 @@
+"""
+Analysis Executor - bounded AI analysis for the GUI
+Runs predict requests without a thread per click: at most max_pending
+analyses are in flight, a newer request for the same patient cancels
+the older one (latest wins), and results are handed to the Tk thread
+with root.after.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ml_model_handler import error_result
+from telemetry import get_logger
+
+
+logger = get_logger("analysis_executor")
+
+
+class AnalysisExecutor:
+    """
+    Bounded, per-patient de-duplicating runner for predict requests
+
+    Requests go to predictor.submit (PredictionCoalescer) when the
+    predictor has one, else to a pool of max_workers threads calling
+    predictor.predict. Only the result of the latest request for a key
+    is delivered; older ones are cancelled if still queued and dropped
+    if already running.
+    """
+
+    def __init__(self, predictor, root=None, max_workers=2, max_pending=32):
+        """
+        Args:
+            predictor: PredictionCoalescer, MLModelHandler or InferenceClient
+            root: Tk widget whose after() delivers results (None: call
+                  on_result from the worker thread)
+            max_workers: threads used when predictor has no submit()
+            max_pending: most analyses in flight; more are rejected
+        """
+        self.predictor = predictor
+        self.root = root
+        self.max_pending = max_pending
+        self._pool = None
+        if not hasattr(predictor, "submit"):
+            self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="analysis-worker")
+
+        self._lock = threading.RLock()  # cancel() runs done callbacks inline
+        self._latest = {}
+        self._pending = set()
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.stale = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+
+    @property
+    def model(self):
+        return self.predictor.model
+
+    @property
+    def queue_depth(self):
+        """Analyses submitted and not finished yet"""
+        return len(self._pending)
+
+    def stats(self):
+        """Queue depth and request counters as a dict"""
+        with self._lock:
+            return {
+                "queue_depth": len(self._pending),
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "stale": self.stale,
+                "rejected": self.rejected,
+            }
+
+    def submit(self, key, patient_data, on_result):
+        """
+        Analyse a patient, replacing any earlier request for the same key
+
+        Args:
+            key: patient identifier (e.g. case_id)
+            patient_data: dict for predictor.predict
+            on_result: function(result dict) called with the latest result
+
+        Returns:
+            Future of the request, or None if max_pending were in flight
+        """
+        with self._lock:
+            self._cancel_locked(key)
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                return None
+
+            if self._pool is not None:
+                future = self._pool.submit(self.predictor.predict, patient_data)
+            else:
+                future = self.predictor.submit(patient_data)
+            self._latest[key] = future
+            self._pending.add(future)
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+
+        future.add_done_callback(lambda f: self._finish(key, f, on_result))
+        return future
+
+    def cancel(self, key):
+        """Forget the pending request for a key (its result is never delivered)"""
+        with self._lock:
+            self._cancel_locked(key)
+
+    def _cancel_locked(self, key):
+        previous = self._latest.pop(key, None)
+        if previous is not None and previous.cancel():
+            self.cancelled += 1
+
+    def _finish(self, key, future, on_result):
+        with self._lock:
+            self._pending.discard(future)
+            if future.cancelled():
+                return
+            if self._latest.get(key) is not future:
+                # A newer request for this patient was made meanwhile
+                self.stale += 1
+                return
+            del self._latest[key]
+            self.completed += 1
+
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.exception("Analysis error for %s: %s", key, e)
+            result = error_result(str(e), f'Prediction failed: {e}')
+
+        if self.root is not None:
+            self.root.after(0, on_result, result)
+        else:
+            on_result(result)
+
+    def shutdown(self):
+        """Cancel queued analyses and stop the worker threads"""
+        with self._lock:
+            for key in list(self._latest):
+                self._cancel_locked(key)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
@@ -0,0 +1,204 @@
+"""
+Med-Guardian app shell - one window, one process for every screen
+Screens are frames inside a single CTk window; navigating hides one and
+shows the other instead of starting a new Python process. The patient
+store, the ML model and the background image are loaded once and
+shared by all screens.
+
+    python app.py                   (start on the home page)
+    python app.py patients_data     (start on another screen)
+
+Running a screen file directly (python homepage.py) also works.
+"""
+
+import os
+import sys
+import threading
+import importlib.util
+
+import customtkinter as ctk
+from PIL import Image
+
+import telemetry
+from patient_store import PatientStore
+
+
+logger = telemetry.get_logger("app")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKGROUND_IMAGE = "vector-healthcare-medical-sciencefuturistic-background-260nw-2652074677.jpg"
+
+# Screen name -> file that builds it
+SCREENS = {
+    "homepage": "homepage.py",
+    "patient_insertion": "patient_insertion.py",
+    "patient_insertion_updated": "patient_insertion updated.py",
+    "delete_patient": "delete_patient.py",
+    "patients_data": "patients_data.py",
+    "report": "Report.py",
+    "copyrights": "waiting.py",
+}
+
+
+class App(ctk.CTk):
+    """Main window: builds each screen on first visit and keeps it for later"""
+
+    _instance = None
+
+    def __init__(self):
+        super().__init__()
+        self.title("Med-Guardian")
+        self.geometry("1366x768")
+        self.resizable(True, True)
+
+        self.views = {}
+        self.titles = {}
+        self.on_show = {}
+        self.current = None
+
+        self._store = None
+        self._background = None
+        self._models = {}
+        self._predictors = {}
+        self._model_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """The application window (created on first use)"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    # ---- shared resources ----
+
+    @property
+    def store(self):
+        """PatientStore shared by all screens"""
+        if self._store is None:
+            self._store = PatientStore()
+        return self._store
+
+    @property
+    def background(self):
+        """Background image, decoded once"""
+        if self._background is None:
+            self._background = ctk.CTkImage(
+                Image.open(os.path.join(BASE_DIR, BACKGROUND_IMAGE)), size=(1366, 768))
+        return self._background
+
+    def model_handler(self, model_path="risk_classifier_model.pkl"):
+        """
+        MLModelHandler for a model file, loaded once per process
+
+        Safe to call from worker threads; the first caller loads the model.
+        """
+        with self._model_lock:
+            handler = self._models.get(model_path)
+            if handler is None:
+                from ml_model_handler import MLModelHandler
+                handler = self._models[model_path] = MLModelHandler(model_path)
+        return handler
+
+    def predictor(self, model_path="risk_classifier_model.pkl"):
+        """
+        PredictionCoalescer in front of model_handler(model_path)
+
+        Screens submit their predict requests here, so requests from
+        several beds or windows at once are scored in one model call.
+        """
+        handler = self.model_handler(model_path)
+        with self._model_lock:
+            coalescer = self._predictors.get(model_path)
+            if coalescer is None:
+                from prediction_coalescer import PredictionCoalescer
+                coalescer = self._predictors[model_path] = PredictionCoalescer(handler)
+        return coalescer
+
+    # ---- navigation ----
+
+    def view(self, name, title=None):
+        """
+        Create the frame a screen builds its widgets in
+
+        Args:
+            name: screen name (key of SCREENS)
+            title: window title while the screen is shown
+
+        Returns:
+            CTkFrame filling the window
+        """
+        frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
+        self.views[name] = frame
+        self.titles[name] = title or name
+        self._display(name)
+        return frame
+
+    def set_on_show(self, name, on_show):
+        """
+        Register a function called each time a built screen is shown
+        again (e.g. to reload data changed on another screen)
+        """
+        self.on_show[name] = on_show
+
+    def _display(self, name):
+        if self.current and self.current != name and self.current in self.views:
+            self.views[self.current].place_forget()
+        self.views[name].place(x=0, y=0, relwidth=1, relheight=1)
+        self.title(self.titles[name])
+        self.current = name
+
+    def show(self, name):
+        """Switch to a screen, building it on its first visit"""
+        if name in self.views:
+            self._display(name)
+            callback = self.on_show.get(name)
+            if callback:
+                callback()
+            return
+
+        file_name = SCREENS.get(name)
+        path = os.path.join(BASE_DIR, file_name) if file_name else None
+        if not path or not os.path.exists(path):
+            print(f"Warning: screen '{name}' not found")
+            return
+
+        # The screen module calls view(name, ...) while it is executed
+        previous = self.current
+        spec = importlib.util.spec_from_file_location(f"screen_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            logger.exception("Could not build screen '%s'", name)
+            self._discard(name, spec.name)
+            if previous in self.views:
+                self._display(previous)
+            else:
+                self.current = None
+
+    def _discard(self, name, module_name):
+        """Drop a screen whose script failed half way, so the next visit rebuilds it"""
+        sys.modules.pop(module_name, None)
+        self.titles.pop(name, None)
+        self.on_show.pop(name, None)
+        frame = self.views.pop(name, None)
+        if frame is not None:
+            frame.destroy()
+
+    def run(self, start=None):
+        """Show the start screen (if given) and enter the event loop"""
+        if start:
+            self.show(start)
+        self.mainloop()
+
+
+def run(start="homepage"):
+    App.instance().run(start)
+
+
+if __name__ == "__main__":
+    # Go through the module name so the screens share this window
+    import app
+    telemetry.configure()
+    app.run(sys.argv[1] if len(sys.argv) > 1 else "homepage")
@@ -0,0 +1,186 @@
+"""
+Async Simulator Bridge - asyncio variant of FileBasedSimulatorBridge
+Tails a VitalSignSim TSV export and hands rows to consumers through
+a bounded queue:
+
+    bridge = AsyncSimulatorBridge('vitalsign_output.txt', maxsize=256)
+    async for vitals in bridge.stream():
+        ...
+
+Overflow policy (what happens when the consumer falls behind and the
+queue is full):
+    'block'        the reader waits until there is room (backpressure).
+                   Nothing is lost; unread rows simply stay in the file.
+    'drop_oldest'  the oldest queued row is discarded to make room, so the
+                   consumer always works on the most recent maxsize rows.
+    'coalesce'     the newest queued row is replaced by the incoming one,
+                   so a slow consumer skips straight to the latest vitals.
+Dropped / coalesced rows are counted in bridge.dropped / bridge.coalesced.
+"""
+
+import asyncio
+import collections
+
+from simulator_bridge import FileBasedSimulatorBridge, TsvFileTailer
+from telemetry import get_logger
+
+
+logger = get_logger("async_simulator_bridge")
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'coalesce')
+
+
+class AsyncSimulatorBridge:
+    """
+    Monitor a VitalSignSim TSV output file from an asyncio event loop
+    Format: Time	HR	SpO2	etCO2	RR	NIBP	Rhythm	Event
+    """
+
+    def __init__(self, file_path='vitalsign_output.txt', maxsize=256, overflow='block',
+                 poll_interval=0.25, from_end=False, stop_at_eof=False):
+        """
+        Args:
+            file_path: Path to vitalsign_output.txt
+            maxsize: capacity of the queue between reader and consumer
+            overflow: 'block', 'drop_oldest' or 'coalesce' (see module doc)
+            poll_interval: seconds to wait when there is no new data
+            from_end: skip the rows already in the file
+            stop_at_eof: end the stream at end of file instead of following it
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.file_path = file_path
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.poll_interval = poll_interval
+        self.from_end = from_end
+        self.stop_at_eof = stop_at_eof
+
+        self.is_running = False
+        self.latest_data = None
+        self.dropped = 0
+        self.coalesced = 0
+
+        self._buffer = collections.deque()
+        self._cond = None
+        self._finished = False
+        self._error = None
+
+    def qsize(self):
+        """Number of rows waiting for the consumer"""
+        return len(self._buffer)
+
+    def stop(self):
+        """Ask the reader to stop; the stream ends after the queued rows"""
+        self.is_running = False
+
+    async def _put(self, vital_signs):
+        async with self._cond:
+            if len(self._buffer) >= self.maxsize:
+                if self.overflow == 'block':
+                    await self._cond.wait_for(
+                        lambda: len(self._buffer) < self.maxsize or not self.is_running)
+                    if not self.is_running:
+                        return
+                elif self.overflow == 'drop_oldest':
+                    self._buffer.popleft()
+                    self.dropped += 1
+                else:
+                    self._buffer[-1] = vital_signs
+                    self.coalesced += 1
+                    self._cond.notify_all()
+                    return
+
+            self._buffer.append(vital_signs)
+            self._cond.notify_all()
+
+    async def _reader(self):
+        tailer = TsvFileTailer(self.file_path, from_end=self.from_end)
+        try:
+            while self.is_running:
+                # Small reads of a local file; fast enough to run on the loop
+                lines = tailer.read_lines()
+
+                for line in lines:
+                    if not self.is_running:
+                        break
+                    vital_signs = FileBasedSimulatorBridge.parse_tsv_line(line)
+                    if vital_signs:
+                        self.latest_data = vital_signs
+                        await self._put(vital_signs)
+
+                if lines:
+                    # Let the consumer run between chunks
+                    await asyncio.sleep(0)
+                else:
+                    if self.stop_at_eof:
+                        break
+                    await asyncio.sleep(self.poll_interval)
+
+        except Exception as e:
+            logger.exception("Reader error: %s", e)
+            self._error = e
+        finally:
+            tailer.close()
+            async with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    async def stream(self):
+        """
+        Async iterator over parsed rows
+
+        Starts the reader task on first use and stops it when the
+        generator is closed (end of stream, or aclose() / bridge.stop()
+        after leaving the loop early). Re-raises a reader failure.
+        """
+        self._cond = asyncio.Condition()
+        self._buffer.clear()
+        self._finished = False
+        self._error = None
+        self.is_running = True
+
+        reader = asyncio.ensure_future(self._reader())
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(lambda: self._buffer or self._finished)
+                    if not self._buffer:
+                        break
+                    vital_signs = self._buffer.popleft()
+                    self._cond.notify_all()
+                yield vital_signs
+
+            if self._error:
+                raise self._error
+        finally:
+            self.is_running = False
+            if not reader.done():
+                async with self._cond:
+                    self._cond.notify_all()
+                try:
+                    await asyncio.wait_for(reader, timeout=self.poll_interval + 1)
+                except asyncio.TimeoutError:
+                    reader.cancel()
+
+    def get_latest_data(self):
+        """Get the most recent vital signs data (VitalSample, read-only)"""
+        return self.latest_data
+
+
+# Test function
+if __name__ == "__main__":
+    import sys
+
+    async def main(path):
+        bridge = AsyncSimulatorBridge(path, overflow='coalesce')
+        async for vitals in bridge.stream():
+            print(vitals)
+
+    try:
+        asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else 'vitalsign_output.txt'))
+    except KeyboardInterrupt:
+        pass
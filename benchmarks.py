@@ -0,0 +1,1388 @@
+"""
+Benchmarks for the Med-Guardian serving path
+Run from the project folder:
+
+    python benchmarks.py                 (run everything)
+    python benchmarks.py predict_many    (run one benchmark)
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import threading
+import json
+import math
+import multiprocessing
+import subprocess
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta
+
+import joblib
+import numpy as np
+
+from feature_layout import (ENGINEERED_FEATURES, FEATURE_SCHEMA_VERSION, RAW_FEATURES,
+                            FeatureLayout, FeatureSchemaError, add_features, check_feature_schema,
+                            raw_values)
+from ml_model_handler import MLModelHandler
+import model_bundle
+from inference_server import InferenceClient, InferenceServer
+from patient_store import PatientStore
+from prediction_coalescer import PredictionCoalescer
+from sequence_windows import create_sequences
+from clinical_rules import VECTORIZE_FROM
+from analysis_executor import AnalysisExecutor
+from async_simulator_bridge import OVERFLOW_POLICIES, AsyncSimulatorBridge
+from monitoring_hub import MonitoringHub
+from simulator_bridge import FileBasedSimulatorBridge, TsvFileTailer
+from vital_sample import Event, Rhythm, VitalSample
+from vitals_history import VitalsRingBuffer
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "model_files02", "risk_classifier_model.pkl")
+
+
+def make_patient(index, rng):
+    """Random but plausible patient in the format used by the GUI"""
+    return {
+        "case_id": f"CASE-{index:06d}",
+        "gender": rng.choice(["Male", "Female"]),
+        "age": str(rng.randint(18, 95)),
+        "height": str(rng.randint(150, 195)),
+        "weight": str(rng.randint(45, 120)),
+        "vital_signs": {
+            "heart_rate": str(rng.randint(40, 150)),
+            "systolic_bp": str(rng.randint(80, 190)),
+            "diastolic_bp": str(rng.randint(45, 110)),
+            "spo2": str(rng.randint(82, 100)),
+            "respiratory_rate": str(rng.randint(8, 32)),
+            "temperature": str(round(rng.uniform(35.0, 40.0), 1))
+        }
+    }
+
+
+def make_ward(n_patients, seed=42):
+    """List of n_patients random patients (reproducible)"""
+    rng = random.Random(seed)
+    return [make_patient(i, rng) for i in range(n_patients)]
+
+
+def timed(func, *args):
+    """Run func(*args) once and return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_predict_many(n_patients=500):
+    """Loop of single predict calls vs one predict_many call"""
+    handler = MLModelHandler(MODEL_PATH)
+    if not handler.model:
+        print("Model not available, skipping")
+        return
+
+    ward = make_ward(n_patients)
+
+    singles, loop_s = timed(lambda: [handler.predict(p) for p in ward])
+    batch, batch_s = timed(handler.predict_many, ward)
+
+    mismatches = sum(
+        1 for a, b in zip(singles, batch)
+        if a['risk_score'] != b['risk_score'] or a['risk_class'] != b['risk_class']
+    )
+
+    # Risk classes from the threshold must match the model's own predict,
+    # including a score exactly at the threshold (Low Risk, proba > 0.5)
+    features, _ = handler.preprocess_batch(ward)
+    high_risk = handler.model.classes_[handler.high_risk_column]
+    predicted = ["High Risk" if label == high_risk else "Low Risk"
+                 for label in handler.model.predict(handler.model_input(features))]
+    if [r['risk_class'] for r in batch] != predicted:
+        raise AssertionError("classify() differs from model.predict")
+    if handler.classify(handler.decision_threshold) != "Low Risk":
+        raise AssertionError("A score equal to the threshold must be Low Risk")
+    print(f"✓ Risk classes match model.predict for {n_patients} patients (tie -> Low Risk)")
+
+    print(f"predict x {n_patients}:   {loop_s * 1000:9.1f} ms "
+          f"({n_patients / loop_s:10.0f} patients/s)")
+    print(f"predict_many({n_patients}): {batch_s * 1000:9.1f} ms "
+          f"({n_patients / batch_s:10.0f} patients/s)")
+    print(f"Speed-up: {loop_s / batch_s:.1f}x, mismatching results: {mismatches}")
+
+
+def edge_case_patients():
+    """Inputs that exercise the fallbacks in the feature code"""
+    return [
+        {"case_id": "UNKNOWN", "gender": "Female", "age": "0", "height": "0",
+         "weight": "0", "vital_signs": {}},
+        {"case_id": "CASE-0007", "gender": "male", "age": "71.5", "height": "162.3",
+         "weight": "58.25", "vital_signs": {"heart_rate": "48", "systolic_bp": "85",
+                                            "diastolic_bp": "55", "spo2": "88",
+                                            "respiratory_rate": "9", "temperature": "35.4"}},
+        {"case_id": "CASE-9999", "gender": "Male", "age": 45, "height": 175,
+         "weight": 80, "vital_signs": {"heart_rate": 85.5, "systolic_bp": 130,
+                                       "diastolic_bp": 85, "spo2": 96,
+                                       "respiratory_rate": 16, "temperature": 37.2}},
+        # Rows straight from the simulator bridge (VitalSample, no temperature)
+        {"case_id": "CASE-0042", "gender": "Female", "age": "60", "height": "165",
+         "weight": "70", "temperature": "38.4",
+         "vital_signs": FileBasedSimulatorBridge.parse_tsv_line(
+             "01:02:03\t112\t91\t38\t24\t150/95\tSinus Tachycardia\tHR changed")},
+        {"case_id": "CASE-0043", "gender": "Male", "age": "30", "height": "180",
+         "weight": "75",
+         "vital_signs": FileBasedSimulatorBridge.parse_tsv_line("00:10\t--\t99\t35\t14\t---\tSinus\t")},
+    ]
+
+
+def reference_features(patient_data, feature_names):
+    """
+    The hand-written features MLModelHandler.preprocess_patient_data
+    built before feature_layout (risk_classifier_model.pkl columns),
+    as a one-row DataFrame in feature_names order
+    """
+    import pandas as pd
+
+    # Extract demographics
+    case_id = patient_data.get('case_id', 'UNKNOWN')
+    age = float(patient_data.get('age', 0))
+    gender = patient_data.get('gender', 'Male')
+    height_cm = float(patient_data.get('height', 0))
+    weight_kg = float(patient_data.get('weight', 0))
+
+    # Convert height from cm to meters
+    height_m = height_cm / 100.0
+
+    # Encode gender (Male=1, Female=0)
+    gender_male = 1 if gender.lower() == 'male' else 0
+
+    # Extract vital signs
+    vital_signs = patient_data.get('vital_signs', {})
+    heart_rate = float(vital_signs.get('heart_rate', 0))
+    systolic_bp = float(vital_signs.get('systolic_bp', 0))
+    diastolic_bp = float(vital_signs.get('diastolic_bp', 0))
+    spo2 = float(vital_signs.get('spo2', 0))
+    respiratory_rate = float(vital_signs.get('respiratory_rate', 0))
+    body_temperature = float(vital_signs.get('temperature', patient_data.get('temperature', 0)))
+
+    # Calculate DERIVED features (as in your training)
+    # 1. Pulse Pressure = Systolic - Diastolic
+    pulse_pressure = systolic_bp - diastolic_bp
+
+    # 2. BMI = weight / (height_m^2)
+    bmi = weight_kg / (height_m ** 2) if height_m > 0 else 0
+
+    # 3. MAP (Mean Arterial Pressure) = Diastolic + (Pulse Pressure / 3)
+    map_value = diastolic_bp + (pulse_pressure / 3)
+
+    # Create a simple numeric Patient ID (extract numbers from case_id)
+    try:
+        patient_id = int(''.join(filter(str.isdigit, case_id)))
+    except:
+        patient_id = 0
+
+    # Feature dictionary matching EXACT training column names
+    features = {
+        'Patient ID': patient_id,
+        'Heart Rate': heart_rate,
+        'Respiratory Rate': respiratory_rate,
+        'Body Temperature': body_temperature,
+        'Oxygen Saturation': spo2,
+        'Systolic Blood Pressure': systolic_bp,
+        'Diastolic Blood Pressure': diastolic_bp,
+        'Age': age,
+        'Weight (kg)': weight_kg,
+        'Height (m)': height_m,
+        'Derived_Pulse_Pressure': pulse_pressure,
+        'Derived_BMI': bmi,
+        'Derived_MAP': map_value,
+        'Gender_Male': gender_male
+    }
+    return pd.DataFrame([features])[list(feature_names)]
+
+
+def check_feature_parity(handler, patients):
+    """
+    The DataFrame path (preprocess_patient_data) and the compiled
+    FeatureLayout (row and batch) must give bit-identical features to
+    the hand-written code they replaced (reference_features)
+    """
+    expected = np.vstack([
+        reference_features(p, handler.feature_names).to_numpy(dtype=np.float64) for p in patients
+    ])
+
+    for i, patient_data in enumerate(patients):
+        frame = handler.preprocess_patient_data(patient_data)
+        if list(frame.columns) != handler.feature_names or \
+                frame.to_numpy(dtype=np.float64).tobytes() != expected[i:i + 1].tobytes():
+            raise AssertionError(f"DataFrame path differs for patient {i}")
+        row = handler.preprocess_row(patient_data)
+        if row.tobytes() != expected[i:i + 1].tobytes():
+            raise AssertionError(f"Row path differs for patient {i}: {row} != {expected[i]}")
+
+    matrix, rows = handler.preprocess_batch(patients)
+    if rows != list(range(len(patients))) or matrix.tobytes() != expected.tobytes():
+        raise AssertionError("Batch path differs from the reference features")
+
+    print(f"✓ Feature parity: {len(patients)} patients bit-identical")
+
+
+def check_training_parity(patients):
+    """
+    Training features (add_features on a DataFrame) must equal the
+    serving features (FeatureLayout row and batch paths)
+    """
+    import pandas as pd
+
+    names = list(RAW_FEATURES[1:]) + list(ENGINEERED_FEATURES)
+    layout = FeatureLayout(names)
+    raw = np.array([raw_values(p) for p in patients], dtype=np.float64)
+    df = add_features(pd.DataFrame(raw, columns=RAW_FEATURES), ENGINEERED_FEATURES)
+    expected = df[names].to_numpy(dtype=np.float64)
+
+    matrix, rows = layout.matrix(patients)
+    if rows != list(range(len(patients))) or matrix.tobytes() != expected.tobytes():
+        raise AssertionError("Batch features differ from the training features")
+    for i, patient_data in enumerate(patients):
+        if layout.row(patient_data).tobytes() != expected[i:i + 1].tobytes():
+            raise AssertionError(f"Row features differ from the training features for patient {i}")
+
+    print(f"✓ Training/serving parity: {len(names)} features x {len(patients)} patients bit-identical")
+
+
+def check_schema_refusal():
+    """A model trained with other feature definitions must not load"""
+    model = joblib.load(MODEL_PATH)
+    names = list(model.feature_names_in_)
+    for label, args in (("newer schema", (names, model, FEATURE_SCHEMA_VERSION + 1)),
+                        ("unknown feature", (names[:-1] + ["Lactate"], None, None)),
+                        ("wrong feature count", (names[:-1], type("M", (), {"n_features_in_": 14})(), None))):
+        try:
+            check_feature_schema(*args)
+        except FeatureSchemaError as e:
+            print(f"✓ Refused ({label}): {e}")
+        else:
+            raise AssertionError(f"Schema check accepted {label}")
+    print(f"✓ Column order taken from the model: "
+          f"{check_feature_schema(names[::-1], model, FEATURE_SCHEMA_VERSION) == names}")
+
+
+def bench_feature_layout(n_patients=2000):
+    """Per-call DataFrame preprocessing vs the compiled FeatureLayout"""
+    handler = MLModelHandler(MODEL_PATH)
+    if not handler.feature_layout:
+        print("Model not available, skipping")
+        return
+
+    ward = make_ward(n_patients) + edge_case_patients()
+    check_feature_parity(handler, ward)
+    check_training_parity(ward)
+    check_schema_refusal()
+
+    _, frame_s = timed(lambda: [handler.preprocess_patient_data(p) for p in ward])
+    _, row_s = timed(lambda: [handler.preprocess_row(p) for p in ward])
+    _, batch_s = timed(handler.preprocess_batch, ward)
+
+    n = len(ward)
+    print(f"DataFrame per patient: {frame_s / n * 1e6:8.2f} us/patient")
+    print(f"FeatureLayout.row:     {row_s / n * 1e6:8.2f} us/patient")
+    print(f"FeatureLayout.matrix:  {batch_s / n * 1e6:8.2f} us/patient")
+    print(f"Speed-up (row): {frame_s / row_s:.1f}x")
+
+
+def make_tsv_rows(n_rows, rng, start_second=0):
+    """VitalSignSim-style TSV rows (without header)"""
+    rows = []
+    for i in range(n_rows):
+        seconds = start_second + i
+        rows.append(
+            f"{seconds // 60:02d}:{seconds % 60:02d}\t{rng.randint(50, 140)}\t{rng.randint(85, 100)}"
+            f"\t{rng.randint(30, 45)}\t{rng.randint(10, 30)}"
+            f"\t{rng.randint(90, 170)}/{rng.randint(50, 100)}\tSinus\t\n"
+        )
+    return "".join(rows)
+
+
+def check_tsv_parsing():
+    """
+    Missing values become NaN, unknown rhythm/event text is kept next to
+    the OTHER member, and the dict-style access still answers as before
+    """
+    parse = FileBasedSimulatorBridge.parse_tsv_line
+    for line in ("Time\tHR\tSpO2\tetCO2\tRR\tNIBP\tRhythm\tEvent", "00:32\t98\t68", "", "\n"):
+        if parse(line) is not None:
+            raise AssertionError(f"Parsed a line that is not a row: {line!r}")
+
+    for nibp in ("", "--/--", "120/"):
+        sample = parse(f"00:32\t98\t\t55\t37\t{nibp}\tSinus\t")
+        if not (math.isnan(sample.spo2) and math.isnan(sample.diastolic_bp)) or sample.blood_pressure != "" \
+                or 'diastolic_bp' in sample or sample.get('spo2', 0) != 0:
+            raise AssertionError(f"Missing values not NaN for NIBP {nibp!r}: {sample!r}")
+        if 'spo2' in sample.keys() or sample.to_dict()['blood_pressure'] != "":
+            raise AssertionError("Unmeasured vitals listed as keys")
+
+    sample = parse("01:02:03\t98\t95\t38\t16\t120/80\tTorsades\tDefib 200J")
+    if (sample.rhythm, sample.rhythm_text, sample['rhythm']) != (Rhythm.OTHER, "Torsades", "Torsades") \
+            or (sample.event, sample.event_text, sample['event']) != (Event.OTHER, "Defib 200J", "Defib 200J"):
+        raise AssertionError(f"Unknown rhythm/event text lost: {sample.to_dict()}")
+
+    sample = parse("00:32\t98\t95\t38\t16\t120/80\tafib\tHR changed")
+    if (sample.rhythm, sample.rhythm_text, sample['rhythm']) != (Rhythm.ATRIAL_FIBRILLATION, None, "AFIB") \
+            or (sample.event, sample.event_text, sample['event']) != (Event.HR_CHANGED, None, "HR changed"):
+        raise AssertionError(f"Known rhythm/event parsed wrongly: {sample.to_dict()}")
+    expected = {'time': '00:32', 'heart_rate': 98.0, 'spo2': 95.0, 'etco2': 38.0,
+                'respiratory_rate': 16.0, 'systolic_bp': 120.0, 'diastolic_bp': 80.0,
+                'blood_pressure': '120/80', 'rhythm': 'AFIB', 'event': 'HR changed'}
+    as_dict = sample.to_dict()
+    if {key: as_dict[key] for key in expected} != expected or sample['heart_rate'] != 98.0 \
+            or sample.get('temperature', 37.0) != 37.0 or 'temperature' in sample \
+            or 'timestamp' not in as_dict:
+        raise AssertionError(f"Dict-style access changed: {as_dict}")
+    try:
+        sample['temperature']
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("Unmeasured temperature did not raise KeyError")
+
+    sample = parse("00:40\t98\t95\t38\t16\t120/80")
+    if (sample.rhythm, sample.event) != (Rhythm.UNKNOWN, Event.NONE):
+        raise AssertionError(f"Row without rhythm/event columns: {sample!r}")
+
+    print("✓ TSV parsing: missing vitals NaN, unknown rhythm/event text kept, dict access unchanged")
+
+
+def bench_parse_tsv(n_rows=200_000):
+    """Parsing checks, then the cost of parse_tsv_line per row"""
+    check_tsv_parsing()
+
+    lines = make_tsv_rows(n_rows, random.Random(6)).splitlines()
+    samples, seconds = timed(lambda: [FileBasedSimulatorBridge.parse_tsv_line(line) for line in lines])
+    print(f"parse_tsv_line: {len(samples)} rows in {seconds * 1000:.1f} ms "
+          f"({seconds / n_rows * 1e6:.2f} us/row)")
+
+
+def check_tsv_tailer(folder, rng):
+    """
+    Appends (with a line finished on a later poll), truncation, a rewrite
+    past the old offset and rotation: every line delivered exactly once
+    """
+    path = os.path.join(folder, "tail.txt")
+    tailer = TsvFileTailer(path)
+    delivered = []
+    expected = []
+
+    def write(text, mode="a"):
+        with open(path, mode) as f:
+            f.write(text)
+
+    def poll(label, new_lines):
+        expected.extend(new_lines)
+        got = tailer.read_lines()
+        delivered.extend(got)
+        if got != new_lines:
+            raise AssertionError(f"{label}: expected {new_lines!r}, got {got!r}")
+
+    try:
+        poll("missing file", [])
+        rows = make_tsv_rows(5, rng).splitlines()
+        write("\n".join(rows[:3]) + "\n" + rows[3][:10], "w")
+        poll("append with partial line", rows[:3])
+        poll("nothing new", [])
+        write(rows[3][10:] + "\n" + rows[4] + "\n")
+        poll("partial line finished", rows[3:5])
+
+        rows = make_tsv_rows(2, rng, start_second=600).splitlines()
+        write("\n".join(rows) + "\n", "w")
+        poll("truncated", rows)
+
+        # Rewritten past the old offset between two polls: same inode, bigger file
+        rows = make_tsv_rows(6, rng, start_second=1200).splitlines()
+        write("\n".join(rows) + "\n", "w")
+        poll("truncated and rewritten", rows)
+
+        # Rotated with unread rows left in the old file, the last one
+        # without its newline
+        old_rows = make_tsv_rows(3, rng, start_second=1800).splitlines()
+        write("\n".join(old_rows))
+        os.replace(path, path + ".1")
+        poll("rotated, new file missing", [])
+        rows = make_tsv_rows(3, rng, start_second=2400).splitlines()
+        write("\n".join(rows) + "\n", "w")
+        poll("rotated, old file drained", old_rows[:2])
+        poll("rotated, old file finished", old_rows[2:])
+        poll("rotated, new file", rows)
+        poll("nothing new after rotate", [])
+    finally:
+        tailer.close()
+
+    samples = [FileBasedSimulatorBridge.parse_tsv_line(line) for line in delivered]
+    if len(set(delivered)) != len(delivered) or delivered != expected:
+        raise AssertionError("Tailer delivered a line twice or out of order")
+    if not all(samples):
+        raise AssertionError("Tailer delivered a line that does not parse")
+    print(f"✓ Tailer: {len(delivered)} lines through append, partial line, truncate, "
+          f"rewrite and rotate, each delivered once")
+
+
+def bench_tsv_tailer(n_rows=200_000, rows_per_write=50):
+    """Correctness checks, then the cost of following a growing export"""
+    rng = random.Random(5)
+    folder = tempfile.mkdtemp(prefix="tail_")
+    try:
+        check_tsv_tailer(folder, rng)
+
+        path = os.path.join(folder, "bed.txt")
+        chunks = [make_tsv_rows(rows_per_write, rng, start_second=i)
+                  for i in range(0, n_rows, rows_per_write)]
+        open(path, "w").close()
+        tailer = TsvFileTailer(path)
+        lines = 0
+        start = time.perf_counter()
+        with open(path, "a") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                f.flush()
+                lines += len(tailer.read_lines())
+        elapsed = time.perf_counter() - start
+        tailer.close()
+        print(f"{lines} rows in {len(chunks)} polls: {elapsed * 1000:.1f} ms "
+              f"({elapsed / len(chunks) * 1e6:.1f} us/poll, append included)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+async def _consume(bridge, limit=None):
+    """(time_s of the rows received, largest queue length seen), stopping after limit rows"""
+    received = []
+    longest = 0
+    stream = bridge.stream()
+    try:
+        async for vital_signs in stream:
+            longest = max(longest, bridge.qsize() + 1)
+            received.append(vital_signs.time_s)
+            if len(received) == limit:
+                break
+    finally:
+        await stream.aclose()
+    return received, longest
+
+
+def check_async_overflow(path, n_rows, maxsize=8):
+    """
+    The reader only yields to the consumer between file chunks (or when
+    'block' makes it wait), so a file that fits in one chunk overflows the
+    queue and the consumer sees exactly the rows each policy keeps
+    """
+    import asyncio
+
+    rows = list(range(n_rows))
+    expected = {
+        'block': rows,
+        'drop_oldest': rows[-maxsize:],
+        'coalesce': rows[:maxsize - 1] + rows[-1:],
+    }
+    for policy, kept in expected.items():
+        bridge = AsyncSimulatorBridge(path, maxsize=maxsize, overflow=policy, stop_at_eof=True)
+        received, longest = asyncio.run(_consume(bridge))
+        lost = bridge.dropped + bridge.coalesced
+        if received != kept or longest > maxsize or lost != n_rows - len(kept):
+            raise AssertionError(f"{policy}: kept {received}, queue peaked at {longest}, "
+                                 f"{lost} rows counted as lost")
+        print(f"✓ Overflow '{policy}': {len(received)} of {n_rows} rows kept, "
+              f"queue never above {maxsize}")
+
+
+def check_async_early_break(path, poll_interval=0.05):
+    """Leaving the loop early stops a reader that is blocked on a full queue"""
+    import asyncio
+
+    async def run():
+        bridge = AsyncSimulatorBridge(path, maxsize=4, overflow='block', poll_interval=poll_interval)
+        start = time.perf_counter()
+        received, _ = await _consume(bridge, limit=3)
+        elapsed = time.perf_counter() - start
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return bridge, received, elapsed, others
+
+    bridge, received, elapsed, others = asyncio.run(run())
+    if received != [0, 1, 2] or bridge.is_running or others or elapsed > poll_interval + 0.5:
+        raise AssertionError(f"Early break: got {received}, running={bridge.is_running}, "
+                             f"{len(others)} tasks left, {elapsed:.3f} s")
+    print(f"✓ Early break: reader stopped, no tasks left ({elapsed * 1000:.1f} ms)")
+
+
+def bench_async_bridge(n_rows=100_000):
+    """Overflow policy checks, then rows/s through the bounded queue"""
+    import asyncio
+
+    rng = random.Random(9)
+    folder = tempfile.mkdtemp(prefix="async_")
+    try:
+        path = os.path.join(folder, "bed.txt")
+        with open(path, "w") as f:
+            f.write(make_tsv_rows(50, rng))
+        check_async_overflow(path, 50)
+        check_async_early_break(path)
+
+        with open(path, "w") as f:
+            f.write(make_tsv_rows(n_rows, rng))
+        for policy in OVERFLOW_POLICIES:
+            bridge = AsyncSimulatorBridge(path, overflow=policy, stop_at_eof=True)
+            (received, _), seconds = timed(lambda: asyncio.run(_consume(bridge)))
+            print(f"{policy:<12} {len(received):7d} rows delivered in {seconds * 1000:7.1f} ms "
+                  f"({n_rows / seconds:.0f} rows/s read)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def check_replay(path, n_rows, speed=200.0, tolerance=0.05):
+    """
+    Paced replay takes (last - first time) / speed, passes time_s through
+    unchanged and stops when the bridge is disconnected mid-way
+    """
+    with open(path) as f:
+        times = [FileBasedSimulatorBridge.parse_tsv_line(line).time_s for line in f]
+    expected = (times[-1] - times[0]) / speed
+
+    bridge = FileBasedSimulatorBridge(path)
+    received = []
+    count, elapsed = timed(bridge.replay, lambda vital_signs: received.append(vital_signs.time_s), speed)
+    if count != n_rows or received != times:
+        raise AssertionError(f"Replay delivered {count} rows, time_s changed: {received != times}")
+    if not expected <= elapsed <= expected + tolerance:
+        raise AssertionError(f"Replay took {elapsed:.3f} s, expected {expected:.3f} s")
+    print(f"✓ Replay at {speed:g}x: {elapsed * 1000:.1f} ms for {expected * 1000:.1f} ms "
+          f"of scaled recording, time_s unchanged")
+
+    # An hour between the last two rows (18 s at this speed): a stop from
+    # another thread during that wait must end the replay without the last row
+    with open(path, "a") as f:
+        f.write(make_tsv_rows(1, random.Random(1), start_second=times[-1] + 3600))
+    bridge = FileBasedSimulatorBridge(path)
+    stop_at = expected + 0.1
+    timer = threading.Timer(stop_at, bridge.disconnect)
+    timer.start()
+    count, elapsed = timed(bridge.replay, None, speed)
+    timer.join()
+    if count != n_rows or elapsed > stop_at + 0.6:
+        raise AssertionError(f"Stopped replay delivered {count} rows in {elapsed:.3f} s")
+    print(f"✓ Replay stopped mid-wait after {count} of {n_rows + 1} rows "
+          f"({(elapsed - stop_at) * 1000:.0f} ms after the stop)")
+
+
+def bench_replay(n_rows=200_000):
+    """Replay checks, then rows/s of an unpaced backfill replay"""
+    rng = random.Random(4)
+    folder = tempfile.mkdtemp(prefix="replay_")
+    try:
+        path = os.path.join(folder, "bed.txt")
+        with open(path, "w") as f:
+            f.write(make_tsv_rows(41, rng))
+        check_replay(path, 41)
+
+        with open(path, "w") as f:
+            f.write(make_tsv_rows(n_rows, rng))
+        bridge = FileBasedSimulatorBridge(path)
+        count, seconds = timed(bridge.replay)
+        print(f"Unpaced replay: {count} rows in {seconds * 1000:.1f} ms ({count / seconds:.0f} rows/s)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_monitoring_hub(n_beds=300, rows_per_bed=20):
+    """One hub thread (plus workers) following a ward of bed exports"""
+    rng = random.Random(7)
+    folder = tempfile.mkdtemp(prefix="ward_")
+    handler = MLModelHandler(MODEL_PATH)
+    ward = make_ward(n_beds)
+
+    received = [0]
+    scored = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def on_row(bed_id, vital_signs):
+        with lock:
+            received[0] += 1
+            if received[0] == n_beds * rows_per_bed:
+                done.set()
+
+    def on_prediction(bed_id, result):
+        with lock:
+            scored[0] += 1
+
+    hub = MonitoringHub(model_handler=handler if handler.model else None, poll_interval=0.01)
+    try:
+        paths = []
+        for i in range(n_beds):
+            path = os.path.join(folder, f"bed{i:03d}.txt")
+            open(path, "w").close()
+            paths.append(path)
+            hub.add_bed(f"bed{i:03d}", path, patient=ward[i],
+                        callback=on_row, on_prediction=on_prediction)
+        hub.start()
+
+        start = time.perf_counter()
+        for path in paths:
+            with open(path, "a") as f:
+                f.write(make_tsv_rows(rows_per_bed, rng))
+        done.wait(timeout=60)
+        elapsed = time.perf_counter() - start
+        hub.stop()
+
+        print(f"{n_beds} beds, {received[0]} rows delivered in {elapsed * 1000:.1f} ms "
+              f"({received[0] / elapsed:.0f} rows/s), {scored[0]} bed scores, "
+              f"{threading.active_count()} threads alive after stop")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_vitals_history(n_rows=1_000_000, capacity=43_200):
+    """Append cost, window cost and memory of one bed's ring buffer"""
+    rng = random.Random(3)
+    samples = [VitalSample(time_s=i, heart_rate=float(rng.randint(50, 140)),
+                           spo2=float(rng.randint(85, 100)), etco2=35.0,
+                           respiratory_rate=float(rng.randint(10, 30)),
+                           systolic_bp=120.0, diastolic_bp=80.0)
+               for i in range(10_000)]
+
+    history = VitalsRingBuffer(capacity)
+    memory_before = history.nbytes
+
+    start = time.perf_counter()
+    for i in range(n_rows):
+        history.append(samples[i % len(samples)])
+    append_s = time.perf_counter() - start
+
+    _, window_s = timed(lambda: [history.window(3600) for _ in range(10_000)])
+    window = history.window(3600)
+    shares_memory = np.shares_memory(window, history.window())
+
+    print(f"{n_rows} appends: {append_s / n_rows * 1e6:.2f} us/append")
+    print(f"window(3600): {window_s / 10_000 * 1e6:.2f} us/call, zero-copy: {shares_memory}")
+    print(f"Memory: {memory_before / 1e6:.1f} MB before, {history.nbytes / 1e6:.1f} MB "
+          f"after {n_rows} rows (capacity {capacity})")
+
+
+def make_records(n_records, seed=11):
+    """Patient records as saved by the insertion screens"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(n_records):
+        patient = make_patient(i, rng)
+        patient["temperature"] = patient["vital_signs"]["temperature"]
+        records.append(patient)
+    return records
+
+
+def bench_patient_store(n_records=100_000, n_ops=200):
+    """Indexed store vs whole-file patients.json rewrites at n_records"""
+    folder = tempfile.mkdtemp(prefix="store_")
+    try:
+        records = make_records(n_records + n_ops)
+        base, extra = records[:n_records], records[n_records:]
+
+        # Legacy path: load everything, change the list, rewrite with indent=4
+        json_path = os.path.join(folder, "patients.json")
+        with open(json_path, "w") as f:
+            json.dump(base, f, indent=4)
+
+        def json_insert(patient):
+            with open(json_path, "r") as f:
+                patients = json.load(f)
+            patients.append(patient)
+            with open(json_path, "w") as f:
+                json.dump(patients, f, indent=4)
+
+        # Store: one-time migration, then indexed single-record operations
+        store, migrate_s = timed(PatientStore, os.path.join(folder, "patients.db"), json_path)
+        _, insert_s = timed(lambda: [store.add(p) for p in extra])
+        ids = [p["case_id"] for p in base[::n_records // n_ops]][:n_ops]
+        _, get_s = timed(lambda: [store.get(case_id) for case_id in ids])
+        prediction = {"risk_class": "High Risk", "risk_score": 0.81, "alerts": ["Tachycardia"]}
+        _, predict_s = timed(lambda: [store.record_prediction(case_id, prediction) for case_id in ids])
+        _, delete_s = timed(lambda: [store.delete(case_id) for case_id in ids])
+        bulk_ids = [p["case_id"] for p in base[1::10]]
+        _, bulk_s = timed(store.delete_many, bulk_ids)
+        _, compact_s = timed(store.compact)
+
+        # Event retention: past the cutoff only each stored patient's latest prediction stays
+        live_ids = [p["case_id"] for p in extra[:20]]
+        for case_id in live_ids:
+            store.record_prediction(case_id, dict(prediction, risk_score=0.5))
+            store.record_prediction(case_id, prediction)
+        events_before = len(store.events())
+        pruned = store.prune_events(datetime.now() + timedelta(days=1))
+        kept = store.events()
+        if sorted(e["case_id"] for e in kept) != sorted(live_ids) or \
+                any(e["kind"] != "prediction" or e["payload"] != prediction for e in kept) or \
+                any(store.get(case_id)["ml_predictions"] != prediction for case_id in live_ids):
+            raise AssertionError("prune_events kept the wrong events")
+
+        json_ops = 3
+        _, json_s = timed(lambda: [json_insert(p) for p in extra[:json_ops]])
+
+        print(f"patients.json insert at {n_records}: {json_s / json_ops * 1000:9.1f} ms/op")
+        print(f"Migration of {n_records} JSON records: {migrate_s:.2f} s")
+        print(f"PatientStore.add:    {insert_s / n_ops * 1000:9.3f} ms/op")
+        print(f"PatientStore.get:    {get_s / n_ops * 1000:9.3f} ms/op")
+        print(f"PatientStore.record_prediction: {predict_s / n_ops * 1000:9.3f} ms/op")
+        print(f"PatientStore.delete: {delete_s / n_ops * 1000:9.3f} ms/op")
+        print(f"PatientStore.delete_many({len(bulk_ids)}): {bulk_s * 1000:.1f} ms, compact: {compact_s * 1000:.1f} ms")
+        print(f"✓ Event retention: {pruned} of {events_before} events pruned, "
+              f"{len(kept)} latest predictions kept")
+        store.close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def _allocate_ids(db_path, singles, total, batch):
+    """Worker for bench_case_ids: single allocations, then big batches"""
+    store = PatientStore(db_path, json_path=None)
+    case_ids = [store.allocate_case_id() for _ in range(singles)]
+    while len(case_ids) < total:
+        case_ids.extend(store.allocate_case_ids(min(batch, total - len(case_ids))))
+    store.close()
+    return case_ids
+
+
+def bench_case_ids(n_ids=2_000_000, processes=4, singles=500, batch=10_000, n_records=300_000):
+    """Stress test: n_ids case IDs from several processes sharing a store of n_records"""
+    folder = tempfile.mkdtemp(prefix="case_ids_")
+    try:
+        db_path = os.path.join(folder, "patients.db")
+        store = PatientStore(db_path, json_path=None)
+        store.add_many(make_records(n_records))
+        # Some hand-typed IDs past the stored ones that the allocator must skip
+        hand_typed = [f"CASE-{i:06d}" for i in (n_records + 5, n_records + 77, 450_000, 600_000)]
+        store.add_many({"case_id": case_id} for case_id in hand_typed)
+
+        # Allocation cost must not grow with the number of stored records
+        _, first_s = timed(store.allocate_case_id)
+        _, single_s = timed(lambda: [store.allocate_case_id() for _ in range(singles)])
+        print(f"allocate_case_id with {n_records} records stored: first {first_s * 1000:.2f} ms "
+              f"(seeds the counter), then {single_s / singles * 1000:.3f} ms/ID")
+        store.close()
+
+        per_process = n_ids // processes
+        with multiprocessing.Pool(processes) as pool:
+            start = time.perf_counter()
+            results = pool.starmap(_allocate_ids, [(db_path, singles, per_process, batch)] * processes)
+            elapsed = time.perf_counter() - start
+
+        all_ids = [case_id for case_ids in results for case_id in case_ids]
+        unique = set(all_ids)
+        numbers = [[int(case_id[len("CASE-"):]) for case_id in case_ids] for case_ids in results]
+        ordered = all(all(a < b for a, b in zip(n, n[1:])) for n in numbers)
+        print(f"{len(all_ids)} IDs from {processes} processes in {elapsed:.2f} s "
+              f"({singles} single + batches of {batch} each)")
+        print(f"Duplicates: {len(all_ids) - len(unique)}")
+        print(f"Stored or hand-typed IDs handed out: "
+              f"{sum(int(case_id[len('CASE-'):]) < n_records for case_id in unique) + len(unique & set(hand_typed))}")
+        print(f"Increasing within each process: {ordered}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_patient_table(sizes=(10, 1_000, 10_000, 100_000), visible_rows=12, scrolls=200):
+    """
+    Data side of the patient table: cost of opening it and of scrolling
+
+    The old screen loaded every record and built six labels per patient;
+    VirtualTable builds visible_rows x 6 labels once and reads pages.
+    """
+    # The widgets need a display; their fetch pattern does not
+    from virtual_table import PagedRows
+
+    folder = tempfile.mkdtemp(prefix="table_")
+    try:
+        rng = random.Random(5)
+        print(f"{'records':>8} {'open ms':>9} {'open KB':>9} {'scroll ms':>10} "
+              f"{'all() ms':>9} {'all() KB':>10} {'old labels':>11}")
+        for n in sizes:
+            db_path = os.path.join(folder, f"patients_{n}.db")
+            store = PatientStore(db_path, json_path=None)
+            store.add_many(make_records(n))
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            rows = PagedRows(store.page, store.count)
+            rows.rows(0, visible_rows)
+            open_ms = (time.perf_counter() - start) * 1000
+            open_kb = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+            starts = [rng.randrange(max(1, n - visible_rows)) for _ in range(scrolls)]
+            _, scroll_s = timed(lambda: [rows.rows(first, visible_rows) for first in starts])
+
+            tracemalloc.start()
+            _, all_s = timed(store.all)
+            all_kb = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+            print(f"{n:>8} {open_ms:>9.2f} {open_kb:>9.0f} {scroll_s / scrolls * 1000:>10.3f} "
+                  f"{all_s * 1000:>9.1f} {all_kb:>10.0f} {n * 6:>11}")
+            store.close()
+        print(f"VirtualTable labels at every size: {visible_rows * 6}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_patient_query(n_records=100_000, repeats=20):
+    """Indexed search in PatientStore vs filtering every record in Python"""
+    folder = tempfile.mkdtemp(prefix="query_")
+    try:
+        rng = random.Random(3)
+        records = make_records(n_records)
+        for patient in records:
+            score = rng.random()
+            patient["ml_predictions"] = {"risk_score": round(score, 3),
+                                         "risk_class": "High Risk" if score >= 0.5 else "Low Risk"}
+
+        store = PatientStore(os.path.join(folder, "patients.db"), json_path=None)
+        store.add_many(records)
+
+        searches = {
+            "High Risk, age >= 65": dict(risk_class="High Risk", min_age=65),
+            "Female, 30-40": dict(gender="Female", min_age=30, max_age=40),
+            "risk_score >= 0.95": dict(min_risk_score=0.95),
+            "case_id prefix": dict(case_id="CASE-0123"),
+        }
+
+        def scan(filters):
+            """Reference: what a full pass over patients.json does"""
+            out = []
+            for p in records:
+                pred = p["ml_predictions"]
+                age = float(p["age"])
+                if ((filters.get("risk_class") is None or pred["risk_class"] == filters["risk_class"])
+                        and (filters.get("gender") is None or p["gender"] == filters["gender"])
+                        and (filters.get("min_age") is None or age >= filters["min_age"])
+                        and (filters.get("max_age") is None or age <= filters["max_age"])
+                        and (filters.get("min_risk_score") is None or pred["risk_score"] >= filters["min_risk_score"])
+                        and (filters.get("case_id") is None or p["case_id"].startswith(filters["case_id"]))):
+                    out.append(p)
+            return out
+
+        for name, filters in searches.items():
+            expected = scan(filters)
+            total = store.count(**filters)
+            top = store.query(limit=50, sort_by="risk_score", descending=True, **filters)
+            expected_top = sorted(expected, key=lambda p: -p["ml_predictions"]["risk_score"])[:50]
+            same = (total == len(expected)
+                    and [p["ml_predictions"]["risk_score"] for p in top]
+                    == [p["ml_predictions"]["risk_score"] for p in expected_top])
+
+            _, query_s = timed(lambda: [(store.count(**filters),
+                                         store.query(limit=50, sort_by="risk_score",
+                                                     descending=True, **filters))
+                                        for _ in range(repeats)])
+            _, scan_s = timed(lambda: [scan(filters) for _ in range(3)])
+            print(f"{name:<22} {total:>6} matches  query {query_s / repeats * 1000:7.2f} ms  "
+                  f"scan {scan_s / 3 * 1000:7.2f} ms  same: {same}")
+        store.close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_screen_startup(repeats=3, switches=50):
+    """
+    What each screen change cost before app.py: a new interpreter that
+    imports the GUI stack, decodes the background and opens the store
+    (plus the model on the insertion screen). In the app shell the
+    same resources are created once and a screen change only swaps
+    frames; that part needs a display and is skipped without one.
+    """
+    background = "vector-healthcare-medical-sciencefuturistic-background-260nw-2652074677.jpg"
+    screen = ("import customtkinter, matplotlib.figure\n"
+              "from PIL import Image\n"
+              "from patient_store import PatientStore\n"
+              f"Image.open({background!r}).load()\n"
+              "PatientStore(':memory:', json_path=None)\n")
+    with_model = screen + f"from ml_model_handler import MLModelHandler\nMLModelHandler({MODEL_PATH!r})\n"
+
+    for name, code in (("screen", screen), ("screen + model", with_model)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        print(f"New process per click ({name}): {(time.perf_counter() - start) / repeats * 1000:8.1f} ms")
+
+    # In-process: real screen switches in the app shell, drawn with update()
+    try:
+        from app import App
+        shell = App.instance()
+    except Exception as e:  # tkinter.TclError without a display
+        print(f"App shell screen switch: skipped ({e})")
+        return
+
+    folder = tempfile.mkdtemp(prefix="screens_")
+    cwd = os.getcwd()
+    os.chdir(folder)  # the shell's PatientStore() goes to a scratch database
+    try:
+        def switch(name):
+            shell.show(name)
+            shell.update()
+
+        _, first_s = timed(lambda: (switch("homepage"), switch("patients_data")))
+        _, switch_s = timed(lambda: [switch(name) for _ in range(switches)
+                                     for name in ("homepage", "patients_data")])
+        print(f"App shell, first visit (home + patients): {first_s * 1000:8.1f} ms")
+        print(f"App shell, switch to a built screen:     {switch_s / (2 * switches) * 1000:8.1f} ms")
+        shell.store.close()
+        shell.destroy()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of a list of numbers, nearest rank"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def bench_inference_server(clients=32, requests_per_client=50):
+    """Load test: concurrent /predict calls, with and without micro-batching"""
+    handler = MLModelHandler(MODEL_PATH)
+    rng = random.Random(9)
+    patients = [make_patient(i, rng) for i in range(clients * requests_per_client)]
+
+    for label, max_batch in (("no batching", 1), ("micro-batching", 64)):
+        server = InferenceServer(handler, port=0, max_batch=max_batch, max_wait=0.002)
+        server.start()
+        client = InferenceClient(server.url)
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(offset):
+            mine = []
+            for patient in patients[offset:offset + requests_per_client]:
+                start = time.perf_counter()
+                client.predict(patient)
+                mine.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(mine)
+
+        threads = [threading.Thread(target=worker, args=(i * requests_per_client,))
+                   for i in range(clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        batcher = server.batcher
+        print(f"{label:<15} {len(latencies) / elapsed:7.0f} req/s  "
+              f"p50 {percentile(latencies, 50) * 1000:6.2f} ms  "
+              f"p99 {percentile(latencies, 99) * 1000:6.2f} ms  "
+              f"avg batch {batcher.requests / max(batcher.batches, 1):5.1f}")
+        server.shutdown()
+        server.server_close()
+
+    # Same answers as calling the handler directly
+    server = InferenceServer(handler, port=0)
+    server.start()
+    client = InferenceClient(server.url)
+    sample = patients[:50]
+    remote = [client.predict(p) for p in sample]
+    local = handler.predict_many(sample)
+    same = all(r["risk_score"] == l["risk_score"] and r["risk_class"] == l["risk_class"]
+               for r, l in zip(remote, local))
+    print(f"Server results match MLModelHandler: {same}")
+    server.shutdown()
+    server.server_close()
+
+
+def bench_prediction_coalescer(burst=1000, max_batch=256, max_wait=0.005):
+    """Burst of predict requests: one thread each vs coalesced futures"""
+    handler = MLModelHandler(MODEL_PATH)
+    rng = random.Random(21)
+    patients = [make_patient(i, rng) for i in range(burst)]
+
+    # Old GUI path: a fresh thread calling predict per request
+    results = [None] * burst
+
+    def analyze(i):
+        results[i] = handler.predict(patients[i])
+
+    def per_thread():
+        threads = [threading.Thread(target=analyze, args=(i,)) for i in range(burst)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    _, threaded_time = timed(per_thread)
+    print(f"Thread per request:  {threaded_time:7.3f} s  ({burst / threaded_time:8.0f} req/s)")
+
+    coalescer = PredictionCoalescer(handler, max_batch=max_batch, max_wait=max_wait)
+    start = time.perf_counter()
+    futures = [coalescer.submit(p) for p in patients]
+    coalesced = [f.result() for f in futures]
+    coalesced_time = time.perf_counter() - start
+    print(f"Coalesced futures:   {coalesced_time:7.3f} s  ({burst / coalesced_time:8.0f} req/s)  "
+          f"{coalescer.batches} batches")
+    print(f"Speed-up: {threaded_time / coalesced_time:.1f}x")
+
+    # A lone request waits at most max_wait for company
+    latencies = []
+    for patient in patients[:50]:
+        start = time.perf_counter()
+        coalescer.predict(patient)
+        latencies.append(time.perf_counter() - start)
+    print(f"Single request latency p50 {percentile(latencies, 50) * 1000:.2f} ms  "
+          f"(window {max_wait * 1000:.0f} ms)")
+    coalescer.close()
+
+    same = all(a["risk_score"] == b["risk_score"] and a["risk_class"] == b["risk_class"]
+               for a, b in zip(results, coalesced))
+    print(f"Coalesced results match predict: {same}")
+
+
+def bench_analysis_executor(clicks=2000, n_patients=10):
+    """Rapid re-analysis: threads, cancellations and stale results"""
+    handler = MLModelHandler(MODEL_PATH)
+    rng = random.Random(5)
+    patients = [make_patient(i, rng) for i in range(n_patients)]
+
+    for label, predictor in (("thread pool", handler), ("coalescer", PredictionCoalescer(handler))):
+        executor = AnalysisExecutor(predictor, max_workers=2, max_pending=32)
+        delivered = {}
+        peak_threads = threading.active_count()
+        start = time.perf_counter()
+        for i in range(clicks):
+            patient = patients[i % n_patients]
+            version = i
+            executor.submit(patient["case_id"], patient,
+                            lambda result, key=patient["case_id"], v=version: delivered.__setitem__(key, v))
+            peak_threads = max(peak_threads, threading.active_count())
+        while executor.queue_depth:
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        stats = executor.stats()
+        executor.shutdown()
+        if isinstance(predictor, PredictionCoalescer):
+            predictor.close()
+
+        # The last click of every patient is the one that must be shown
+        last = {p["case_id"]: max(i for i in range(clicks) if i % n_patients == j)
+                for j, p in enumerate(patients)}
+        print(f"{label:<12} {clicks} clicks in {elapsed:6.3f} s  peak threads {peak_threads}  "
+              f"max depth {stats['max_queue_depth']}  completed {stats['completed']}  "
+              f"cancelled {stats['cancelled']}  stale {stats['stale']}  "
+              f"rejected {stats['rejected']}")
+        print(f"{'':<12} latest result shown for every patient: {delivered == last}")
+
+
+def reference_interpret(risk_score, risk_class, patient_data):
+    """The per-patient if/elif checks interpret_prediction used before clinical_rules"""
+    alerts = []
+    recommendations = []
+    
+    # Risk categorization
+    if risk_class == "High Risk":
+        condition = "HIGH RISK"
+        severity = "critical"
+        alerts.append("Patient classified as HIGH RISK by AI model")
+        recommendations.append("Immediate physician consultation required")
+        recommendations.append("Continuous monitoring recommended")
+    else:
+        if risk_score > 0.3:
+            condition = "MODERATE RISK"
+            severity = "monitor"
+            alerts.append("Patient classified as LOW RISK but close to threshold")
+            recommendations.append("Increase monitoring frequency")
+        else:
+            condition = "LOW RISK"
+            severity = "stable"
+            recommendations.append("Continue routine monitoring")
+    
+    # Check vital signs against normal ranges
+    vital_signs = patient_data.get('vital_signs', {})
+    
+    # Heart Rate
+    hr = float(vital_signs.get('heart_rate', 0))
+    if hr > 0:
+        if hr < 60:
+            alerts.append("Bradycardia: Heart rate < 60 bpm")
+            recommendations.append("Assess for cardiac issues")
+        elif hr > 100:
+            alerts.append("Tachycardia: Heart rate > 100 bpm")
+            recommendations.append("Investigate cause of elevated heart rate")
+    
+    # Blood Pressure
+    systolic = float(vital_signs.get('systolic_bp', 0))
+    diastolic = float(vital_signs.get('diastolic_bp', 0))
+    if systolic > 0 and diastolic > 0:
+        if systolic >= 140 or diastolic >= 90:
+            alerts.append("Hypertension detected")
+            recommendations.append("Blood pressure management needed")
+        elif systolic < 90 or diastolic < 60:
+            alerts.append("Hypotension detected")
+            recommendations.append("Monitor for signs of shock")
+    
+    # SpO2
+    spo2 = float(vital_signs.get('spo2', 0))
+    if spo2 > 0:
+        if spo2 < 90:
+            alerts.append("CRITICAL: Severe hypoxemia (SpO2 < 90%)")
+            recommendations.append("Immediate oxygen therapy required")
+            severity = "critical"
+        elif spo2 < 95:
+            alerts.append("Low oxygen saturation (SpO2 < 95%)")
+            recommendations.append("Consider supplemental oxygen")
+    
+    # Temperature
+    temp = float(vital_signs.get('temperature', 0))
+    if temp > 0:
+        if temp >= 38:
+            alerts.append("Fever detected (>=38C)")
+            recommendations.append("Monitor temperature regularly")
+            recommendations.append("Consider antipyretics if indicated")
+        elif temp < 36:
+            alerts.append("Hypothermia detected (<36C)")
+            recommendations.append("Warming measures required")
+    
+    # Respiratory Rate
+    rr = float(vital_signs.get('respiratory_rate', 0))
+    if rr > 0:
+        if rr < 12:
+            alerts.append("Bradypnea: Respiratory rate < 12")
+            recommendations.append("Assess respiratory function")
+        elif rr > 20:
+            alerts.append("Tachypnea: Respiratory rate > 20")
+            recommendations.append("Evaluate for respiratory distress")
+    
+    # Age-related considerations
+    age = float(patient_data.get('age', 0))
+    if age > 65 and severity == "critical":
+        recommendations.append("Elderly patient: Consider ICU admission")
+    return condition, severity, alerts if alerts else ["No critical alerts"], recommendations
+
+
+def bench_clinical_rules(n_patients=5000):
+    """Per-patient if/elif alerting vs the vectorized rule table"""
+    handler = MLModelHandler(MODEL_PATH)
+    rng = random.Random(17)
+    ward = make_ward(n_patients, seed=17) + edge_case_patients()
+    for patient in ward[:200]:
+        # Exact thresholds and unmeasured vitals
+        vitals = patient["vital_signs"]
+        if isinstance(vitals, dict):
+            for key, edges in (("heart_rate", ("60", "100", "0")), ("systolic_bp", ("140", "90", "0")),
+                               ("diastolic_bp", ("90", "60")), ("spo2", ("90", "95", "0")),
+                               ("temperature", ("38", "36", "0")), ("respiratory_rate", ("12", "20"))):
+                if rng.random() < 0.3:
+                    vitals[key] = rng.choice(edges)
+        patient["age"] = rng.choice(["65", "66", patient["age"]])
+    scores = [rng.choice([rng.random(), 0.3, handler.decision_threshold]) for _ in ward]
+    classes = [handler.classify(score) for score in scores]
+
+    expected, loop_s = timed(lambda: [reference_interpret(s, c, p)
+                                      for s, c, p in zip(scores, classes, ward)])
+    rules = handler.clinical_rules
+    rules._messages.clear()
+    actual, batch_s = timed(rules.interpret_many, ward, scores, classes)
+    # Small batches take the plain-float path
+    singles, single_s = timed(lambda: [rules.interpret_many([p], [s], [c])[0]
+                                       for s, c, p in zip(scores, classes, ward)])
+    mismatches = sum(tuple(e[:2]) != tuple(a[:2]) or list(e[2]) != list(a[2]) or list(e[3]) != list(a[3])
+                     for e, a in zip(expected + expected, actual + singles))
+
+    columns, columns_s = timed(rules.columns, ward, scores, classes)
+    (fired, _, _), evaluate_s = timed(rules.evaluate, columns)
+    n = len(ward)
+    print(f"if/elif per patient: {loop_s / n * 1e6:8.2f} us/patient")
+    print(f"Rule table (batch):  {batch_s / n * 1e6:8.2f} us/patient  "
+          f"({len(rules.rules)} rules, {len(set(fired.tolist()))} distinct masks)")
+    print(f"  parsing vitals:    {columns_s / n * 1e6:8.2f} us/patient")
+    print(f"  evaluating rules:  {evaluate_s / n * 1e6:8.2f} us/patient")
+    print(f"Rule table (single): {single_s / n * 1e6:8.2f} us/patient")
+    print(f"Speed-up: {loop_s / batch_s:.1f}x, mismatching results: {mismatches} of {2 * n}")
+    if mismatches:
+        raise AssertionError("Rule table differs from the if/elif checks")
+
+    # Where the NumPy path starts to beat the plain-float loop (VECTORIZE_FROM)
+    def numpy_path(patients, risk_scores, risk_classes):
+        fired, condition, severity = rules.evaluate(rules.columns(patients, risk_scores, risk_classes))
+        return [(c, s) + rules.messages(mask)
+                for c, s, mask in zip(condition.tolist(), severity.tolist(), fired.tolist())]
+
+    def best_of(func, *args, repeats=5, number=50):
+        return min(timed(lambda: [func(*args) for _ in range(number)])[1]
+                   for _ in range(repeats)) / number
+
+    for size in (16, 32, 48, 64, 96, 256):
+        args = (ward[:size], scores[:size], classes[:size])
+        loop = best_of(lambda *a: [rules.interpret_one(*row) for row in zip(*a)], *args)
+        vectorized = best_of(numpy_path, *args)
+        print(f"  {size:4d} patients: loop {loop / size * 1e6:6.2f}  NumPy {vectorized / size * 1e6:6.2f} "
+              f"us/patient{'  (vectorized)' if size >= VECTORIZE_FROM else ''}")
+
+
+def loop_sequences(X_data, y_data, seq_length):
+    """create_sequences as Model01.ipynb had it (one Python step per window)"""
+    X_sequences = []
+    y_targets = []
+    for i in range(len(X_data) - seq_length):
+        X_sequences.append(X_data[i:(i + seq_length)].values)
+        y_targets.append(y_data.iloc[i + seq_length])
+    return np.array(X_sequences), np.array(y_targets)
+
+
+def bench_sequence_windows(n_rows=200_000, n_features=35, seq_length=5, n_patients=2_000):
+    """Notebook loop vs sliding_window_view, plus per-patient windows"""
+    import pandas as pd
+
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame(rng.normal(size=(n_rows, n_features)),
+                     columns=[f"f{i}" for i in range(n_features)])
+    y = pd.Series(rng.integers(0, 2, n_rows))
+
+    (loop_X, loop_y), loop_s = timed(loop_sequences, X, y, seq_length)
+    (view_X, view_y), view_s = timed(create_sequences, X, y, seq_length)
+
+    same = np.array_equal(loop_X, view_X) and np.array_equal(loop_y, view_y)
+    print(f"Python loop:         {loop_s * 1000:9.1f} ms  copy {loop_X.nbytes / 2**20:7.1f} MB  "
+          f"shape {loop_X.shape}")
+    print(f"sliding_window_view: {view_s * 1000:9.3f} ms  "
+          f"(view shares memory with X: {np.shares_memory(view_X, X.to_numpy())})")
+    print(f"Speed-up: {loop_s / view_s:.0f}x, identical windows: {same}")
+
+    # Patients with a varying number of rows, shuffled like a train/test split
+    patient_ids = np.sort(rng.integers(0, n_patients, n_rows))
+    shuffle = rng.permutation(n_rows)
+    X_shuffled, y_shuffled = X.iloc[shuffle], y.iloc[shuffle]
+    (group_X, group_y), group_s = timed(create_sequences, X_shuffled, y_shuffled, seq_length,
+                                        patient_ids[shuffle], shuffle)
+
+    expected_X, expected_y = [], []
+    for patient in np.unique(patient_ids):
+        rows = np.flatnonzero(patient_ids == patient)
+        px, py = loop_sequences(X.iloc[rows], y.iloc[rows], seq_length)
+        if len(px):
+            expected_X.append(px)
+            expected_y.append(py)
+    same = (np.array_equal(np.concatenate(expected_X), group_X)
+            and np.array_equal(np.concatenate(expected_y), group_y))
+    print(f"Per-patient windows: {group_s * 1000:9.1f} ms  {len(group_X)} windows "
+          f"for {len(np.unique(patient_ids))} patients, match per-patient loop: {same}")
+
+
+def bench_model_bundle(n_calls=1000):
+    """Artifacts loaded per call (old notebook path) vs the shared bundle"""
+    folder = os.path.dirname(MODEL_PATH)
+    features_file = os.path.join(folder, "model_features.pkl")
+    ward = make_ward(50)
+
+    model_bundle._bundles.clear()
+    bundle, cold_s = timed(model_bundle.load_bundle, MODEL_PATH)
+    _, cached_s = timed(lambda: [model_bundle.load_bundle(MODEL_PATH) for _ in range(n_calls)])
+    _, per_call_s = timed(lambda: [joblib.load(features_file) for _ in range(n_calls)])
+    print(f"First load:                 {cold_s * 1000:8.1f} ms  {bundle}")
+    print(f"load_bundle (cached):       {cached_s / n_calls * 1e6:8.2f} us/call")
+    print(f"joblib.load(features) each: {per_call_s / n_calls * 1e6:8.2f} us/call")
+
+    # Any working directory, any number of handlers: one set of artifacts
+    cwd = os.getcwd()
+    os.chdir(tempfile.gettempdir())
+    try:
+        handlers, handler_s = timed(lambda: [MLModelHandler("risk_classifier_model.pkl") for _ in range(20)])
+    finally:
+        os.chdir(cwd)
+    shared = all(h.bundle is bundle for h in handlers)
+    print(f"20 handlers from another working directory: {handler_s * 1000:.1f} ms, share one bundle: {shared}")
+    same = [r["risk_score"] for r in handlers[0].predict_many(ward)] == \
+        [r["risk_score"] for r in MLModelHandler(MODEL_PATH).predict_many(ward)]
+    print(f"Same predictions: {same}")
+
+
+def bench_scaler_fusion(n_patients=2000, repeats=20):
+    """scaler.transform after the features vs scaling in the layout buffer"""
+    path = os.path.join(BASE_DIR, "model_files", "best_gradient_boosting_model.pkl")
+    try:
+        bundle = model_bundle.load_bundle(path)
+    except Exception as e:
+        print(f"model_files bundle not available here ({e}), skipping")
+        return
+    if not bundle.scaler_fused:
+        print(f"{type(bundle.scaler).__name__} cannot be fused, skipping")
+        return
+
+    plain = FeatureLayout(bundle.feature_names)
+    fused = bundle.feature_layout
+    ward = make_ward(n_patients) + edge_case_patients()
+
+    def transformed(patients):
+        features, _ = plain.matrix(patients)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            return bundle.scaler.transform(features)
+
+    # Parity: same bytes as RobustScaler.transform, batch and single row
+    expected = transformed(ward)
+    matrix, rows = fused.matrix(ward)
+    if rows != list(range(len(ward))) or matrix.tobytes() != expected.tobytes():
+        raise AssertionError("Fused batch differs from scaler.transform")
+    for i, patient_data in enumerate(ward):
+        if fused.row(patient_data).tobytes() != expected[i:i + 1].tobytes():
+            raise AssertionError(f"Fused row differs from scaler.transform for patient {i}")
+    same_scores = np.array_equal(bundle.model.predict_proba(expected),
+                                 bundle.model.predict_proba(fused.matrix(ward)[0]))
+    print(f"✓ Scaler parity: {len(ward)} patients bit-identical, same predictions: {same_scores}")
+
+    def measure(func):
+        func(ward)  # warm the reused buffers
+        tracemalloc.start()
+        func(ward)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        _, seconds = timed(lambda: [func(ward) for _ in range(repeats)])
+        return seconds / repeats, peak
+
+    n = len(ward)
+    for label, func in (("layout + transform()", transformed),
+                        ("fused layout", lambda patients: fused.matrix(patients)[0])):
+        seconds, peak = measure(func)
+        print(f"{label:<21} {seconds * 1000:7.2f} ms/batch  {seconds / n * 1e6:6.2f} us/patient  "
+              f"peak alloc {peak / 1024:8.1f} KB")
+
+
+BENCHMARKS = {
+    "predict_many": bench_predict_many,
+    "feature_layout": bench_feature_layout,
+    "parse_tsv": bench_parse_tsv,
+    "tsv_tailer": bench_tsv_tailer,
+    "async_bridge": bench_async_bridge,
+    "replay": bench_replay,
+    "monitoring_hub": bench_monitoring_hub,
+    "vitals_history": bench_vitals_history,
+    "patient_store": bench_patient_store,
+    "case_ids": bench_case_ids,
+    "patient_table": bench_patient_table,
+    "patient_query": bench_patient_query,
+    "screen_startup": bench_screen_startup,
+    "inference_server": bench_inference_server,
+    "prediction_coalescer": bench_prediction_coalescer,
+    "analysis_executor": bench_analysis_executor,
+    "clinical_rules": bench_clinical_rules,
+    "sequence_windows": bench_sequence_windows,
+    "model_bundle": bench_model_bundle,
+    "scaler_fusion": bench_scaler_fusion,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print("=" * 70)
+        print(f"BENCHMARK: {name}")
+        print("=" * 70)
+        BENCHMARKS[name]()
+        print()
@@ -0,0 +1,354 @@
+"""
+Clinical Rules - declarative alert thresholds for the risk classifier
+The checks behind MLModelHandler.interpret_prediction (risk category,
+heart rate, blood pressure, SpO2, temperature, respiratory rate, age)
+as a table of rules, evaluated with NumPy for a whole batch of patients
+at once. Hospitals can tune the thresholds in clinical_rules.json
+(same format as DEFAULT_RULES) without changing code.
+
+Rule keys:
+    name              unique rule name (bit i of the masks is rule i)
+    when              list of [field, operator, threshold] clauses
+    match             "any" (default) or "all" of the clauses
+    requires          fields that must be measured (> 0) for the rule
+    unless            earlier rules that suppress this one when they fired
+    if_severity       only fire when the severity so far is this value
+    alert             alert text (optional)
+    recommendations   list of recommendation texts (optional)
+    condition         condition set when the rule fires (optional)
+    severity          severity set when the rule fires (optional)
+
+Rules are applied in table order; alerts and recommendations come out
+in that order too.
+"""
+
+import json
+import operator
+import os
+import threading
+
+import numpy as np
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_RULES_FILE = "clinical_rules.json"
+
+# Fields a rule can test: vital signs (from patient_data['vital_signs']),
+# the patient's age, and the model output
+VITAL_FIELDS = ('heart_rate', 'systolic_bp', 'diastolic_bp', 'spo2',
+                'temperature', 'respiratory_rate')
+FIELDS = VITAL_FIELDS + ('age', 'risk_score', 'high_risk')
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+}
+
+NO_ALERTS = ("No critical alerts",)
+
+# Below this many patients the rules are applied with plain floats
+# (interpret_one); NumPy only pays off once its per-call overhead is
+# spread over a batch (crossover measured at 56-64 patients, see
+# benchmarks.py clinical_rules)
+VECTORIZE_FROM = 64
+
+DEFAULT_RULES = [
+    # Risk category from the model
+    {"name": "high_risk", "when": [["high_risk", "==", 1]],
+     "alert": "Patient classified as HIGH RISK by AI model",
+     "recommendations": ["Immediate physician consultation required",
+                         "Continuous monitoring recommended"],
+     "condition": "HIGH RISK", "severity": "critical"},
+    {"name": "moderate_risk", "when": [["risk_score", ">", 0.3]], "unless": ["high_risk"],
+     "alert": "Patient classified as LOW RISK but close to threshold",
+     "recommendations": ["Increase monitoring frequency"],
+     "condition": "MODERATE RISK", "severity": "monitor"},
+    {"name": "low_risk", "when": [], "unless": ["high_risk", "moderate_risk"],
+     "recommendations": ["Continue routine monitoring"],
+     "condition": "LOW RISK", "severity": "stable"},
+
+    # Heart rate
+    {"name": "bradycardia", "when": [["heart_rate", "<", 60]], "requires": ["heart_rate"],
+     "alert": "Bradycardia: Heart rate < 60 bpm",
+     "recommendations": ["Assess for cardiac issues"]},
+    {"name": "tachycardia", "when": [["heart_rate", ">", 100]], "requires": ["heart_rate"],
+     "unless": ["bradycardia"],
+     "alert": "Tachycardia: Heart rate > 100 bpm",
+     "recommendations": ["Investigate cause of elevated heart rate"]},
+
+    # Blood pressure
+    {"name": "hypertension", "when": [["systolic_bp", ">=", 140], ["diastolic_bp", ">=", 90]],
+     "requires": ["systolic_bp", "diastolic_bp"],
+     "alert": "Hypertension detected",
+     "recommendations": ["Blood pressure management needed"]},
+    {"name": "hypotension", "when": [["systolic_bp", "<", 90], ["diastolic_bp", "<", 60]],
+     "requires": ["systolic_bp", "diastolic_bp"], "unless": ["hypertension"],
+     "alert": "Hypotension detected",
+     "recommendations": ["Monitor for signs of shock"]},
+
+    # SpO2
+    {"name": "severe_hypoxemia", "when": [["spo2", "<", 90]], "requires": ["spo2"],
+     "alert": "CRITICAL: Severe hypoxemia (SpO2 < 90%)",
+     "recommendations": ["Immediate oxygen therapy required"],
+     "severity": "critical"},
+    {"name": "low_spo2", "when": [["spo2", "<", 95]], "requires": ["spo2"],
+     "unless": ["severe_hypoxemia"],
+     "alert": "Low oxygen saturation (SpO2 < 95%)",
+     "recommendations": ["Consider supplemental oxygen"]},
+
+    # Temperature
+    {"name": "fever", "when": [["temperature", ">=", 38]], "requires": ["temperature"],
+     "alert": "Fever detected (>=38C)",
+     "recommendations": ["Monitor temperature regularly",
+                         "Consider antipyretics if indicated"]},
+    {"name": "hypothermia", "when": [["temperature", "<", 36]], "requires": ["temperature"],
+     "unless": ["fever"],
+     "alert": "Hypothermia detected (<36C)",
+     "recommendations": ["Warming measures required"]},
+
+    # Respiratory rate
+    {"name": "bradypnea", "when": [["respiratory_rate", "<", 12]], "requires": ["respiratory_rate"],
+     "alert": "Bradypnea: Respiratory rate < 12",
+     "recommendations": ["Assess respiratory function"]},
+    {"name": "tachypnea", "when": [["respiratory_rate", ">", 20]], "requires": ["respiratory_rate"],
+     "unless": ["bradypnea"],
+     "alert": "Tachypnea: Respiratory rate > 20",
+     "recommendations": ["Evaluate for respiratory distress"]},
+
+    # Age-related considerations
+    {"name": "elderly_critical", "when": [["age", ">", 65]], "if_severity": "critical",
+     "recommendations": ["Elderly patient: Consider ICU admission"]},
+]
+
+
+class ClinicalRules:
+    """
+    Rule table compiled for batch evaluation
+
+    evaluate() returns, per patient, a uint64 mask of the rules that
+    fired plus the resulting condition and severity; evaluate_one()
+    does the same for one patient with plain floats.
+    """
+
+    def __init__(self, rules=None):
+        """
+        Args:
+            rules: list of rule dicts (default DEFAULT_RULES)
+        """
+        self.rules = [dict(rule) for rule in (DEFAULT_RULES if rules is None else rules)]
+        if len(self.rules) > 64:
+            raise ValueError("At most 64 clinical rules are supported")
+
+        self.bits = {}
+        for i, rule in enumerate(self.rules):
+            name = rule.get("name")
+            if not name or name in self.bits:
+                raise ValueError(f"Rule {i} needs a unique name (got {name!r})")
+            for field, op, _ in rule.get("when", []):
+                if field not in FIELDS:
+                    raise ValueError(f"Rule {name}: unknown field {field!r}")
+                if op not in OPERATORS:
+                    raise ValueError(f"Rule {name}: unknown operator {op!r}")
+            for field in rule.get("requires", []):
+                if field not in FIELDS:
+                    raise ValueError(f"Rule {name}: unknown field {field!r}")
+            for other in rule.get("unless", []):
+                if other not in self.bits:
+                    raise ValueError(f"Rule {name}: 'unless' must name an earlier rule ({other!r})")
+            self.bits[name] = np.uint64(1 << i)
+
+        # Scalar path: fields as indexes into a FIELDS-ordered tuple.
+        # (bit, unless mask, if_severity, requires, clauses, match all,
+        #  condition, severity); a rule without clauses always matches
+        self._compiled = tuple(
+            (1 << i,
+             sum(int(self.bits[other]) for other in rule.get("unless", [])),
+             rule.get("if_severity"),
+             tuple(FIELDS.index(field) for field in rule.get("requires", [])),
+             tuple((FIELDS.index(field), OPERATORS[op], threshold)
+                   for field, op, threshold in rule.get("when", [])),
+             rule.get("match", "any") == "all" or not rule.get("when"),
+             rule.get("condition"), rule.get("severity"))
+            for i, rule in enumerate(self.rules)
+        )
+        self._messages = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES_FILE):
+        """
+        Rules from a JSON file, or the defaults if the file does not exist
+
+        A relative path is read from this module's folder, not the
+        current working directory.
+        """
+        path = os.path.join(BASE_DIR, path)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r") as f:
+            rules = json.load(f)
+        print(f"✓ Clinical rules loaded from {path} ({len(rules)} rules)")
+        return cls(rules)
+
+    @staticmethod
+    def columns(patients, risk_scores, risk_classes):
+        """
+        Field arrays for a batch (same parsing as interpret_prediction)
+
+        Args:
+            patients: list of patient dicts
+            risk_scores: High Risk probabilities, one per patient
+            risk_classes: "High Risk" / "Low Risk", one per patient
+
+        Returns:
+            dict field -> float64 array
+        """
+        n = len(patients)
+        vitals = [patient_data.get('vital_signs', {}) for patient_data in patients]
+        columns = {field: np.array([float(v.get(field, 0)) for v in vitals], dtype=np.float64)
+                   for field in VITAL_FIELDS}
+        columns['age'] = np.array([float(p.get('age', 0)) for p in patients], dtype=np.float64)
+        columns['risk_score'] = np.asarray(risk_scores, dtype=np.float64).reshape(n)
+        columns['high_risk'] = np.fromiter((c == "High Risk" for c in risk_classes),
+                                           dtype=np.float64, count=n)
+        return columns
+
+    def evaluate(self, columns):
+        """
+        Apply every rule to the whole batch
+
+        Args:
+            columns: dict field -> float64 array (see columns())
+
+        Returns:
+            (fired, condition, severity): uint64 rule mask per patient
+            and object arrays of condition / severity strings
+        """
+        n = len(columns['risk_score'])
+        fired = np.zeros(n, dtype=np.uint64)
+        condition = np.full(n, None, dtype=object)
+        severity = np.full(n, None, dtype=object)
+
+        for rule in self.rules:
+            clauses = [OPERATORS[op](columns[field], threshold)
+                       for field, op, threshold in rule.get("when", [])]
+            if not clauses:
+                hit = np.ones(n, dtype=bool)
+            elif rule.get("match", "any") == "all":
+                hit = np.logical_and.reduce(clauses)
+            else:
+                hit = np.logical_or.reduce(clauses)
+
+            for field in rule.get("requires", []):
+                hit &= columns[field] > 0
+            for other in rule.get("unless", []):
+                hit &= (fired & self.bits[other]) == 0
+            if rule.get("if_severity"):
+                hit &= severity == rule["if_severity"]
+
+            fired[hit] |= self.bits[rule["name"]]
+            if rule.get("condition"):
+                condition[hit] = rule["condition"]
+            if rule.get("severity"):
+                severity[hit] = rule["severity"]
+
+        return fired, condition, severity
+
+    def evaluate_one(self, values):
+        """
+        Same as evaluate for a single patient, with plain floats
+
+        Args:
+            values: sequence of floats in FIELDS order
+
+        Returns:
+            (fired, condition, severity) as int and strings
+        """
+        fired = 0
+        condition = severity = None
+        for bit, unless, if_severity, requires, clauses, match_all, set_condition, set_severity \
+                in self._compiled:
+            if fired & unless or (if_severity and severity != if_severity):
+                continue
+            measured = True
+            for i in requires:
+                if not values[i] > 0:
+                    measured = False
+                    break
+            if not measured:
+                continue
+            # "all" stops at the first False clause, "any" at the first True
+            hit = match_all
+            for i, op, threshold in clauses:
+                if op(values[i], threshold) is not match_all:
+                    hit = not match_all
+                    break
+            if not hit:
+                continue
+
+            fired |= bit
+            if set_condition:
+                condition = set_condition
+            if set_severity:
+                severity = set_severity
+        return fired, condition, severity
+
+    def messages(self, fired):
+        """
+        Alert and recommendation texts for one patient's rule mask
+
+        Returns:
+            (alerts, recommendations) tuples in rule order; alerts is
+            NO_ALERTS when no alert fired
+        """
+        cached = self._messages.get(fired)
+        if cached is None:
+            alerts, recommendations = [], []
+            for i, rule in enumerate(self.rules):
+                if fired >> i & 1:
+                    if rule.get("alert"):
+                        alerts.append(rule["alert"])
+                    recommendations.extend(rule.get("recommendations", []))
+            cached = (tuple(alerts) or NO_ALERTS, tuple(recommendations))
+            with self._lock:
+                self._messages[int(fired)] = cached
+        return cached
+
+    def interpret_one(self, patient_data, risk_score, risk_class):
+        """
+        Condition, severity, alerts and recommendations for one patient
+
+        Returns:
+            (condition, severity, alerts, recommendations)
+        """
+        vital_signs = patient_data.get('vital_signs', {})
+        get = vital_signs.get
+        # FIELDS order
+        fired, condition, severity = self.evaluate_one((
+            float(get('heart_rate', 0)), float(get('systolic_bp', 0)),
+            float(get('diastolic_bp', 0)), float(get('spo2', 0)),
+            float(get('temperature', 0)), float(get('respiratory_rate', 0)),
+            float(patient_data.get('age', 0)), float(risk_score),
+            1.0 if risk_class == "High Risk" else 0.0))
+        return (condition, severity) + self.messages(fired)
+
+    def interpret_many(self, patients, risk_scores, risk_classes):
+        """
+        Condition, severity, alerts and recommendations for a batch
+
+        Returns:
+            list of (condition, severity, alerts, recommendations), one
+            per patient
+        """
+        if len(patients) < VECTORIZE_FROM:
+            return [self.interpret_one(patient_data, risk_score, risk_class)
+                    for patient_data, risk_score, risk_class in zip(patients, risk_scores, risk_classes)]
+
+        fired, condition, severity = self.evaluate(
+            self.columns(patients, risk_scores, risk_classes))
+        return [(c, s) + self.messages(mask)
+                for c, s, mask in zip(condition.tolist(), severity.tolist(), fired.tolist())]
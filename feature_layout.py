@@ -0,0 +1,398 @@
+"""
+Compiled feature layout for the risk classifiers
+One definition of every model feature, shared by training (Model01.ipynb,
+add_features on a DataFrame) and serving (FeatureLayout, which writes
+patient features straight into preallocated NumPy rows in the column
+order the model was trained with)
+"""
+
+import threading
+
+import numpy as np
+
+from telemetry import get_logger
+from vital_sample import VitalSample
+
+
+logger = get_logger("feature_layout")
+
+
+# Version of the feature definitions below. Bump it whenever a formula
+# changes; model artifacts record the version they were trained with
+# (preprocessing.json "feature_schema_version") and are refused if it differs.
+FEATURE_SCHEMA_VERSION = 1
+
+HR = 'Heart Rate'
+RR = 'Respiratory Rate'
+TEMP = 'Body Temperature'
+SPO2 = 'Oxygen Saturation'
+SBP = 'Systolic Blood Pressure'
+DBP = 'Diastolic Blood Pressure'
+AGE = 'Age'
+WEIGHT = 'Weight (kg)'
+HEIGHT = 'Height (m)'
+
+# Features read from the patient record, in the order raw_values returns them
+RAW_FEATURES = (
+    'Patient ID', HR, RR, TEMP, SPO2, SBP, DBP, AGE, WEIGHT, HEIGHT, 'Gender_Male'
+)
+
+
+def _ratio(a, b, fallback, valid=None):
+    """
+    a / b, or fallback where the division is not valid (default b == 0)
+
+    Works on floats (single row) and on NumPy arrays (batch) with the
+    same IEEE results.
+    """
+    if valid is None:
+        valid = b != 0
+    if isinstance(b, np.ndarray):
+        out = np.array(np.broadcast_to(fallback, np.shape(b)), dtype=np.float64)
+        np.divide(a, b, out=out, where=valid)
+        return out
+    return a / b if valid else fallback
+
+
+def _pulse_pressure(v):
+    return v[SBP] - v[DBP]
+
+
+def _map(v):
+    return v[DBP] + _pulse_pressure(v) / 3
+
+
+def _cardiac_output_proxy(v):
+    return v[HR] * _pulse_pressure(v)
+
+
+# Derived features: name -> function of the raw values (floats or arrays).
+# Divisions by zero use the fallbacks of the notebook's
+# preprocess_for_prediction, so training and serving agree.
+DERIVED_FEATURES = {
+    # risk_classifier_model.pkl (model_files02)
+    'Derived_Pulse_Pressure': _pulse_pressure,
+    'Derived_BMI': lambda v: _ratio(v[WEIGHT], v[HEIGHT] ** 2, 0.0, valid=v[HEIGHT] > 0),
+    'Derived_MAP': _map,
+
+    # Model01.ipynb ensemble (model_files)
+    'Pulse_Pressure': _pulse_pressure,
+    'MAP': _map,
+    'Shock_Index': lambda v: _ratio(v[HR], v[SBP], 0.0),
+    'HR_over_RR': lambda v: _ratio(v[HR], v[RR], v[HR]),
+    'O2_deficit': lambda v: 100.0 - v[SPO2],
+    'Age_Weight_Ratio': lambda v: _ratio(v[AGE], v[WEIGHT], v[AGE]),
+    'HR_times_MAP': lambda v: v[HR] * _map(v),
+    'PulsePressure_over_Age': lambda v: _ratio(_pulse_pressure(v), v[AGE], _pulse_pressure(v)),
+    'BMI_Proxy': lambda v: _ratio(v[WEIGHT], (v[AGE] / 100) ** 2, v[WEIGHT], valid=v[AGE] != 0),
+    'RR_O2_Interaction': lambda v: v[RR] * (100.0 - v[SPO2]),
+    'BP_Ratio': lambda v: _ratio(v[SBP], v[DBP], 1.0),
+    'HR_Age_Interaction': lambda v: v[HR] * v[AGE],
+    'Perfusion_Index': lambda v: _map(v) * v[SPO2] / 100,
+    'Cardiac_Output_Proxy': _cardiac_output_proxy,
+    'Respiratory_Load': lambda v: v[RR] * (100.0 - v[SPO2]),
+    'Vascular_Resistance_Proxy': lambda v: _ratio(_map(v), _cardiac_output_proxy(v), _map(v)),
+    'HR_squared': lambda v: v[HR] ** 2,
+    'SBP_squared': lambda v: v[SBP] ** 2,
+    'O2_squared': lambda v: v[SPO2] ** 2,
+    'Age_Group_Young': lambda v: v[AGE] < 40,
+    'Age_Group_Middle': lambda v: (v[AGE] >= 40) & (v[AGE] < 65),
+    'Age_Group_Senior': lambda v: v[AGE] >= 65,
+    'Hypotensive': lambda v: v[SBP] < 90,
+    'Hypertensive': lambda v: v[SBP] > 140,
+    'Tachycardic': lambda v: v[HR] > 100,
+    'Bradycardic': lambda v: v[HR] < 60,
+    'Hypoxic': lambda v: v[SPO2] < 95,
+    'Tachypneic': lambda v: v[RR] > 20,
+}
+
+# Engineered columns Model01.ipynb adds for training, in notebook order
+ENGINEERED_FEATURES = tuple(DERIVED_FEATURES)[3:]
+
+# Every feature a layout can compute
+KNOWN_FEATURES = RAW_FEATURES + tuple(DERIVED_FEATURES)
+
+
+class FeatureSchemaError(ValueError):
+    """Model artifacts do not match the feature definitions of this module"""
+
+
+def feature_schema(feature_names):
+    """
+    Schema record to save next to a trained model
+
+    Returns:
+        dict for preprocessing.json: schema version and column order
+    """
+    return {
+        "feature_schema_version": FEATURE_SCHEMA_VERSION,
+        "feature_names": list(feature_names),
+    }
+
+
+def check_feature_schema(feature_names, model=None, schema_version=None):
+    """
+    Match saved feature names against the model and this module
+
+    Args:
+        feature_names: column order from the artifacts (may be None)
+        model: loaded estimator (uses n_features_in_ / feature_names_in_)
+        schema_version: version recorded in the artifacts (None = not recorded)
+
+    Returns:
+        feature names to build, in model column order; taken from the
+        model itself when it knows them and the saved list disagrees
+
+    Raises:
+        FeatureSchemaError: on a different schema version, unknown
+        features or a feature count the model was not trained with
+    """
+    if schema_version is not None and int(schema_version) != FEATURE_SCHEMA_VERSION:
+        raise FeatureSchemaError(
+            f"Model was trained with feature schema v{schema_version}, "
+            f"this code builds v{FEATURE_SCHEMA_VERSION}")
+
+    model_names = getattr(model, "feature_names_in_", None)
+    if model_names is not None:
+        model_names = [str(name) for name in model_names]
+        if feature_names is None or list(feature_names) != model_names:
+            logger.warning("Feature names differ from the model's, using the model's order")
+            feature_names = model_names
+
+    if feature_names is None:
+        raise FeatureSchemaError("No feature names saved with the model")
+
+    unknown = [name for name in feature_names if name not in KNOWN_FEATURES]
+    if unknown:
+        raise FeatureSchemaError(f"Unknown model features: {unknown}")
+
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is not None and n_features != len(feature_names):
+        raise FeatureSchemaError(
+            f"Model expects {n_features} features, {len(feature_names)} names were saved")
+
+    return list(feature_names)
+
+
+def add_features(df, names=ENGINEERED_FEATURES):
+    """
+    Add derived feature columns to a training DataFrame (vectorized)
+
+    Args:
+        df: DataFrame with the raw columns (Heart Rate, Age, ...)
+        names: derived features to add
+
+    Returns:
+        df (modified in place) with one new column per feature
+    """
+    values = {name: df[name].to_numpy(dtype=np.float64) for name in RAW_FEATURES if name in df}
+    for name in names:
+        column = DERIVED_FEATURES[name](values)
+        df[name] = column.astype(np.int64) if column.dtype == bool else column
+    return df
+
+
+def _or_zero(value):
+    """NaN (not measured) -> 0.0, like a missing key in the dict format"""
+    return value if value == value else 0.0
+
+
+def raw_values(patient_data):
+    """
+    Read the RAW_FEATURES of one patient
+
+    Args:
+        patient_data: dict in the format accepted by MLModelHandler.predict
+
+    Returns:
+        tuple of values in RAW_FEATURES order (raises on invalid input)
+    """
+    age = float(patient_data.get('age', 0))
+    gender = patient_data.get('gender', 'Male')
+    height_m = float(patient_data.get('height', 0)) / 100.0
+    weight_kg = float(patient_data.get('weight', 0))
+
+    vital_signs = patient_data.get('vital_signs', {})
+    if isinstance(vital_signs, VitalSample):
+        # Already numeric: no string round trip (NaN = not measured = 0)
+        heart_rate = _or_zero(vital_signs.heart_rate)
+        systolic_bp = _or_zero(vital_signs.systolic_bp)
+        diastolic_bp = _or_zero(vital_signs.diastolic_bp)
+        spo2 = _or_zero(vital_signs.spo2)
+        respiratory_rate = _or_zero(vital_signs.respiratory_rate)
+        body_temperature = vital_signs.temperature
+        if body_temperature != body_temperature:
+            body_temperature = float(patient_data.get('temperature', 0))
+    else:
+        heart_rate = float(vital_signs.get('heart_rate', 0))
+        systolic_bp = float(vital_signs.get('systolic_bp', 0))
+        diastolic_bp = float(vital_signs.get('diastolic_bp', 0))
+        spo2 = float(vital_signs.get('spo2', 0))
+        respiratory_rate = float(vital_signs.get('respiratory_rate', 0))
+        body_temperature = float(vital_signs.get('temperature', patient_data.get('temperature', 0)))
+
+    try:
+        patient_id = int(''.join(filter(str.isdigit, patient_data.get('case_id', 'UNKNOWN'))))
+    except:
+        patient_id = 0
+
+    return (
+        patient_id,
+        heart_rate,
+        respiratory_rate,
+        body_temperature,
+        spo2,
+        systolic_bp,
+        diastolic_bp,
+        age,
+        weight_kg,
+        height_m,
+        1 if gender.lower() == 'male' else 0
+    )
+
+
+def feature_values(patient_data, feature_names):
+    """
+    Features of one patient by name, unscaled
+
+    Args:
+        patient_data: dict in the format accepted by MLModelHandler.predict
+        feature_names: features to compute (RAW_FEATURES or DERIVED_FEATURES)
+
+    Returns:
+        dict of feature name -> value, in feature_names order
+        (raises on invalid input)
+    """
+    values = dict(zip(RAW_FEATURES, raw_values(patient_data)))
+    return {name: values[name] if name in values else float(DERIVED_FEATURES[name](values))
+            for name in feature_names}
+
+
+class FeatureLayout:
+    """
+    Feature builder compiled once from the model's feature names
+
+    Produces the same float64 values as feature_values (and add_features
+    in training) without building a dict or DataFrame per call. A single row computes its
+    derived features with plain floats; a batch parses the raw values row by
+    row and computes each derived column for all rows at once. Buffers are
+    reused between calls (one set per thread), so copy a returned array if
+    you keep it.
+
+    With center / scale (a fitted scaler's center_ and scale_) the rows are
+    scaled in place in the same buffers: (x - center) / scale, the same
+    operations and results as RobustScaler.transform, without its copy.
+    """
+
+    def __init__(self, feature_names, center=None, scale=None):
+        """
+        Args:
+            feature_names: training column order (from model_features.pkl)
+            center: optional per-feature values subtracted from every row
+            scale: optional per-feature values every row is divided by
+        """
+        unknown = [name for name in feature_names if name not in KNOWN_FEATURES]
+        if unknown:
+            raise FeatureSchemaError(f"Unknown model features: {unknown}")
+
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        # (output column, index in RAW_FEATURES) and (output column, function)
+        self._raw_slots = tuple(
+            (column, RAW_FEATURES.index(name))
+            for column, name in enumerate(self.feature_names) if name in RAW_FEATURES
+        )
+        self._derived_slots = tuple(
+            (column, DERIVED_FEATURES[name])
+            for column, name in enumerate(self.feature_names) if name in DERIVED_FEATURES
+        )
+        self._raw_columns = np.array([column for column, _ in self._raw_slots], dtype=np.intp)
+        self._raw_sources = np.array([source for _, source in self._raw_slots], dtype=np.intp)
+        self.center = self._affine(center)
+        self.scale = self._affine(scale)
+        self._local = threading.local()
+
+    def _affine(self, values):
+        if values is None:
+            return None
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        if values.shape != (self.n_features,):
+            raise FeatureSchemaError(
+                f"Scaler has {values.size} features, the layout {self.n_features}")
+        return values
+
+    def _scale_in_place(self, out):
+        if self.center is not None:
+            np.subtract(out, self.center, out=out)
+        if self.scale is not None:
+            np.divide(out, self.scale, out=out)
+
+    def fill_row(self, out, patient_data):
+        """Write one patient's features into the 1-D array out"""
+        values = raw_values(patient_data)
+        for column, source in self._raw_slots:
+            out[column] = values[source]
+        if self._derived_slots:
+            named = dict(zip(RAW_FEATURES, values))
+            for column, feature in self._derived_slots:
+                out[column] = feature(named)
+
+    def row(self, patient_data):
+        """
+        Features for one patient
+
+        Returns:
+            reused (1, n_features) float64 array
+        """
+        buffer = getattr(self._local, 'row', None)
+        if buffer is None:
+            buffer = self._local.row = np.zeros((1, self.n_features), dtype=np.float64)
+        self.fill_row(buffer[0], patient_data)
+        self._scale_in_place(buffer)
+        return buffer
+
+    def _buffers(self, n):
+        buffers = getattr(self._local, 'matrix', None)
+        if buffers is None or buffers[0].shape[0] < n:
+            # Grow geometrically so a ward of steady size allocates once
+            capacity = max(n, 2 * (buffers[0].shape[0] if buffers is not None else 0), 16)
+            buffers = self._local.matrix = (
+                np.zeros((capacity, len(RAW_FEATURES)), dtype=np.float64),
+                np.zeros((capacity, self.n_features), dtype=np.float64),
+            )
+        return buffers
+
+    def matrix(self, patients):
+        """
+        Features for a batch of patients
+
+        Args:
+            patients: list of patient dicts
+
+        Returns:
+            (matrix, rows) where matrix is a reused (len(rows), n_features)
+            float64 view and rows lists the indices of the patients written.
+            Patients that fail preprocessing are left out.
+        """
+        raw, out = self._buffers(len(patients))
+
+        rows = []
+        for i, patient_data in enumerate(patients):
+            try:
+                raw[len(rows)] = raw_values(patient_data)
+            except Exception as e:
+                logger.warning("Preprocessing error (patient %d): %s", i, e)
+                continue
+            rows.append(i)
+
+        n = len(rows)
+        raw, out = raw[:n], out[:n]
+        out[:, self._raw_columns] = raw[:, self._raw_sources]
+        if self._derived_slots:
+            named = {name: raw[:, i] for i, name in enumerate(RAW_FEATURES)}
+            for column, feature in self._derived_slots:
+                out[:, column] = feature(named)
+        self._scale_in_place(out)
+
+        return out, rows
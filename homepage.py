@@ -1,45 +1,30 @@
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import subprocess
-import os
-import sys
+from app import App
 
 # ---------- FUNCTIONS ----------
+# Screens open inside the same window (see app.py)
 def open_patient_insertion():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__), "patient_insertion.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("patient_insertion")
 
 def open_delete_patient():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__), "delete_patient.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("delete_patient")
 
 def open_patient_data():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__), "patients_data.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("patients_data")
 
 def open_analysis_report():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__), "Report.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("report")
 
 def open_copyrights():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__), "waiting.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("copyrights")
 
 
 # ---------- MAIN WINDOW ----------
-root = ctk.CTk()
-root.title("Home Page")
-root.geometry("1366x768")
-root.resizable(True, True)
+shell = App.instance()
+root = shell.view("homepage", "Home Page")
 
 # --- Background ---
-bg_image = ctk.CTkImage(Image.open("vector-healthcare-medical-sciencefuturistic-background-260nw-2652074677.jpg"), size=(1366, 768))
-bg_label = ctk.CTkLabel(root, text="", image=bg_image)
+bg_label = ctk.CTkLabel(root, text="", image=shell.background)
 bg_label.place(x=0, y=0, relwidth=1, relheight=1)
 
 # --- Title Label ---
@@ -68,4 +53,5 @@ footer_label = ctk.CTkLabel(root,
 footer_label.pack(side="bottom", fill="x", padx=10, pady=0)
 
 # --- Run the App ---
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    shell.run()
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+Inference Server - MLModelHandler as a long-running local HTTP service
+Loads the model once and serves predictions to any number of GUI
+windows, bridges or scripts on the same machine:
+
+    python inference_server.py --model model_files02/risk_classifier_model.pkl
+
+    POST /predict         one patient dict        -> one result dict
+    POST /predict_many    list of patient dicts   -> list of result dicts
+    GET  /health          model status and batching counters
+
+Requests that arrive together are scored in one predict_many call
+(micro-batching), so a burst of N requests costs about one model pass.
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ml_model_handler import MLModelHandler, error_result
+from prediction_coalescer import PredictionCoalescer
+import telemetry
+from telemetry import get_logger, span
+
+
+logger = get_logger("inference_server")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """HTTP server holding one MLModelHandler and one PredictionCoalescer"""
+
+    daemon_threads = True
+    # Many GUI windows / bridges may connect at the same moment
+    request_queue_size = 128
+
+    def __init__(self, handler, host=DEFAULT_HOST, port=DEFAULT_PORT, max_batch=64, max_wait=0.002):
+        """
+        Args:
+            handler: loaded MLModelHandler
+            host: interface to listen on (localhost only by default)
+            port: TCP port (0 picks a free one, see server_address)
+            max_batch: most requests scored in one model call
+            max_wait: seconds a request may wait for others to join its batch
+        """
+        super().__init__((host, port), _RequestHandler)
+        self.handler = handler
+        self.batcher = PredictionCoalescer(handler, max_batch=max_batch, max_wait=max_wait,
+                                          name="inference-batcher")
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a background thread (for tests and embedding)"""
+        thread = threading.Thread(target=self.serve_forever, name="inference-server", daemon=True)
+        thread.start()
+        return thread
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        server = self.server
+        self._send_json(200, {
+            "model_loaded": server.handler.model is not None,
+            "model_path": server.handler.model_path,
+            "requests": server.batcher.requests,
+            "batches": server.batcher.batches,
+        })
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        if self.path == "/predict" and isinstance(payload, dict):
+            try:
+                result = self.server.batcher.predict(payload)
+            except Exception as e:
+                result = error_result(str(e), f'Prediction failed: {e}')
+            self._send_json(200, result)
+        elif self.path == "/predict_many" and isinstance(payload, list):
+            with span("server.predict_many", rows=len(payload)):
+                self._send_json(200, self.server.handler.predict_many(payload))
+        elif self.path in ("/predict", "/predict_many"):
+            self._send_json(400, {"error": "/predict takes a JSON object, /predict_many a JSON list"})
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+
+class InferenceClient:
+    """
+    Client for a running InferenceServer with the same predict /
+    predict_many interface as MLModelHandler
+    """
+
+    def __init__(self, url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout=5.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def health(self):
+        """Server status dict, or None if the server cannot be reached"""
+        try:
+            return self._request("/health")
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+
+    @property
+    def model(self):
+        """True when the server is up with its model loaded (like MLModelHandler.model)"""
+        status = self.health()
+        return bool(status and status.get("model_loaded"))
+
+    def predict(self, patient_data):
+        """Same result dict as MLModelHandler.predict (dates as ISO strings)"""
+        return self._request("/predict", self._jsonable(patient_data))
+
+    def predict_many(self, patients):
+        return self._request("/predict_many", [self._jsonable(p) for p in patients])
+
+    @staticmethod
+    def _jsonable(patient_data):
+        vital_signs = patient_data.get("vital_signs")
+        if vital_signs is not None and not isinstance(vital_signs, dict):
+            # VitalSample from the simulator bridge
+            patient_data = dict(patient_data, vital_signs=vital_signs.to_dict())
+        return patient_data
+
+
+# Run the server
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Med-Guardian inference server")
+    parser.add_argument("--model", default="risk_classifier_model.pkl", help="model .pkl file")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    telemetry.configure()
+    server = InferenceServer(MLModelHandler(args.model), host=args.host, port=args.port,
+                             max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    print(f"✓ Inference server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -5,10 +5,37 @@ FIXED to match your actual training feature names
 
 import numpy as np
 import pandas as pd
-import joblib
 import json
+import warnings
 from datetime import datetime
-import os
+import logging
+
+from clinical_rules import ClinicalRules
+from feature_layout import feature_values
+from model_bundle import LEGACY_FEATURE_NAMES, load_bundle
+from telemetry import get_logger, span
+
+
+logger = get_logger("ml_model")
+
+
+def error_result(error, alert):
+    """
+    Result dict for a prediction that could not be made
+    
+    Args:
+        error: short description of what failed
+        alert: message shown to the user in the alerts list
+    
+    Returns:
+        dict shaped like a prediction result, with condition 'error'
+    """
+    return {
+        'error': error,
+        'risk_score': None,
+        'condition': 'error',
+        'alerts': [alert]
+    }
 
 
 class MLModelHandler:
@@ -33,149 +60,131 @@ class MLModelHandler:
         - Gender_Male
         """
         self.model_path = model_path
+        self.bundle = None
         self.model = None
+        self.scaler = None
         self.feature_names = None
         self.preprocessing_info = None
+        self.feature_layout = None
+        self.decision_threshold = 0.5
+        self.high_risk_column = 1
+        self.clinical_rules = ClinicalRules.from_file()
         self.load_model()
     
     def load_model(self):
-        """Load the trained XGBoost model"""
+        """
+        Load the trained model and its artifacts
+        
+        The files are read once per process (model_bundle) from the
+        model's own folder, so every handler for the same model shares
+        one copy and the working directory does not matter.
+        """
         try:
-            # Load model
-            if not os.path.exists(self.model_path):
-                print(f"Model file not found: {self.model_path}")
-                return False
-            
-            self.model = joblib.load(self.model_path)
-            print(f"✓ Model loaded from {self.model_path}")
-            
-            # Try to load feature names
-            try:
-                self.feature_names = joblib.load("model_features.pkl")
-                print(f"✓ Feature names loaded: {len(self.feature_names)} features")
-            except:
-                # Use the exact feature names from your training
-                self.feature_names = [
-                    'Patient ID',
-                    'Heart Rate',
-                    'Respiratory Rate',
-                    'Body Temperature',
-                    'Oxygen Saturation',
-                    'Systolic Blood Pressure',
-                    'Diastolic Blood Pressure',
-                    'Age',
-                    'Weight (kg)',
-                    'Height (m)',
-                    'Derived_Pulse_Pressure',
-                    'Derived_BMI',
-                    'Derived_MAP',
-                    'Gender_Male'
-                ]
-                print(f"✓ Using default feature names from training")
-            
-            # Try to load preprocessing info
-            try:
-                with open("preprocessing.json", "r") as f:
-                    self.preprocessing_info = json.load(f)
-                print("✓ Preprocessing info loaded")
-            except:
-                self.preprocessing_info = {
-                    "gender_mapping": {"Male": 1, "Female": 0},
-                    "target_mapping": {"Low Risk": 0, "High Risk": 1}
-                }
-            
-            return True
-            
+            bundle = load_bundle(self.model_path)
+        except FileNotFoundError as e:
+            print(e)
+            return False
         except Exception as e:
+            # A model we cannot build features for must not score anyone
             print(f"✗ Model loading failed: {e}")
             return False
+        
+        self.bundle = bundle
+        self.model = bundle.model
+        self.scaler = bundle.scaler
+        self.feature_names = list(bundle.feature_names)
+        self.preprocessing_info = bundle.preprocessing_info
+        self.feature_layout = bundle.feature_layout
+        self.decision_threshold = bundle.decision_threshold
+        self.high_risk_column = bundle.high_risk_column
+        return True
     
-    def preprocess_patient_data(self, patient_data):
+    def model_input(self, features):
         """
-        Convert patient data to model input format
-        MUST match the exact feature names from training
+        Scale a feature matrix for the model (bundles with a scaler.pkl)
+        
+        Returns:
+            features unchanged (no scaler, or already scaled in place by
+            the feature layout), or the scaler's transform of them
+        """
+        if self.scaler is None or self.bundle.scaler_fused:
+            return features
+        with warnings.catch_warnings():
+            # Fitted on a DataFrame, given the same columns as an array
+            warnings.simplefilter("ignore", UserWarning)
+            return self.scaler.transform(features)
+    
+    def extract_features(self, patient_data):
+        """
+        Compute the model features for one patient
         
         Args:
             patient_data: dict with keys:
                 - case_id, age, gender, height, weight
                 - vital_signs: {heart_rate, systolic_bp, diastolic_bp, 
                                spo2, respiratory_rate, temperature}
+                  (a dict or a VitalSample from the simulator bridge;
+                   without a vital temperature the top-level one is used)
+        
+        Returns:
+            dict of feature name -> value in model column order
+            (raises on invalid input)
+        """
+        # Same definitions as training and the compiled FeatureLayout
+        return feature_values(patient_data, self.feature_names or LEGACY_FEATURE_NAMES)
+    
+    def preprocess_patient_data(self, patient_data):
+        """
+        Convert patient data to model input format
+        MUST match the exact feature names from training
+        
+        Args:
+            patient_data: dict (see extract_features)
         
         Returns:
             pandas DataFrame ready for model prediction
         """
         try:
-            # Extract demographics
-            case_id = patient_data.get('case_id', 'UNKNOWN')
-            age = float(patient_data.get('age', 0))
-            gender = patient_data.get('gender', 'Male')
-            height_cm = float(patient_data.get('height', 0))
-            weight_kg = float(patient_data.get('weight', 0))
+            features = self.extract_features(patient_data)
             
-            # Convert height from cm to meters
-            height_m = height_cm / 100.0
-            
-            # Encode gender (Male=1, Female=0)
-            gender_male = 1 if gender.lower() == 'male' else 0
-            
-            # Extract vital signs
-            vital_signs = patient_data.get('vital_signs', {})
-            heart_rate = float(vital_signs.get('heart_rate', 0))
-            systolic_bp = float(vital_signs.get('systolic_bp', 0))
-            diastolic_bp = float(vital_signs.get('diastolic_bp', 0))
-            spo2 = float(vital_signs.get('spo2', 0))
-            respiratory_rate = float(vital_signs.get('respiratory_rate', 0))
-            body_temperature = float(vital_signs.get('temperature', 0))
-            
-            # Calculate DERIVED features (as in your training)
-            # 1. Pulse Pressure = Systolic - Diastolic
-            pulse_pressure = systolic_bp - diastolic_bp
-            
-            # 2. BMI = weight / (height_m^2)
-            bmi = weight_kg / (height_m ** 2) if height_m > 0 else 0
-            
-            # 3. MAP (Mean Arterial Pressure) = Diastolic + (Pulse Pressure / 3)
-            map_value = diastolic_bp + (pulse_pressure / 3)
-            
-            # Create a simple numeric Patient ID (extract numbers from case_id)
-            try:
-                patient_id = int(''.join(filter(str.isdigit, case_id)))
-            except:
-                patient_id = 0
-            
-            # Create feature dictionary matching EXACT training column names
-            features = {
-                'Patient ID': patient_id,
-                'Heart Rate': heart_rate,
-                'Respiratory Rate': respiratory_rate,
-                'Body Temperature': body_temperature,
-                'Oxygen Saturation': spo2,
-                'Systolic Blood Pressure': systolic_bp,
-                'Diastolic Blood Pressure': diastolic_bp,
-                'Age': age,
-                'Weight (kg)': weight_kg,
-                'Height (m)': height_m,
-                'Derived_Pulse_Pressure': pulse_pressure,
-                'Derived_BMI': bmi,
-                'Derived_MAP': map_value,
-                'Gender_Male': gender_male
-            }
-            
-            # Convert to DataFrame with correct column order
-            df = pd.DataFrame([features])
-            
-            # Ensure column order matches training
-            if self.feature_names:
-                df = df[self.feature_names]
-            
-            return df
+            # Convert to DataFrame (features are in training column order)
+            return pd.DataFrame([features])
             
         except Exception as e:
-            print(f"Preprocessing error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Preprocessing error: %s", e)
             return None
     
+    def preprocess_row(self, patient_data):
+        """
+        Convert one patient to a NumPy feature row (fast path)
+        
+        Same values as preprocess_patient_data, written by the compiled
+        FeatureLayout into a reused buffer instead of a new DataFrame
+        
+        Returns:
+            (1, n_features) float64 array or None if preprocessing failed
+        """
+        try:
+            return self.feature_layout.row(patient_data)
+        except Exception as e:
+            logger.warning("Preprocessing error: %s", e)
+            return None
+    
+    def preprocess_batch(self, patients):
+        """
+        Convert a list of patients to one NumPy feature matrix
+        
+        Args:
+            patients: list of patient dicts (see extract_features)
+        
+        Returns:
+            (matrix, rows) where matrix is a float64 array of shape
+            (len(rows), n_features) in training column order and rows
+            lists the indices of the patients that were preprocessed.
+            Patients that fail preprocessing are left out.
+        """
+        return self.feature_layout.matrix(patients)
+    
     def predict(self, patient_data):
         """
         Make risk prediction for a patient
@@ -187,163 +196,136 @@ class MLModelHandler:
             dict with prediction results
         """
         if not self.model:
-            return {
-                'error': 'Model not loaded',
-                'risk_score': None,
-                'condition': 'error',
-                'alerts': ['Model not available']
-            }
+            return error_result('Model not loaded', 'Model not available')
         
         try:
             # Preprocess data
-            features_df = self.preprocess_patient_data(patient_data)
-            if features_df is None:
-                return {
-                    'error': 'Data preprocessing failed',
-                    'risk_score': None,
-                    'condition': 'error',
-                    'alerts': ['Invalid input data']
-                }
+            with span("preprocess"):
+                features = self.preprocess_row(patient_data)
+            if features is None:
+                return error_result('Data preprocessing failed', 'Invalid input data')
             
-            # Debug: Print features
-            print("\n--- Features sent to model ---")
-            print(features_df.to_string())
-            print("------------------------------\n")
+            # Debug: features sent to model (only formatted when DEBUG is on)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Features sent to model: %s",
+                             dict(zip(self.feature_names, features[0].tolist())))
             
-            # Make prediction
+            # Make prediction (single model pass)
             # predict_proba returns [prob_low_risk, prob_high_risk]
-            prediction_proba = self.model.predict_proba(features_df)[0]
-            risk_score = float(prediction_proba[1])  # Probability of High Risk
-            
-            # Get binary prediction
-            prediction = self.model.predict(features_df)[0]
-            risk_class = "High Risk" if prediction == 1 else "Low Risk"
+            with span("model"):
+                prediction_proba = self.model.predict_proba(self.model_input(features))[0]
+            risk_score = float(prediction_proba[self.high_risk_column])
+            risk_class = self.classify(risk_score)
             
             # Interpret results
-            result = self.interpret_prediction(risk_score, risk_class, patient_data)
+            with span("interpret"):
+                result = self.interpret_prediction(risk_score, risk_class, patient_data)
             
             return result
             
         except Exception as e:
-            print(f"Prediction error: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                'error': str(e),
-                'risk_score': None,
-                'condition': 'error',
-                'alerts': [f'Prediction failed: {str(e)}']
-            }
+            logger.exception("Prediction error: %s", e)
+            return error_result(str(e), f'Prediction failed: {e}')
     
-    def interpret_prediction(self, risk_score, risk_class, patient_data):
+    def predict_many(self, patients):
         """
-        Interpret model output and generate clinical alerts
+        Make risk predictions for a whole ward with one model call
         
         Args:
-            risk_score: float probability of high risk (0.0 to 1.0)
-            risk_class: str "High Risk" or "Low Risk"
-            patient_data: original patient data
+            patients: list of patient dicts (same format as predict)
         
         Returns:
-            dict with interpreted results
+            list of result dicts, one per patient and in the same order,
+            shaped like the result of predict
         """
-        alerts = []
-        recommendations = []
+        if not self.model:
+            return [error_result('Model not loaded', 'Model not available') for _ in patients]
         
-        # Risk categorization
-        if risk_class == "High Risk":
-            condition = "HIGH RISK"
-            severity = "critical"
-            alerts.append("Patient classified as HIGH RISK by AI model")
-            recommendations.append("Immediate physician consultation required")
-            recommendations.append("Continuous monitoring recommended")
-        else:
-            if risk_score > 0.3:
-                condition = "MODERATE RISK"
-                severity = "monitor"
-                alerts.append("Patient classified as LOW RISK but close to threshold")
-                recommendations.append("Increase monitoring frequency")
-            else:
-                condition = "LOW RISK"
-                severity = "stable"
-                recommendations.append("Continue routine monitoring")
+        results = [error_result('Data preprocessing failed', 'Invalid input data') for _ in patients]
         
-        # Check vital signs against normal ranges
-        vital_signs = patient_data.get('vital_signs', {})
+        with span("preprocess", rows=len(patients)):
+            features, rows = self.preprocess_batch(patients)
+        if not rows:
+            return results
         
-        # Heart Rate
-        hr = float(vital_signs.get('heart_rate', 0))
-        if hr > 0:
-            if hr < 60:
-                alerts.append("Bradycardia: Heart rate < 60 bpm")
-                recommendations.append("Assess for cardiac issues")
-            elif hr > 100:
-                alerts.append("Tachycardia: Heart rate > 100 bpm")
-                recommendations.append("Investigate cause of elevated heart rate")
+        try:
+            # Probability of High Risk for every row at once
+            with span("model", rows=len(rows)):
+                risk_scores = self.model.predict_proba(self.model_input(features))[:, self.high_risk_column]
+        except Exception as e:
+            logger.exception("Prediction error: %s", e)
+            for i in rows:
+                results[i] = error_result(str(e), f'Prediction failed: {e}')
+            return results
         
-        # Blood Pressure
-        systolic = float(vital_signs.get('systolic_bp', 0))
-        diastolic = float(vital_signs.get('diastolic_bp', 0))
-        if systolic > 0 and diastolic > 0:
-            if systolic >= 140 or diastolic >= 90:
-                alerts.append("Hypertension detected")
-                recommendations.append("Blood pressure management needed")
-            elif systolic < 90 or diastolic < 60:
-                alerts.append("Hypotension detected")
-                recommendations.append("Monitor for signs of shock")
+        with span("interpret", rows=len(rows)):
+            risk_classes = [self.classify(float(risk_score)) for risk_score in risk_scores]
+            interpreted = self.interpret_many(risk_scores, risk_classes, [patients[i] for i in rows])
+            for i, result in zip(rows, interpreted):
+                results[i] = result
         
-        # SpO2
-        spo2 = float(vital_signs.get('spo2', 0))
-        if spo2 > 0:
-            if spo2 < 90:
-                alerts.append("CRITICAL: Severe hypoxemia (SpO2 < 90%)")
-                recommendations.append("Immediate oxygen therapy required")
-                severity = "critical"
-            elif spo2 < 95:
-                alerts.append("Low oxygen saturation (SpO2 < 95%)")
-                recommendations.append("Consider supplemental oxygen")
+        return results
+    
+    def classify(self, risk_score):
+        """
+        Turn a High Risk probability into a risk class
         
-        # Temperature
-        temp = float(vital_signs.get('temperature', 0))
-        if temp > 0:
-            if temp >= 38:
-                alerts.append("Fever detected (>=38C)")
-                recommendations.append("Monitor temperature regularly")
-                recommendations.append("Consider antipyretics if indicated")
-            elif temp < 36:
-                alerts.append("Hypothermia detected (<36C)")
-                recommendations.append("Warming measures required")
+        Uses decision_threshold (from preprocessing.json, default 0.5)
+        instead of a second model.predict pass. A score equal to the
+        threshold is Low Risk, like model.predict (proba > 0.5)
+        """
+        return "High Risk" if risk_score > self.decision_threshold else "Low Risk"
+    
+    def interpret_prediction(self, risk_score, risk_class, patient_data):
+        """
+        Interpret model output and generate clinical alerts
         
-        # Respiratory Rate
-        rr = float(vital_signs.get('respiratory_rate', 0))
-        if rr > 0:
-            if rr < 12:
-                alerts.append("Bradypnea: Respiratory rate < 12")
-                recommendations.append("Assess respiratory function")
-            elif rr > 20:
-                alerts.append("Tachypnea: Respiratory rate > 20")
-                recommendations.append("Evaluate for respiratory distress")
+        Args:
+            risk_score: float probability of high risk (0.0 to 1.0)
+            risk_class: str "High Risk" or "Low Risk"
+            patient_data: original patient data
         
-        # Age-related considerations
-        age = float(patient_data.get('age', 0))
-        if age > 65 and severity == "critical":
-            recommendations.append("Elderly patient: Consider ICU admission")
+        Returns:
+            dict with interpreted results
+        """
+        return self.interpret_many([risk_score], [risk_class], [patient_data])[0]
+    
+    def interpret_many(self, risk_scores, risk_classes, patients):
+        """
+        Interpret a batch of model outputs with the clinical rule table
         
-        return {
-            'risk_score': round(risk_score, 3),
-            'risk_probability_percent': round(risk_score * 100, 1),
-            'risk_class': risk_class,
-            'condition': condition,
-            'severity': severity,
-            'alerts': alerts if alerts else ["No critical alerts"],
-            'recommendations': recommendations,
-            'predicted_at': datetime.now().isoformat(),
-            'model_confidence': round(max(risk_score, 1 - risk_score), 3)
-        }
+        Thresholds live in clinical_rules (DEFAULT_RULES, or
+        clinical_rules.json when present); every rule is applied to the
+        whole batch at once.
+        
+        Returns:
+            list of result dicts like interpret_prediction, one per patient
+        """
+        interpreted = self.clinical_rules.interpret_many(patients, risk_scores, risk_classes)
+        predicted_at = datetime.now().isoformat()
+        results = []
+        for risk_score, risk_class, (condition, severity, alerts, recommendations) in zip(
+                risk_scores, risk_classes, interpreted):
+            risk_score = float(risk_score)
+            results.append({
+                'risk_score': round(risk_score, 3),
+                'risk_probability_percent': round(risk_score * 100, 1),
+                'risk_class': risk_class,
+                'condition': condition,
+                'severity': severity,
+                'alerts': list(alerts),
+                'recommendations': list(recommendations),
+                'predicted_at': predicted_at,
+                'model_confidence': round(max(risk_score, 1 - risk_score), 3)
+            })
+        return results
 
 
 # Test function
 if __name__ == "__main__":
+    import telemetry
+    telemetry.configure(level="DEBUG", spans=True)
+    
     print("Testing ML Model Handler...")
     print("="*70)
     
@@ -352,7 +334,7 @@ if __name__ == "__main__":
     
     if not handler.model:
         print("\nERROR: Model not loaded!")
-        print("Please ensure risk_classifier_model.pkl is in the current directory")
+        print("Please ensure risk_classifier_model.pkl is in model_files02/")
         exit()
     
     # Test patient data
@@ -0,0 +1,246 @@
+"""
+Model Bundle - model artifacts loaded once per process
+Reads a model directory (model file, feature columns, optional scaler
+and preprocessing.json) relative to this module instead of the current
+working directory, checks that the pieces belong together, and hands
+every caller the same read-only ModelBundle:
+
+    model_files/     best_gradient_boosting_model.pkl, scaler.pkl, feature_columns.pkl
+    model_files02/   risk_classifier_model.pkl, model_features.pkl, preprocessing.json
+
+    bundle = load_bundle("model_files02")
+    bundle = load_bundle("risk_classifier_model.pkl")   (found in model_files02/)
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+
+import joblib
+
+from feature_layout import FeatureLayout, FeatureSchemaError, check_feature_schema
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Searched in this order for bare model file names
+MODEL_DIRS = ("model_files02", "model_files")
+
+MODEL_FILES = ("risk_classifier_model.pkl", "best_gradient_boosting_model.pkl")
+FEATURE_FILES = ("model_features.pkl", "feature_columns.pkl")
+SCALER_FILE = "scaler.pkl"
+PREPROCESSING_FILE = "preprocessing.json"
+
+DEFAULT_PREPROCESSING = {
+    "gender_mapping": {"Male": 1, "Female": 0},
+    "target_mapping": {"Low Risk": 0, "High Risk": 1},
+    "decision_threshold": 0.5
+}
+
+# Column order of risk_classifier_model.pkl, for artifacts saved without one
+LEGACY_FEATURE_NAMES = (
+    'Patient ID',
+    'Heart Rate',
+    'Respiratory Rate',
+    'Body Temperature',
+    'Oxygen Saturation',
+    'Systolic Blood Pressure',
+    'Diastolic Blood Pressure',
+    'Age',
+    'Weight (kg)',
+    'Height (m)',
+    'Derived_Pulse_Pressure',
+    'Derived_BMI',
+    'Derived_MAP',
+    'Gender_Male'
+)
+
+_bundles = {}
+_lock = threading.Lock()
+
+
+class ModelBundle:
+    """
+    Loaded model artifacts (read-only, shared between threads)
+
+    Attributes:
+        directory: folder the artifacts were read from
+        model_path: model .pkl file
+        model: fitted classifier
+        scaler: fitted scaler applied before the model, or None
+        scaler_fused: True when feature_layout already applies the scaler
+        feature_names: tuple, model column order
+        feature_layout: FeatureLayout compiled for feature_names
+        preprocessing_info: read-only preprocessing.json contents
+        decision_threshold: risk_score > threshold means High Risk
+        high_risk_column: predict_proba column of the High Risk class
+    """
+
+    __slots__ = (
+        'directory', 'model_path', 'model', 'scaler', 'scaler_fused', 'feature_names',
+        'feature_layout', 'preprocessing_info', 'decision_threshold', 'high_risk_column'
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ModelBundle is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("ModelBundle is read-only")
+
+    def __repr__(self):
+        scaler = type(self.scaler).__name__ if self.scaler is not None else "no scaler"
+        return (f"ModelBundle({self.model_path!r}, {type(self.model).__name__}, "
+                f"{len(self.feature_names)} features, {scaler})")
+
+
+def resolve_model_path(path):
+    """
+    Find a model file or directory
+
+    Tries the path as given (absolute or relative to the working
+    directory), then relative to this module, then a bare file name in
+    each of MODEL_DIRS. A directory resolves to the first MODEL_FILES
+    entry it contains.
+
+    Returns:
+        absolute path of the model .pkl file, or None if not found
+    """
+    candidates = [path, os.path.join(BASE_DIR, path)]
+    if not os.path.dirname(path):
+        candidates += [os.path.join(BASE_DIR, folder, path) for folder in MODEL_DIRS]
+
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            for name in MODEL_FILES:
+                model_file = os.path.join(candidate, name)
+                if os.path.isfile(model_file):
+                    return os.path.abspath(model_file)
+        elif os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    return None
+
+
+def _load_pickle(path):
+    # Large NumPy arrays in joblib pickles are memory-mapped, not copied
+    return joblib.load(path, mmap_mode="r")
+
+
+def _check_scaler(scaler, feature_names):
+    n_features = getattr(scaler, "n_features_in_", None)
+    if n_features is not None and n_features != len(feature_names):
+        raise FeatureSchemaError(
+            f"Scaler expects {n_features} features, the model {len(feature_names)}")
+    scaler_names = getattr(scaler, "feature_names_in_", None)
+    if scaler_names is not None and [str(name) for name in scaler_names] != list(feature_names):
+        raise FeatureSchemaError("Scaler was fitted on another column order than the model")
+
+
+def scaler_affine(scaler):
+    """
+    Per-feature (center, scale) that reproduce scaler.transform
+
+    Returns:
+        (center, scale) arrays (either may be None when the scaler skips
+        that step), or None for scalers that are not a plain affine map
+    """
+    if type(scaler).__name__ == "RobustScaler":
+        return (scaler.center_ if scaler.with_centering else None,
+                scaler.scale_ if scaler.with_scaling else None)
+    if type(scaler).__name__ == "StandardScaler":
+        return (scaler.mean_ if scaler.with_mean else None,
+                scaler.scale_ if scaler.with_std else None)
+    return None
+
+
+def _read_bundle(model_path):
+    directory = os.path.dirname(model_path)
+
+    model = _load_pickle(model_path)
+    print(f"✓ Model loaded from {model_path}")
+
+    feature_names = None
+    for name in FEATURE_FILES:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            feature_names = list(_load_pickle(path))
+            print(f"✓ Feature names loaded: {len(feature_names)} features ({name})")
+            break
+    if feature_names is None and getattr(model, "feature_names_in_", None) is None:
+        feature_names = list(LEGACY_FEATURE_NAMES)
+        print("✓ Using default feature names from training")
+
+    preprocessing_info = dict(DEFAULT_PREPROCESSING)
+    path = os.path.join(directory, PREPROCESSING_FILE)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            preprocessing_info = json.load(f)
+        print("✓ Preprocessing info loaded")
+
+    # Refuse artifacts built with other feature definitions;
+    # take the column order from the model when it records one
+    feature_names = check_feature_schema(
+        feature_names, model, preprocessing_info.get("feature_schema_version"))
+
+    scaler = None
+    affine = None
+    path = os.path.join(directory, SCALER_FILE)
+    if os.path.exists(path):
+        scaler = _load_pickle(path)
+        _check_scaler(scaler, feature_names)
+        # Fold the scaler into the feature builder: rows are scaled in
+        # place in the layout's buffers, no transform() copy per batch
+        affine = scaler_affine(scaler)
+        print(f"✓ Scaler loaded ({type(scaler).__name__}"
+              f"{', fused into the feature layout' if affine else ''})")
+    center, scale = affine or (None, None)
+
+    # Column of predict_proba holding the High Risk probability
+    target_mapping = preprocessing_info.get("target_mapping", {"Low Risk": 0, "High Risk": 1})
+    classes = list(getattr(model, "classes_", [0, 1]))
+    high_risk_label = target_mapping.get("High Risk", 1)
+
+    return ModelBundle(
+        directory=directory,
+        model_path=model_path,
+        model=model,
+        scaler=scaler,
+        scaler_fused=affine is not None,
+        feature_names=tuple(feature_names),
+        # Compile the feature builder once for this column order
+        feature_layout=FeatureLayout(feature_names, center=center, scale=scale),
+        preprocessing_info=MappingProxyType(preprocessing_info),
+        # Operating point: risk_score > threshold means High Risk
+        decision_threshold=float(preprocessing_info.get("decision_threshold", 0.5)),
+        high_risk_column=classes.index(high_risk_label) if high_risk_label in classes else 1,
+    )
+
+
+def load_bundle(path="risk_classifier_model.pkl"):
+    """
+    Model artifacts for a model file or directory, loaded once per process
+
+    Args:
+        path: model .pkl file or model directory (see resolve_model_path)
+
+    Returns:
+        shared ModelBundle
+
+    Raises:
+        FileNotFoundError: no model at path
+        FeatureSchemaError: the artifacts do not fit together or were
+            built with other feature definitions
+    """
+    model_path = resolve_model_path(path)
+    if model_path is None:
+        raise FileNotFoundError(f"Model file not found: {path}")
+
+    with _lock:
+        bundle = _bundles.get(model_path)
+        if bundle is None:
+            bundle = _bundles[model_path] = _read_bundle(model_path)
+    return bundle
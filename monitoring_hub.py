@@ -0,0 +1,262 @@
+"""
+Monitoring Hub - one process watching a whole ward
+Follows one VitalSignSim TSV export per bed from a single reader thread,
+routes each parsed row to that bed's callbacks and scores the ward
+with one batched model call per polling cycle
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from simulator_bridge import FileBasedSimulatorBridge, TsvFileTailer
+import telemetry
+from telemetry import get_logger, span
+from vitals_history import DEFAULT_CAPACITY, VitalsHistory
+
+
+logger = get_logger("monitoring_hub")
+
+
+class BedFeed:
+    """State for one monitored bed"""
+
+    def __init__(self, bed_id, file_path, patient=None, from_end=False):
+        """
+        Args:
+            bed_id: unique name of the bed
+            file_path: VitalSignSim export for this bed
+            patient: optional demographics (case_id, age, gender, height,
+                     weight) used to score this bed's vitals
+            from_end: skip the rows already in the file
+        """
+        self.bed_id = bed_id
+        self.file_path = file_path
+        self.patient = patient
+        self.tailer = TsvFileTailer(file_path, from_end=from_end)
+        self.callbacks = []
+        self.prediction_callbacks = []
+        self.latest_data = None
+        self.latest_prediction = None
+        self.rows_received = 0
+        self.shard = 0
+
+
+class MonitoringHub:
+    """
+    Watch N simulator feeds without one OS thread per bed
+
+    A single reader thread polls every bed's file for appended rows.
+    Callbacks run on a small pool of worker threads; each bed always
+    uses the same worker, so its rows arrive in order. When a model
+    handler is given, every cycle the newest row of each bed with
+    patient details is scored in one predict_many call.
+    """
+
+    def __init__(self, model_handler=None, poll_interval=0.25, workers=4,
+                 history_capacity=DEFAULT_CAPACITY):
+        """
+        Args:
+            model_handler: optional MLModelHandler used to score the beds
+            poll_interval: seconds to wait when no bed had new data
+            workers: number of callback worker threads
+            history_capacity: rows of history kept per bed (self.history)
+        """
+        self.model_handler = model_handler
+        self.poll_interval = poll_interval
+        self.workers = max(1, workers)
+        self.beds = {}
+        self.history = VitalsHistory(history_capacity)
+        self.is_running = False
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._shards = []
+        self._scorer = None
+        self._next_shard = 0
+
+    def add_bed(self, bed_id, file_path, patient=None, callback=None,
+                on_prediction=None, from_end=False):
+        """
+        Start watching a bed (can be called while the hub is running)
+
+        Args:
+            bed_id: unique name of the bed
+            file_path: VitalSignSim export for this bed
+            patient: optional demographics dict used for scoring
+            callback: optional function(bed_id, vital_signs) for every row
+            on_prediction: optional function(bed_id, result) for every score
+            from_end: skip the rows already in the file
+        """
+        feed = BedFeed(bed_id, file_path, patient=patient, from_end=from_end)
+        if callback:
+            feed.callbacks.append(callback)
+        if on_prediction:
+            feed.prediction_callbacks.append(on_prediction)
+
+        with self._lock:
+            if bed_id in self.beds:
+                raise ValueError(f"Bed already monitored: {bed_id}")
+            feed.shard = self._next_shard % self.workers
+            self._next_shard += 1
+            self.beds[bed_id] = feed
+
+        return feed
+
+    def remove_bed(self, bed_id):
+        """Stop watching a bed"""
+        with self._lock:
+            feed = self.beds.pop(bed_id, None)
+        if feed:
+            feed.tailer.close()
+            self.history.remove(bed_id)
+
+    def set_patient(self, bed_id, patient):
+        """Attach (or replace) the demographics used to score a bed"""
+        with self._lock:
+            self.beds[bed_id].patient = patient
+
+    def get_latest_data(self, bed_id):
+        """Most recent vital signs of a bed (or None)"""
+        feed = self.beds.get(bed_id)
+        return feed.latest_data if feed else None
+
+    def get_latest_prediction(self, bed_id):
+        """Most recent model result of a bed (or None)"""
+        feed = self.beds.get(bed_id)
+        return feed.latest_prediction if feed else None
+
+    def start(self):
+        """Start the reader thread and the worker pool"""
+        if self.is_running:
+            return
+
+        self._shards = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"hub-worker-{i}")
+                        for i in range(self.workers)]
+        if self.model_handler:
+            self._scorer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hub-scorer")
+
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name="hub-reader", daemon=True)
+        self._thread.start()
+        print(f"✓ Monitoring hub started ({len(self.beds)} beds, {self.workers} workers)")
+
+    def stop(self):
+        """Stop reading, finish queued callbacks and close all files"""
+        self.is_running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        # Scorer first: it hands results to the bed workers
+        if self._scorer:
+            self._scorer.shutdown(wait=True)
+            self._scorer = None
+        for executor in self._shards:
+            executor.shutdown(wait=True)
+        self._shards = []
+
+        with self._lock:
+            for feed in self.beds.values():
+                feed.tailer.close()
+        print("✓ Monitoring hub stopped")
+
+    def _run(self):
+        """Reader loop: one pass over every bed per cycle"""
+        while self.is_running:
+            with self._lock:
+                feeds = list(self.beds.values())
+
+            got_data = False
+            to_score = []
+
+            with span("hub.cycle", beds=len(feeds)):
+                for feed in feeds:
+                    try:
+                        lines = feed.tailer.read_lines()
+                    except Exception as e:
+                        logger.warning("Read error on bed %s: %s", feed.bed_id, e)
+                        continue
+
+                    rows = []
+                    for line in lines:
+                        vital_signs = FileBasedSimulatorBridge.parse_tsv_line(line)
+                        if vital_signs:
+                            rows.append(vital_signs)
+                    if not rows:
+                        continue
+
+                    got_data = True
+                    feed.rows_received += len(rows)
+                    feed.latest_data = rows[-1]
+                    history = self.history.buffer(feed.bed_id)
+                    for vital_signs in rows:
+                        history.append(vital_signs)
+
+                    if feed.callbacks:
+                        self._shards[feed.shard].submit(self._deliver_rows, feed, rows)
+                    if self._scorer and feed.patient is not None:
+                        to_score.append((feed, rows[-1]))
+
+            if to_score:
+                self._scorer.submit(self._score, to_score)
+
+            if not got_data:
+                time.sleep(self.poll_interval)
+
+    def _deliver_rows(self, feed, rows):
+        for vital_signs in rows:
+            for cb in feed.callbacks:
+                try:
+                    cb(feed.bed_id, vital_signs)
+                except Exception as e:
+                    logger.exception("Callback error on bed %s: %s", feed.bed_id, e)
+
+    def _deliver_prediction(self, feed, result):
+        for cb in feed.prediction_callbacks:
+            try:
+                cb(feed.bed_id, result)
+            except Exception as e:
+                logger.exception("Prediction callback error on bed %s: %s", feed.bed_id, e)
+
+    def _score(self, to_score):
+        """Score the newest row of every updated bed in one model call"""
+        patients = [dict(feed.patient, vital_signs=vital_signs) for feed, vital_signs in to_score]
+
+        with span("hub.score", beds=len(patients)):
+            results = self.model_handler.predict_many(patients)
+
+        for (feed, _), result in zip(to_score, results):
+            feed.latest_prediction = result
+            if feed.prediction_callbacks and self._shards:
+                self._shards[feed.shard].submit(self._deliver_prediction, feed, result)
+
+
+# Test function
+if __name__ == "__main__":
+    import sys
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else "."
+    files = sorted(f for f in os.listdir(folder) if f.endswith(".txt"))
+    if not files:
+        print(f"No .txt exports found in {os.path.abspath(folder)}")
+        exit()
+
+    counts = {}
+
+    def count_row(bed_id, vital_signs):
+        counts[bed_id] = counts.get(bed_id, 0) + 1
+
+    telemetry.configure()
+    hub = MonitoringHub()
+    for name in files:
+        hub.add_bed(os.path.splitext(name)[0], os.path.join(folder, name), callback=count_row)
+
+    hub.start()
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{sum(counts.values())} rows from {len(counts)} beds")
+    except KeyboardInterrupt:
+        hub.stop()
@@ -4,15 +4,13 @@ VitalSignSim TSV File → GUI → XGBoost ML Model
 """
 
 import customtkinter as ctk
-from PIL import Image
-import random
 import os
-import sys
-import subprocess
-import json
 import threading
 from datetime import datetime
 
+from patient_store import DuplicateCaseIdError
+from app import App
+
 # Try to import integration modules
 try:
     from simulator_bridge import FileBasedSimulatorBridge
@@ -22,7 +20,9 @@ except ImportError:
     SIMULATOR_AVAILABLE = False
 
 try:
-    from ml_model_handler import MLModelHandler
+    from inference_server import InferenceClient
+    from prediction_coalescer import PredictionCoalescer
+    from analysis_executor import AnalysisExecutor
     ML_AVAILABLE = True
 except ImportError:
     print("Warning: ml_model_handler.py not found")
@@ -32,22 +32,21 @@ except ImportError:
 simulator = None
 simulator_active = False
 ml_model = None
+model_ready = False  # set once at startup; checked on every Analyze click
+analysis = None
 current_prediction = None
 auto_update_active = False
+pending_vitals = None  # newest simulator sample not drawn yet
+pending_vitals_lock = threading.Lock()
 
-# Create root window
-root = ctk.CTk()
-root.title("Patient Insertion")
-root.geometry("1366x768")
-root.resizable(True, True)
+# Screen frame inside the app window (store, model and image are shared)
+shell = App.instance()
+patient_store = shell.store
+root = shell.view("patient_insertion_updated", "Patient Insertion")
 
 # Background
 try:
-    bg_image = ctk.CTkImage(
-        Image.open("vector-healthcare-medical-sciencefuturistic-background-260nw-2652074677.jpg"),
-        size=(1366, 768)
-    )
-    bg_label = ctk.CTkLabel(root, text="", image=bg_image)
+    bg_label = ctk.CTkLabel(root, text="", image=shell.background)
     bg_label.place(x=0, y=0, relwidth=1, relheight=1)
 except:
     print("Background image not found")
@@ -55,12 +54,22 @@ except:
 # ==================== FUNCTIONS ====================
 
 def initialize_ml_model():
-    """Load ML model on startup"""
-    global ml_model
+    """Use the local inference server if it runs, else the app's model"""
+    global ml_model, model_ready, analysis
     if ML_AVAILABLE:
         try:
-            ml_model = MLModelHandler("risk_classifier_model.pkl")
-            if ml_model.model:
+            # One /health probe here; InferenceClient.model makes an HTTP call
+            client = InferenceClient()
+            if client.model:
+                ml_model = PredictionCoalescer(client)
+                analysis = AnalysisExecutor(ml_model, root)
+                model_ready = True
+                update_status("AI Model Ready (server)", "green")
+                return
+            ml_model = shell.predictor("risk_classifier_model.pkl")
+            analysis = AnalysisExecutor(ml_model, root)
+            model_ready = bool(ml_model.model)
+            if model_ready:
                 update_status("AI Model Ready", "green")
             else:
                 update_status("Model file not found", "orange")
@@ -90,7 +99,8 @@ def initialize_simulator():
             try:
                 simulator = FileBasedSimulatorBridge(file_path)
                 if simulator.connect():
-                    simulator.start_monitoring(callback=on_simulator_data)
+                    # Tail the export so rows appended by VitalSignSim show up live
+                    simulator.start_monitoring(callback=on_simulator_data, follow=True)
                     simulator_active = True
                     root.after(0, lambda fp=file_path: update_status(f"File: {os.path.basename(fp)}", "green"))
                     return
@@ -103,23 +113,35 @@ def initialize_simulator():
     threading.Thread(target=connect_async, daemon=True).start()
 
 def on_simulator_data(vital_signs):
-    """Callback when simulator sends new data"""
-    root.after(0, lambda: update_vital_fields(vital_signs))
+    """
+    Callback when simulator sends new data (reader thread)
+
+    Only the newest sample is drawn: a burst of rows, such as a long
+    export read at startup, costs one Tk callback instead of one per row.
+    """
+    global pending_vitals
+    with pending_vitals_lock:
+        scheduled = pending_vitals is not None
+        pending_vitals = vital_signs
+    if not scheduled:
+        root.after(0, draw_pending_vitals)
+
+def draw_pending_vitals():
+    """Show the newest sample from on_simulator_data (Tk thread)"""
+    global pending_vitals
+    with pending_vitals_lock:
+        vital_signs, pending_vitals = pending_vitals, None
+    if vital_signs is not None:
+        update_vital_fields(vital_signs)
 
 def update_vital_fields(vital_signs):
-    """Update UI with simulator data"""
-    if 'heart_rate' in vital_signs:
-        hr_var.set(vital_signs['heart_rate'])
-    if 'systolic_bp' in vital_signs:
-        sys_var.set(vital_signs['systolic_bp'])
-    if 'diastolic_bp' in vital_signs:
-        dia_var.set(vital_signs['diastolic_bp'])
-    if 'spo2' in vital_signs:
-        spo2_var.set(vital_signs['spo2'])
-    if 'respiratory_rate' in vital_signs:
-        rr_var.set(vital_signs['respiratory_rate'])
-    if 'temperature' in vital_signs:
-        temp_var.set(vital_signs['temperature'])
+    """Update UI with simulator data (VitalSample or dict)"""
+    for key, var in (('heart_rate', hr_var), ('systolic_bp', sys_var),
+                     ('diastolic_bp', dia_var), ('spo2', spo2_var),
+                     ('respiratory_rate', rr_var), ('temperature', temp_var)):
+        if key in vital_signs:
+            value = vital_signs[key]
+            var.set(f"{value:g}" if isinstance(value, float) else value)
 
 def fetch_from_simulator():
     """Manual fetch button"""
@@ -157,9 +179,7 @@ def auto_update_loop():
 
 def run_ai_analysis():
     """Run ML prediction"""
-    global ml_model, current_prediction
-    
-    if not ml_model or not ml_model.model:
+    if not analysis or not model_ready:
         msg = "AI Model not loaded. Please add risk_classifier_model.pkl"
         show_message(msg, "orange")
         update_prediction_box(msg)
@@ -170,14 +190,15 @@ def run_ai_analysis():
     
     update_prediction_box("Running AI analysis...\nPlease wait...")
     
-    def analyze():
+    # Runs on the Tk thread; only the latest analysis of a case arrives
+    def on_result(result):
         global current_prediction
-        patient_data = collect_patient_data()
-        result = ml_model.predict(patient_data)
         current_prediction = result
-        root.after(0, lambda: display_prediction(result))
+        display_prediction(result)
     
-    threading.Thread(target=analyze, daemon=True).start()
+    patient_data = collect_patient_data()
+    if analysis.submit(patient_data["case_id"], patient_data, on_result) is None:
+        show_message("Too many analyses running, please retry", "orange")
 
 def display_prediction(result):
     """Display AI results"""
@@ -251,7 +272,7 @@ def collect_patient_data():
     }
 
 def save_patient():
-    """Save to patients.json"""
+    """Save to the patient store"""
     global current_prediction
     
     if not validate_inputs():
@@ -263,18 +284,15 @@ def save_patient():
     if current_prediction:
         patient_data['ml_predictions'] = current_prediction
     
-    # Load existing
-    file_path = "patients.json"
-    patients = []
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            patients = json.load(f)
-    
-    patients.append(patient_data)
-    
-    # Save
-    with open(file_path, "w") as f:
-        json.dump(patients, f, indent=4)
+    # Save (one indexed insert, no rewrite of the other records)
+    try:
+        patient_store.add(patient_data)
+    except DuplicateCaseIdError as e:
+        show_message(str(e), "red")
+        return
+    except Exception as e:
+        show_message(f"Save failed: {str(e)[:60]}", "red")
+        return
     
     show_message(f"Patient {patient_data['case_id']} saved!", "green")
     root.after(2000, clear_form)
@@ -282,7 +300,9 @@ def save_patient():
 def clear_form():
     """Reset all fields"""
     global current_prediction
-    case_id_var.set(f"CASE-{random.randint(1000, 9999)}")
+    if analysis:
+        analysis.cancel(case_id_var.get())
+    case_id_var.set(patient_store.allocate_case_id())
     gender_var.set("Male")
     age_var.set("")
     height_var.set("")
@@ -315,16 +335,21 @@ def update_prediction_box(text):
 
 def go_back():
     """Return to homepage"""
-    global simulator, auto_update_active
+    global simulator, simulator_active, auto_update_active
     auto_update_active = False
     if simulator and simulator_active:
         try:
             simulator.disconnect()
         except:
             pass
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__), "Homepage.py")
-    subprocess.Popen([sys.executable, file_path])
+        simulator_active = False
+    shell.show("homepage")
+
+def on_show():
+    """Screen shown again: reconnect the simulator closed by go_back"""
+    if not simulator_active:
+        update_status("Initializing...", "gray")
+        initialize_simulator()
 
 # ==================== UI SETUP ====================
 
@@ -358,7 +383,7 @@ ctk.CTkLabel(
 ).pack(pady=15)
 
 # Case ID
-case_id_var = ctk.StringVar(value=f"CASE-{random.randint(1000, 9999)}")
+case_id_var = ctk.StringVar(value=patient_store.allocate_case_id())
 f = ctk.CTkFrame(demo_frame, fg_color="transparent")
 f.pack(fill="x", padx=40, pady=5)
 ctk.CTkLabel(f, text="Case ID:", font=("Arial", 18, "bold"), width=200, anchor="w").pack(side="left")
@@ -477,7 +502,9 @@ message_label.pack(pady=10)
 # Initialize on startup
 root.after(100, initialize_ml_model)
 root.after(200, initialize_simulator)
+shell.set_on_show("patient_insertion_updated", on_show)
 
 # ==================== RUN ====================
 
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    shell.run()
\ No newline at end of file
@@ -1,31 +1,24 @@
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import random
 import os
-import sys
-import subprocess
 import re
 import math
 import csv
 from tkinter import messagebox
 from striprtf.striprtf import rtf_to_text
 from typing import List, Dict, Optional
+from patient_store import DuplicateCaseIdError
+from app import App
 
-# --- Create root window first ---
-root = ctk.CTk()
-root.title("Patient insertion")
-root.geometry("1366x768")
-root.resizable(True, True)  
+# --- Screen frame inside the app window ---
+shell = App.instance()
+root = shell.view("patient_insertion", "Patient insertion")
 
-# --- Load background image after root creation ---
-bg_image = ctk.CTkImage(Image.open("vector-healthcare-medical-sciencefuturistic-background-260nw-2652074677.jpg"), size=(1366, 768))
-bg_label = ctk.CTkLabel(root, text="", image=bg_image)
+# --- Background (loaded once by the app) ---
+bg_label = ctk.CTkLabel(root, text="", image=shell.background)
 bg_label.place(x=0, y=0, relwidth=1, relheight=1)
 
 def go_back():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__),"Homepage.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("homepage")
 
 
 back_button = ctk.CTkButton(root, text="← Back", width=140, height=60, fg_color="#63B1F1",  text_color="black", font=("Arial", 20, "bold"), command=go_back)
@@ -35,8 +28,11 @@ back_button.place(x=70, y=30)
 title_label = ctk.CTkLabel(root, text="  Insert Patient Information  ", fg_color="#63B1F1", width=300, height=80, text_color="black", font=("Arial", 30, "bold"))
 title_label.pack(pady=20)
 
+# ------------------ Patient storage ------------------
+patient_store = shell.store
+
 # ------------------ Generate Case ID ------------------
-generated_case_id = f"CASE-{random.randint(1000, 9999)}"
+generated_case_id = patient_store.allocate_case_id()
 
 # ------------------ Case ID ------------------
 case_frame = ctk.CTkFrame(root, corner_radius=25, fg_color="transparent")
@@ -319,7 +315,6 @@ def clear_all():
     age_slider.set(25)
     age_value.set("25")
 
-import json
 def submit_data():
     """
     Handles data validation, calculation, submission, and RTF processing.
@@ -361,32 +356,21 @@ def submit_data():
         "temperature": temp_str
     }
 
-    file_path = "patients.json"
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as file:
-                data = json.load(file)
-        except json.JSONDecodeError:
-             data = []
-    else:
-        data = []
-
-    data.append(patient_data)
-
     try:
-        with open(file_path, "w") as file:
-            json.dump(data, file, indent=4)
+        patient_store.add(patient_data)
         print("Patient Saved:", patient_data)
         messagebox.showinfo("Success", "Patient data submitted and calculations saved to CSV.") # Added success message
+    except DuplicateCaseIdError as e:
+        messagebox.showerror("Save Error", str(e))
     except Exception as e:
-        messagebox.showerror("JSON Error", f"Failed to save patient data: {e}")
+        messagebox.showerror("Save Error", f"Failed to save patient data: {e}")
 
     # 5. UI Cleanup (Reset for next patient)
     clear_all()
     # Regenerate Case ID
     case_entry.configure(state="normal")
     case_entry.delete(0, ctk.END)
-    case_entry.insert(0, f"CASE-{random.randint(1000, 9999)}")
+    case_entry.insert(0, patient_store.allocate_case_id())
     case_entry.configure(state="readonly")
 
 
@@ -410,4 +394,5 @@ footer_label.pack(side="bottom", fill="x", padx=10, pady=0)
 
 # ------------------ Run App ------------------
 
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    shell.run()
\ No newline at end of file
@@ -0,0 +1,673 @@
+"""
+Patient Store - embedded SQLite storage for patient records
+Replaces load-all / rewrite-all of patients.json with indexed,
+transactional inserts, deletes and lookups by case_id
+
+Writes are appended to SQLite's write-ahead log (WAL) and folded into
+the database file by checkpoints, so a save costs the same however
+many patients are stored, and after a crash only the WAL tail since
+the last checkpoint is replayed. Inserts, deletes and model
+predictions are also recorded in an append-only events table;
+predictions live only there, not inside every patient record. Events
+are kept for EVENT_RETENTION_DAYS and pruned by compact().
+
+A delete only writes a tombstone (deleted_at) on the patient row;
+tombstoned rows are purged later by compact(), which runs on a
+background thread once COMPACT_AFTER_TOMBSTONES have piled up.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime, date, timedelta
+
+
+DEFAULT_DB_PATH = "patients.db"
+DEFAULT_JSON_PATH = "patients.json"
+
+# WAL pages written before SQLite folds the log back into the database
+AUTOCHECKPOINT_PAGES = 1000
+
+# New case IDs: CASE-000001, CASE-000002, ... (zero-padded, so they also
+# sort as text up to CASE-999999)
+CASE_ID_PREFIX = "CASE-"
+CASE_ID_DIGITS = 6
+
+# add_many() batches at least this big refresh the query planner statistics
+ANALYZE_AFTER_ROWS = 1000
+
+# Tombstoned rows kept before a background compaction is started
+COMPACT_AFTER_TOMBSTONES = 500
+
+EVENT_KINDS = ('insert', 'save', 'delete', 'prediction')
+
+# Events older than this are pruned by compact(), except the latest
+# prediction of each stored patient (the record's ml_predictions)
+EVENT_RETENTION_DAYS = 365
+
+_PATIENT_COLUMNS = "case_id, gender, age, record, created_at"
+
+# query() sort keys -> columns (rowid breaks ties, so pages never overlap)
+SORT_COLUMNS = {
+    "added": "rowid",
+    "case_id": "case_id",
+    "gender": "gender",
+    "age": "age",
+    "risk_class": "risk_class",
+    "risk_score": "risk_score",
+    "created_at": "created_at",
+}
+
+
+class DuplicateCaseIdError(ValueError):
+    """Raised when a record with the same case_id already exists"""
+
+
+class PatientStore:
+    """
+    Patient records keyed by case_id
+
+    Every write is one SQLite transaction, so it is atomic and durable,
+    and several windows / processes can write the same file safely.
+    case_id is the primary key: insert, delete and lookup go through its
+    index instead of scanning the whole list.
+
+    A record's 'ml_predictions' is split off on write and stored as a
+    'prediction' event; the patient row keeps the latest risk_class /
+    risk_score and a pointer to that event. get() and all() put the
+    latest prediction back, so callers see the same dict they saved.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, json_path=DEFAULT_JSON_PATH):
+        """
+        Args:
+            db_path: SQLite database file
+            json_path: legacy patients.json, imported once on first open
+                       (None to skip the migration)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._compactor = None
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(f"PRAGMA wal_autocheckpoint={AUTOCHECKPOINT_PAGES}")
+        self._create_schema()
+        self._tombstones = self._conn.execute(
+            "SELECT COUNT(*) FROM patients WHERE deleted_at IS NOT NULL").fetchone()[0]
+        if not self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            self.analyze()
+
+        if json_path:
+            self.migrate_from_json(json_path)
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS patients (
+                    case_id        TEXT PRIMARY KEY,
+                    gender         TEXT,
+                    age            REAL,
+                    record         TEXT NOT NULL,
+                    created_at     TEXT NOT NULL,
+                    risk_class     TEXT,
+                    risk_score     REAL,
+                    prediction_seq INTEGER,
+                    deleted_at     TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+                    case_id    TEXT NOT NULL,
+                    kind       TEXT NOT NULL,
+                    payload    TEXT,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS events_case_id ON events (case_id, seq)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sequences (
+                    name  TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key   TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS patients_created_at ON patients (created_at)")
+            # Live rows in rowid order: count() and page() walk this small
+            # index instead of the table with its JSON records
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS patients_deleted_at ON patients (deleted_at)")
+            # Search indexes over live rows only (see query())
+            for name, columns in (("gender", "gender, age"), ("age", "age"),
+                                  ("risk_class", "risk_class, age"),
+                                  ("risk_score", "risk_score")):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS patients_{name} ON patients ({columns}) "
+                    "WHERE deleted_at IS NULL")
+
+    @staticmethod
+    def _split_record(patient):
+        """(row values, prediction or None) for a patient dict"""
+        if not patient.get("case_id"):
+            raise ValueError("Patient record has no case_id")
+        record = dict(patient)
+        prediction = record.pop("ml_predictions", None)
+        try:
+            age = float(record.get("age"))
+        except (TypeError, ValueError):
+            age = None
+        row = (record["case_id"], record.get("gender"), age,
+               json.dumps(record), datetime.now().isoformat())
+        return row, prediction
+
+    @staticmethod
+    def _join_record(row):
+        record = json.loads(row["record"])
+        if row["prediction"]:
+            record["ml_predictions"] = json.loads(row["prediction"])
+        return record
+
+    def _append_event(self, case_id, kind, payload=None):
+        """Append one event (caller holds the lock and the transaction)"""
+        cursor = self._conn.execute(
+            "INSERT INTO events (case_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+            (case_id, kind, None if payload is None else json.dumps(payload),
+             datetime.now().isoformat()))
+        return cursor.lastrowid
+
+    def _append_prediction(self, case_id, prediction):
+        seq = self._append_event(case_id, "prediction", prediction)
+        self._conn.execute(
+            "UPDATE patients SET risk_class = ?, risk_score = ?, prediction_seq = ? "
+            "WHERE case_id = ?",
+            (prediction.get("risk_class"), prediction.get("risk_score"), seq, case_id))
+        return seq
+
+    def _write(self, replace, kind, patient):
+        """
+        Write one record (caller holds the lock and the transaction)
+
+        A tombstoned case_id counts as free; a live one is overwritten
+        only when replace is set.
+
+        Returns:
+            True if the record was written
+        """
+        row, prediction = self._split_record(patient)
+        condition = "" if replace else " WHERE patients.deleted_at IS NOT NULL"
+        cursor = self._conn.execute(
+            f"INSERT INTO patients ({_PATIENT_COLUMNS}) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (case_id) DO UPDATE SET "
+            "gender = excluded.gender, age = excluded.age, record = excluded.record, "
+            "created_at = excluded.created_at, risk_class = NULL, risk_score = NULL, "
+            "prediction_seq = NULL, deleted_at = NULL" + condition, row)
+        if cursor.rowcount < 1:
+            return False
+        self._append_event(row[0], kind)
+        if prediction:
+            self._append_prediction(row[0], prediction)
+        return True
+
+    def add(self, patient):
+        """
+        Insert a new patient record
+
+        Raises:
+            DuplicateCaseIdError if the case_id is already stored
+        """
+        with self._lock, self._conn:
+            written = self._write(False, "insert", patient)
+        if not written:
+            raise DuplicateCaseIdError(f"Case ID already exists: {patient['case_id']}")
+
+    def add_many(self, patients, replace=False):
+        """
+        Insert many records in one transaction
+
+        Args:
+            patients: iterable of patient dicts
+            replace: overwrite records whose case_id already exists
+                     (otherwise they are skipped)
+
+        Returns:
+            number of records written
+        """
+        kind = "save" if replace else "insert"
+        with self._lock, self._conn:
+            written = sum(self._write(replace, kind, patient) for patient in patients)
+        if written >= ANALYZE_AFTER_ROWS:
+            self.analyze()
+        return written
+
+    def save(self, patient):
+        """Insert or replace a patient record"""
+        with self._lock, self._conn:
+            self._write(True, "save", patient)
+
+    def record_prediction(self, case_id, prediction):
+        """
+        Append a model result for a stored patient
+
+        Args:
+            case_id: patient the prediction belongs to
+            prediction: result dict from MLModelHandler.predict
+
+        Returns:
+            sequence number of the event, or None if the case_id is not stored
+        """
+        with self._lock, self._conn:
+            found = self._conn.execute(
+                "SELECT 1 FROM patients WHERE case_id = ? AND deleted_at IS NULL",
+                (case_id,)).fetchone()
+            if not found:
+                return None
+            return self._append_prediction(case_id, prediction)
+
+    def get(self, case_id):
+        """Patient record dict, or None if not found"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.record, e.payload AS prediction FROM patients p "
+                "LEFT JOIN events e ON e.seq = p.prediction_seq "
+                "WHERE p.case_id = ? AND p.deleted_at IS NULL", (case_id,)).fetchone()
+        return self._join_record(row) if row else None
+
+    def exists(self, case_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM patients WHERE case_id = ? AND deleted_at IS NULL",
+                (case_id,)).fetchone()
+        return row is not None
+
+    def _tombstone(self, case_ids):
+        """Tombstone live records (caller holds the lock and the transaction)"""
+        now = datetime.now().isoformat()
+        deleted = []
+        for case_id in case_ids:
+            cursor = self._conn.execute(
+                "UPDATE patients SET deleted_at = ? WHERE case_id = ? AND deleted_at IS NULL",
+                (now, case_id))
+            if cursor.rowcount > 0:
+                self._append_event(case_id, "delete")
+                deleted.append(case_id)
+        return deleted
+
+    def _deleted(self, count):
+        """Count new tombstones and start a compaction when there are enough"""
+        self._tombstones += count
+        if self._tombstones >= COMPACT_AFTER_TOMBSTONES:
+            self.compact_in_background()
+
+    def delete(self, case_id):
+        """
+        Delete a patient record
+
+        Returns:
+            True if a record was deleted, False if the case_id was not found
+        """
+        with self._lock, self._conn:
+            deleted = self._tombstone([case_id])
+        self._deleted(len(deleted))
+        return bool(deleted)
+
+    def delete_many(self, case_ids):
+        """
+        Delete several patient records in one transaction
+
+        Args:
+            case_ids: iterable of case IDs (unknown ones are skipped)
+
+        Returns:
+            list of the case IDs that were deleted
+        """
+        with self._lock, self._conn:
+            deleted = self._tombstone(dict.fromkeys(case_ids))
+        self._deleted(len(deleted))
+        return deleted
+
+    def delete_registered_before(self, cutoff):
+        """
+        Delete every patient registered before a date, in one transaction
+
+        Args:
+            cutoff: datetime, date or ISO string; records created earlier
+                    are deleted
+
+        Returns:
+            list of the case IDs that were deleted
+        """
+        if isinstance(cutoff, date):
+            cutoff = cutoff.isoformat()
+        with self._lock, self._conn:
+            case_ids = [row["case_id"] for row in self._conn.execute(
+                "SELECT case_id FROM patients WHERE created_at < ? AND deleted_at IS NULL",
+                (cutoff,))]
+            deleted = self._tombstone(case_ids)
+        self._deleted(len(deleted))
+        return deleted
+
+    def compact(self):
+        """
+        Purge tombstoned rows, prune old events (see prune_events) and
+        fold the write-ahead log into the database
+
+        Returns:
+            number of rows purged
+        """
+        with self._lock, self._conn:
+            purged = self._conn.execute(
+                "DELETE FROM patients WHERE deleted_at IS NOT NULL").rowcount
+            self._tombstones = 0
+        self.prune_events()
+        self.analyze()
+        self.checkpoint()
+        return purged
+
+    def prune_events(self, before=None):
+        """
+        Delete events older than the retention period
+
+        Retention policy: every event of the last EVENT_RETENTION_DAYS is
+        kept, so the log answers "what happened to this patient recently".
+        Older events are deleted, including those of purged patients,
+        except the latest prediction of each stored patient, which is
+        where get() reads the record's ml_predictions from.
+
+        Args:
+            before: datetime; events created before it are pruned
+                    (default: now - EVENT_RETENTION_DAYS)
+
+        Returns:
+            number of events deleted
+        """
+        if before is None:
+            before = datetime.now() - timedelta(days=EVENT_RETENTION_DAYS)
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM events WHERE created_at < ? AND seq NOT IN "
+                "(SELECT prediction_seq FROM patients WHERE prediction_seq IS NOT NULL)",
+                (before.isoformat(),)).rowcount
+
+    def analyze(self):
+        """
+        Refresh the statistics SQLite uses to pick an index for query()
+
+        Without them a filter such as risk_class + age may be answered
+        from a less selective index. Done on first open, after bulk
+        inserts and by compact().
+        """
+        with self._lock:
+            self._conn.execute("ANALYZE")
+            self._conn.commit()
+
+    def compact_in_background(self):
+        """Run compact() on a daemon thread (no-op while one is running)"""
+        with self._lock:
+            if self._compactor and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name="store-compactor",
+                                               daemon=True)
+            self._compactor.start()
+
+    def _stored_case_ids(self, case_ids, chunk=500):
+        """Subset of case_ids that have a row, live or tombstoned (caller holds the lock)"""
+        stored = set()
+        for i in range(0, len(case_ids), chunk):
+            part = case_ids[i:i + chunk]
+            stored.update(row[0] for row in self._conn.execute(
+                f"SELECT case_id FROM patients WHERE case_id IN ({', '.join('?' * len(part))})",
+                part))
+        return stored
+
+    def allocate_case_ids(self, n):
+        """
+        Reserve n new, unique case IDs
+
+        The counter lives in the database and is bumped inside a write
+        transaction, so windows and processes sharing the file never
+        get the same ID. IDs increase monotonically and are never
+        reused, even after a delete; unused ones just leave a gap.
+        The counter starts after the largest numbered ID already
+        stored (e.g. CASE-9999 from the old random IDs).
+
+        Each call costs one primary-key update plus one primary-key
+        lookup per ID; the stored IDs are only scanned once, when the
+        counter is first created (see _seed_case_id_sequence).
+
+        Returns:
+            list of n case ID strings, in increasing order
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+
+        with self._lock, self._conn:
+            if not self._conn.execute(
+                    "SELECT 1 FROM sequences WHERE name = 'case_id'").fetchone():
+                self._seed_case_id_sequence()
+            case_ids = []
+            while len(case_ids) < n:
+                need = n - len(case_ids)
+                self._conn.execute(
+                    "UPDATE sequences SET value = value + ? WHERE name = 'case_id'", (need,))
+                last = self._conn.execute(
+                    "SELECT value FROM sequences WHERE name = 'case_id'").fetchone()[0]
+                batch = [f"{CASE_ID_PREFIX}{i:0{CASE_ID_DIGITS}d}"
+                         for i in range(last - need + 1, last + 1)]
+                # Skip any ID that was typed in by hand
+                taken = self._stored_case_ids(batch)
+                case_ids.extend(case_id for case_id in batch if case_id not in taken)
+            return case_ids
+
+    def _seed_case_id_sequence(self):
+        """
+        Create the case_id counter at the largest numbered ID stored (caller holds the lock)
+
+        Runs once per database. The range on case_id walks the primary-key
+        index over 'CASE-...' rows only (LIKE is case-insensitive and cannot
+        use it). The numeric MAX is taken over that range rather than the
+        last ID in text order, because old IDs are not zero-padded
+        (CASE-9999 sorts after CASE-012345).
+        """
+        self._conn.execute(
+            "INSERT OR IGNORE INTO sequences (name, value) "
+            "SELECT 'case_id', COALESCE(MAX(CAST(SUBSTR(case_id, ?) AS INTEGER)), 0) "
+            "FROM patients WHERE case_id >= ? AND case_id < ?",
+            (len(CASE_ID_PREFIX) + 1, CASE_ID_PREFIX,
+             CASE_ID_PREFIX[:-1] + chr(ord(CASE_ID_PREFIX[-1]) + 1)))
+
+    def allocate_case_id(self):
+        """Reserve one new, unique case ID (see allocate_case_ids)"""
+        return self.allocate_case_ids(1)[0]
+
+    @staticmethod
+    def _filter_clause(case_id=None, gender=None, min_age=None, max_age=None,
+                       risk_class=None, min_risk_score=None, max_risk_score=None):
+        """(WHERE clause, parameters) for the query() filters"""
+        clauses = ["deleted_at IS NULL"]
+        params = []
+        if case_id:
+            # Prefix match as a range, so the primary-key index is used
+            clauses.append("case_id >= ? AND case_id < ?")
+            params += [case_id, case_id + "\uffff"]
+        for column, op, value in (("gender", "=", gender),
+                                  ("age", ">=", min_age), ("age", "<=", max_age),
+                                  ("risk_class", "=", risk_class),
+                                  ("risk_score", ">=", min_risk_score),
+                                  ("risk_score", "<=", max_risk_score)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return " AND ".join(clauses), params
+
+    def count(self, **filters):
+        """
+        Number of stored patients
+
+        Args:
+            **filters: same keyword filters as query()
+        """
+        where, params = self._filter_clause(**filters)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM patients WHERE {where}", params).fetchone()[0]
+
+    def all(self):
+        """All patient records, in insertion order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.record, e.payload AS prediction FROM patients p "
+                "LEFT JOIN events e ON e.seq = p.prediction_seq "
+                "WHERE p.deleted_at IS NULL ORDER BY p.rowid").fetchall()
+        return [self._join_record(row) for row in rows]
+
+    def query(self, offset=0, limit=100, sort_by="added", descending=False, **filters):
+        """
+        Search, sort and page patient records in the database
+
+        Filtering, sorting and paging run in SQLite on the indexes, and
+        only the records of the requested page are decoded.
+
+        Args:
+            offset: number of matching records to skip
+            limit: maximum number of records returned
+            sort_by: one of SORT_COLUMNS ('added' is insertion order)
+            descending: reverse the sort order
+            **filters:
+                case_id: case ID prefix (e.g. 'CASE-0012')
+                gender: 'Male' or 'Female'
+                min_age / max_age: inclusive age range
+                risk_class: latest prediction class (e.g. 'High Risk')
+                min_risk_score / max_risk_score: latest risk_score range
+
+        Returns:
+            list of patient record dicts
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"sort_by must be one of {tuple(SORT_COLUMNS)}, got {sort_by!r}")
+        where, params = self._filter_clause(**filters)
+        direction = "DESC" if descending else "ASC"
+        order = SORT_COLUMNS[sort_by]
+        order = f"rowid {direction}" if order == "rowid" else f"{order} {direction}, rowid {direction}"
+
+        with self._lock:
+            # Page of rowids from the indexes, then only those records
+            rowids = [row[0] for row in self._conn.execute(
+                f"SELECT rowid FROM patients WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset])]
+            if not rowids:
+                return []
+            rows = self._conn.execute(
+                "SELECT p.rowid, p.record, e.payload AS prediction FROM patients p "
+                "LEFT JOIN events e ON e.seq = p.prediction_seq "
+                f"WHERE p.rowid IN ({', '.join('?' * len(rowids))})", rowids).fetchall()
+
+        by_rowid = {row["rowid"]: row for row in rows}
+        return [self._join_record(by_rowid[rowid]) for rowid in rowids]
+
+    def page(self, offset=0, limit=100):
+        """One page of patient records, in insertion order"""
+        return self.query(offset, limit)
+
+    def events(self, case_id=None, after_seq=0, kind=None):
+        """
+        Events in log order
+
+        Args:
+            case_id: only the events of this patient
+            after_seq: only events with a larger sequence number
+                       (pass the last seq seen to read just the tail)
+            kind: only 'insert', 'save', 'delete' or 'prediction' events
+
+        Returns:
+            list of dicts with seq, case_id, kind, payload and created_at
+        """
+        if kind is not None and kind not in EVENT_KINDS:
+            raise ValueError(f"kind must be one of {EVENT_KINDS}, got {kind!r}")
+
+        query = "SELECT seq, case_id, kind, payload, created_at FROM events WHERE seq > ?"
+        params = [after_seq]
+        if case_id is not None:
+            query += " AND case_id = ?"
+            params.append(case_id)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY seq", params).fetchall()
+        return [dict(row, payload=json.loads(row["payload"]) if row["payload"] else None)
+                for row in rows]
+
+    def checkpoint(self):
+        """
+        Fold the write-ahead log into the database file and truncate it
+
+        SQLite already does this every AUTOCHECKPOINT_PAGES pages; call it
+        to compact on demand (e.g. on close or before a backup).
+
+        Returns:
+            number of WAL pages written back
+        """
+        with self._lock:
+            _, _, written = self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        return max(written, 0)
+
+    def migrate_from_json(self, json_path=DEFAULT_JSON_PATH):
+        """
+        One-time import of the legacy patients.json
+
+        The JSON file is left untouched. The import is recorded in the
+        meta table, so later calls do nothing.
+
+        Returns:
+            number of records imported
+        """
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done or not os.path.exists(json_path):
+            return 0
+
+        try:
+            with open(json_path, "r") as f:
+                patients = json.load(f)
+        except json.JSONDecodeError:
+            patients = []
+
+        imported = self.add_many(p for p in patients if p.get("case_id"))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (f"{os.path.abspath(json_path)} ({imported} records, {datetime.now().isoformat()})",))
+
+        print(f"✓ Imported {imported} patients from {json_path}")
+        return imported
+
+    def close(self):
+        if self._compactor:
+            self._compactor.join()
+        with self._lock:
+            self._conn.execute("PRAGMA optimize")
+        self.checkpoint()
+        with self._lock:
+            self._conn.close()
+
+
+# Test function
+if __name__ == "__main__":
+    store = PatientStore()
+    print(f"{store.count()} patients in {os.path.abspath(store.db_path)}")
+    for patient in store.all()[:10]:
+        print(patient)
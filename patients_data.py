@@ -1,25 +1,16 @@
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import random
-import os
-import sys
-import subprocess
-import json 
-
-root = ctk.CTk()
-root.title("Patient data")
-root.geometry("1366x768")
-root.resizable(True, True)
-
-# --- Load background image after root creation ---
-bg_image = ctk.CTkImage(Image.open("vector-healthcare-medical-sciencefuturistic-background-260nw-2652074677.jpg"), size=(1366, 768))
-bg_label = ctk.CTkLabel(root, text="", image=bg_image)
+from app import App
+from virtual_table import VirtualTable
+
+shell = App.instance()
+root = shell.view("patients_data", "Patient data")
+
+# --- Background (loaded once by the app) ---
+bg_label = ctk.CTkLabel(root, text="", image=shell.background)
 bg_label.place(x=0, y=0, relwidth=1, relheight=1)
 
 def go_back():
-    root.destroy()
-    file_path = os.path.join(os.path.dirname(__file__),"Homepage.py")
-    subprocess.Popen([sys.executable, file_path])
+    shell.show("homepage")
 
 
 back_button = ctk.CTkButton(root, text="← Back", width=140, height=60, fg_color="#63B1F1",  text_color="black", font=("Arial", 20, "bold"), command=go_back)
@@ -27,37 +18,76 @@ back_button.place(x=70, y=30)
 
 ctk.CTkLabel(root, text="  All Registered Patients  ", fg_color="#63B1F1", width=300, height=80, text_color="black", font=("Arial", 30, "bold")).pack(pady=50)
 
-# Scrollable frame
-scroll = ctk.CTkScrollableFrame(root, fg_color="#d1d9e9", width=800, height=500)
-scroll.pack(pady=10)
-
-file_path = "patients.json"
-
-# Load saved patients
-if os.path.exists(file_path):
-    with open(file_path, "r") as file:
-        patients = json.load(file)
-else:
-    patients = []
-
-# Table headers
-headers = ["Case ID", "Gender", "Age", "Height", "weight", "Temperature"]
-for col, text in enumerate(headers):
-    ctk.CTkLabel(scroll, text=text, font=("Arial", 25, "bold")) \
-        .grid(row=0, column=col, padx=20, pady=10)
-
-# Table rows
-for row, p in enumerate(patients, start=1):
-    ctk.CTkLabel(scroll, text=p["case_id"], font=("Arial", 16)) \
-        .grid(row=row, column=0, padx=20, pady=5)
-    ctk.CTkLabel(scroll, text=p["gender"], font=("Arial", 16)) \
-        .grid(row=row, column=1, padx=20, pady=5)
-    ctk.CTkLabel(scroll, text=p["age"], font=("Arial", 16)) \
-        .grid(row=row, column=2, padx=20, pady=5)
-    ctk.CTkLabel(scroll, text=p["height"], font=("Arial", 16)) \
-        .grid(row=row, column=3, padx=20, pady=5)
-    ctk.CTkLabel(scroll, text=p["weight"], font=("Arial", 16)) \
-        .grid(row=row, column=4, padx=20, pady=5)
-    ctk.CTkLabel(scroll, text=p["temperature"], font=("Arial", 16)) \
-        .grid(row=row, column=5, padx=20, pady=5)
-root.mainloop()
\ No newline at end of file
+# Patient table: only the visible rows are built, pages are read from the store on scroll
+patient_store = shell.store
+
+# --- Search bar (filters, sort and paging run in the store) ---
+search_frame = ctk.CTkFrame(root, fg_color="transparent")
+search_frame.pack(pady=5)
+
+ctk.CTkLabel(search_frame, text="Case ID:", font=("Arial", 16, "bold")).pack(side="left", padx=5)
+case_search = ctk.CTkEntry(search_frame, width=120, font=("Arial", 14), placeholder_text="CASE-")
+case_search.pack(side="left", padx=5)
+
+gender_filter = ctk.StringVar(value="All")
+ctk.CTkOptionMenu(search_frame, variable=gender_filter, values=["All", "Male", "Female"],
+                  width=100).pack(side="left", padx=5)
+
+ctk.CTkLabel(search_frame, text="Age:", font=("Arial", 16, "bold")).pack(side="left", padx=5)
+min_age_entry = ctk.CTkEntry(search_frame, width=50, font=("Arial", 14), placeholder_text="min")
+min_age_entry.pack(side="left", padx=2)
+max_age_entry = ctk.CTkEntry(search_frame, width=50, font=("Arial", 14), placeholder_text="max")
+max_age_entry.pack(side="left", padx=2)
+
+risk_filter = ctk.StringVar(value="All")
+ctk.CTkOptionMenu(search_frame, variable=risk_filter, values=["All", "High Risk", "Low Risk"],
+                  width=110).pack(side="left", padx=5)
+
+sort_options = {"Newest": ("added", True), "Oldest": ("added", False),
+                "Case ID": ("case_id", False), "Age": ("age", False),
+                "Risk score": ("risk_score", True)}
+sort_choice = ctk.StringVar(value="Oldest")
+ctk.CTkOptionMenu(search_frame, variable=sort_choice, values=list(sort_options),
+                  width=110).pack(side="left", padx=5)
+
+def number_or_none(entry):
+    try:
+        return float(entry.get())
+    except ValueError:
+        return None
+
+def search():
+    filters = {
+        "case_id": case_search.get().strip() or None,
+        "gender": None if gender_filter.get() == "All" else gender_filter.get(),
+        "min_age": number_or_none(min_age_entry),
+        "max_age": number_or_none(max_age_entry),
+        "risk_class": None if risk_filter.get() == "All" else risk_filter.get(),
+    }
+    sort_by, descending = sort_options[sort_choice.get()]
+    table.set_source(
+        fetch=lambda offset, limit: patient_store.query(offset, limit, sort_by=sort_by,
+                                                        descending=descending, **filters),
+        count=lambda: patient_store.count(**filters))
+    count_label.configure(text=f"{len(table.data)} patients")
+
+ctk.CTkButton(search_frame, text="Search", width=90, fg_color="#63B1F1", text_color="black",
+              font=("Arial", 16, "bold"), command=search).pack(side="left", padx=5)
+
+count_label = ctk.CTkLabel(root, text="", font=("Arial", 16))
+count_label.pack()
+
+columns = [("Case ID", "case_id"), ("Gender", "gender"), ("Age", "age"),
+           ("Height", "height"), ("weight", "weight"), ("Temperature", "temperature"),
+           ("Risk", lambda p: p.get("ml_predictions", {}).get("risk_class", ""))]
+
+table = VirtualTable(root, columns, fetch=patient_store.page, count=patient_store.count,
+                     visible_rows=10, fg_color="#d1d9e9")
+table.pack(pady=10)
+search()
+
+# Records may have been added or deleted on other screens
+shell.set_on_show("patients_data", search)
+
+if __name__ == "__main__":
+    shell.run()
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Prediction Coalescer - micro-batching in front of MLModelHandler
+Requests submitted from many threads (GUI screens, beds, HTTP clients)
+are gathered for a short window and scored with one predict_many call;
+each caller gets a Future for its own result:
+
+    coalescer = PredictionCoalescer(handler, max_batch=256, max_wait=0.005)
+    future = coalescer.submit(patient)
+    result = future.result()
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from telemetry import get_logger, span
+
+
+logger = get_logger("prediction_coalescer")
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT = 0.005
+
+_STOP = object()
+
+
+class PredictionCoalescer:
+    """
+    Collects predict requests and scores them together
+
+    The batching thread waits for a first request, then keeps taking
+    requests for up to max_wait seconds or until max_batch are queued,
+    so no request waits longer than max_wait for others to join it.
+    Futures cancelled before their batch is scored are left out.
+    """
+
+    def __init__(self, handler, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT,
+                 name="prediction-coalescer"):
+        """
+        Args:
+            handler: object with predict_many(patients) (MLModelHandler,
+                     InferenceClient)
+            max_batch: most requests scored in one model call
+            max_wait: seconds a request may wait for others to join its batch
+            name: name of the batching thread
+        """
+        self.handler = handler
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def model(self):
+        """Model of the wrapped handler (so callers can check it like MLModelHandler)"""
+        return self.handler.model
+
+    def submit(self, patient_data):
+        """
+        Queue one patient for scoring
+
+        Returns:
+            Future resolving to the same result dict as MLModelHandler.predict
+        """
+        if self._closed:
+            raise RuntimeError("PredictionCoalescer is closed")
+        future = Future()
+        self._queue.put((patient_data, future))
+        return future
+
+    def predict(self, patient_data):
+        """Score one patient (blocks until its batch has been scored)"""
+        return self.submit(patient_data).result()
+
+    def predict_many(self, patients):
+        """Already a batch: score it directly"""
+        return self.handler.predict_many(patients)
+
+    def close(self):
+        """Score what is queued, then stop the batching thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _take_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Score this batch first, stop on the next round
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+
+            batch = [(patient, future) for patient, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                with span("coalescer.batch", rows=len(batch)):
+                    results = self.handler.predict_many([patient for patient, _ in batch])
+            except Exception as e:
+                logger.exception("Batch prediction error: %s", e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
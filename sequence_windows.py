@@ -0,0 +1,99 @@
+"""
+Sequence Windows - lookback windows for sequence models (Model01.ipynb)
+Builds (n_windows, seq_length, n_features) inputs with
+numpy.lib.stride_tricks.sliding_window_view instead of a Python loop
+over the rows; windows can be kept inside one patient's rows.
+
+    X_seq, y_seq = create_sequences(X_train, y_train, 5)
+    X_seq, y_seq = create_sequences(X, y, 5, groups=patient_ids, order=timestamps)
+
+Window i holds rows i .. i + seq_length - 1 and its target is the row
+right after it (y[i + seq_length]), like the notebook's original loop.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _values(data):
+    """DataFrame / Series / list -> NumPy array (no copy when possible)"""
+    return data.to_numpy() if hasattr(data, "to_numpy") else np.asarray(data)
+
+
+def window_view(values, seq_length):
+    """
+    Every window of seq_length consecutive rows, as a read-only view
+
+    Args:
+        values: 2D array (n_rows, n_features)
+        seq_length: rows per window
+
+    Returns:
+        array (n_rows - seq_length + 1, seq_length, n_features) sharing
+        memory with values (no copy)
+    """
+    # sliding_window_view puts the window axis last: (n, n_features, seq_length)
+    return sliding_window_view(values, seq_length, axis=0).transpose(0, 2, 1)
+
+
+def window_starts(groups, seq_length):
+    """
+    Start rows of the windows that stay inside one group
+
+    Args:
+        groups: group id per row, each group's rows next to each other
+        seq_length: rows per window
+
+    Returns:
+        int array of start rows i whose window rows and target row
+        (i .. i + seq_length) all belong to the same group
+    """
+    groups = _values(groups)
+    n = len(groups) - seq_length
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+    # Groups are contiguous, so equal ends mean nothing else in between
+    return np.flatnonzero(groups[:n] == groups[seq_length:])
+
+
+def create_sequences(X_data, y_data, seq_length, groups=None, order=None):
+    """
+    Lookback windows and their targets
+
+    Args:
+        X_data: features (DataFrame or 2D array), one row per time step
+        y_data: targets (Series or 1D array), one per row
+        seq_length: rows per window (LOOKBACK_WINDOW)
+        groups: optional patient id per row; windows never span two
+                patients. Rows are grouped (stable sort) if needed.
+        order: optional sort key within a patient (e.g. Timestamp);
+               defaults to the current row order
+
+    Returns:
+        (X_seq, y_seq): X_seq is (n_windows, seq_length, n_features).
+        Without groups it is a read-only view of X_data (no copy);
+        with groups only the windows inside one patient are gathered.
+    """
+    X = _values(X_data)
+    y = _values(y_data)
+    if len(X) != len(y):
+        raise ValueError(f"X_data has {len(X)} rows but y_data has {len(y)}")
+
+    n = len(X) - seq_length
+    if n <= 0:
+        return np.empty((0, seq_length) + X.shape[1:], dtype=X.dtype), y[:0]
+
+    if groups is None:
+        return window_view(X, seq_length)[:n], y[seq_length:]
+
+    groups = _values(groups)
+    if len(groups) != len(X):
+        raise ValueError(f"groups has {len(groups)} rows but X_data has {len(X)}")
+
+    keys = (np.arange(len(X)) if order is None else _values(order), groups)
+    sort = np.lexsort(keys)
+    if not np.array_equal(sort, np.arange(len(X))):
+        X, y, groups = X[sort], y[sort], groups[sort]
+
+    starts = window_starts(groups, seq_length)
+    return window_view(X, seq_length)[starts], y[starts + seq_length]
@@ -7,7 +7,128 @@ Time, HR, SpO2, etCO2, RR, NIBP, Rhythm, Event
 import os
 import time
 import threading
-from datetime import datetime
+
+from telemetry import get_logger, span
+from vital_sample import NAN, VitalSample, parse_number
+from vitals_history import DEFAULT_CAPACITY, VitalsRingBuffer
+
+
+logger = get_logger("simulator_bridge")
+
+
+class TsvFileTailer:
+    """
+    Follow a growing text file like `tail -F`
+    
+    Keeps the byte offset of the last complete line, so each call reads
+    only newly appended bytes. Handles truncation (file shrinks, or is
+    rewritten with different bytes before our offset: start again from the
+    top) and rotation (file replaced: finish the old file, then open the new
+    one). Memory stays constant however big the file gets.
+    """
+    
+    # Bytes just before the offset that are re-read to confirm the file
+    # was only appended to since the last call
+    TAIL_CHECK = 32
+    
+    def __init__(self, file_path, from_end=False, chunk_size=64 * 1024):
+        """
+        Args:
+            file_path: file to follow
+            from_end: skip whatever is already in the file
+            chunk_size: max bytes read per call to read_lines
+        """
+        self.file_path = file_path
+        self.from_end = from_end
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self._file = None
+        self._identity = None
+        self._partial = b''
+        self._tail = b''
+        self._stat = None
+    
+    def _open(self, seek_end):
+        self._file = open(self.file_path, 'rb')
+        st = os.fstat(self._file.fileno())
+        self._identity = (st.st_dev, st.st_ino)
+        self._stat = None
+        self._rewind(st.st_size if seek_end else 0)
+    
+    def _rewind(self, offset):
+        """Continue reading from offset, dropping any held-back partial line"""
+        self._file.seek(max(offset - self.TAIL_CHECK, 0))
+        self._tail = self._file.read(offset - self._file.tell())
+        self.offset = offset
+        self._partial = b''
+    
+    def _appended_only(self, st):
+        """
+        True if the bytes before our offset are still the ones we read
+        
+        A file truncated and rewritten past the old offset between two
+        polls is not shorter, but reading on from the old offset would
+        start in the middle of some unrelated line. Only re-checked when
+        size or mtime changed.
+        """
+        if st.st_size < self.offset:
+            return False
+        if (st.st_size, st.st_mtime_ns) == self._stat or not self._tail:
+            return True
+        self._file.seek(self.offset - len(self._tail))
+        same = self._file.read(len(self._tail)) == self._tail
+        self._file.seek(self.offset)
+        return same
+    
+    def read_lines(self):
+        """
+        Return the complete lines appended since the last call
+        
+        A trailing line without a newline is held back until it is finished.
+        Returns an empty list if there is nothing new (or no file yet).
+        """
+        try:
+            st = os.stat(self.file_path)
+        except OSError:
+            # File missing (e.g. between rotate and re-create): wait for it
+            return []
+        
+        data = b''
+        if self._file is None:
+            self._open(seek_end=self.from_end)
+        elif (st.st_dev, st.st_ino) != self._identity:
+            # Rotated: drain what is left of the old file, then switch
+            data = self._file.read(self.chunk_size)
+            if not data:
+                last_line = self._partial
+                self._file.close()
+                self._open(seek_end=False)
+                if last_line:
+                    # The old file is finished, so its last line is complete
+                    return [last_line.decode('utf-8', errors='replace')]
+        elif not self._appended_only(st):
+            # Truncated (and maybe already rewritten): start again from the top
+            logger.info("%s was truncated, reading it again from the start", self.file_path)
+            self._rewind(0)
+        
+        if not data:
+            self._stat = (st.st_size, st.st_mtime_ns)
+            if st.st_size == self.offset and (st.st_dev, st.st_ino) == self._identity:
+                return []
+            data = self._file.read(self.chunk_size)
+            if not data:
+                return []
+        
+        self.offset += len(data)
+        self._tail = (self._tail + data)[-self.TAIL_CHECK:]
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        return [line.decode('utf-8', errors='replace') for line in lines]
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
 
 
 class FileBasedSimulatorBridge:
@@ -16,16 +137,18 @@ class FileBasedSimulatorBridge:
     Format: Time	HR	SpO2	etCO2	RR	NIBP	Rhythm	Event
     """
     
-    def __init__(self, file_path='vitalsign_output.txt'):
+    def __init__(self, file_path='vitalsign_output.txt', history_capacity=DEFAULT_CAPACITY):
         """
         Initialize file monitor
         
         Args:
             file_path: Path to vitalsign_output.txt
+            history_capacity: number of past rows kept in self.history
         """
         self.file_path = file_path
         self.is_running = False
-        self.latest_data = {}
+        self.latest_data = None
+        self.history = VitalsRingBuffer(history_capacity)
         self.callbacks = []
         
         print(f"Initializing VitalSignSim file monitor")
@@ -40,11 +163,12 @@ class FileBasedSimulatorBridge:
                 print(f"  Make sure VitalSignSim is exporting to this file")
                 return False
             
-            with open(self.file_path, 'r') as f:
-                lines = f.readlines()
+            if not os.access(self.file_path, os.R_OK):
+                print(f"✗ File is not readable: {self.file_path}")
+                return False
             
             print(f"✓ File found: {self.file_path}")
-            print(f"✓ File contains {len(lines)} lines")
+            print(f"✓ File size: {os.path.getsize(self.file_path)} bytes")
             return True
                 
         except Exception as e:
@@ -56,7 +180,8 @@ class FileBasedSimulatorBridge:
         self.is_running = False
         print("✓ File monitoring stopped")
     
-    def parse_tsv_line(self, line):
+    @staticmethod
+    def parse_tsv_line(line):
         """
         Parse a single line from the TSV file
         
@@ -64,7 +189,7 @@ class FileBasedSimulatorBridge:
         Example: 00:32	98	68	55	37	120/80	Sinus	HR changed
         
         Returns:
-            dict with vital signs data or None if parsing fails
+            VitalSample with numeric vitals or None if parsing fails
         """
         try:
             line = line.strip()
@@ -76,44 +201,38 @@ class FileBasedSimulatorBridge:
             if len(parts) < 6:
                 return None
             
-            # Extract values by column index
-            time_val = parts[0].strip()
-            hr = parts[1].strip()
-            spo2 = parts[2].strip()
-            etco2 = parts[3].strip()
-            rr = parts[4].strip()
-            nibp = parts[5].strip()
-            rhythm = parts[6].strip() if len(parts) > 6 else "Unknown"
-            event = parts[7].strip() if len(parts) > 7 else ""
-            
             # Parse blood pressure (format: 120/80)
-            systolic, diastolic = "", ""
+            systolic, diastolic = NAN, NAN
+            nibp = parts[5]
             if '/' in nibp:
                 bp_parts = nibp.split('/')
-                systolic = bp_parts[0].strip()
-                diastolic = bp_parts[1].strip()
+                systolic = parse_number(bp_parts[0])
+                diastolic = parse_number(bp_parts[1])
+            
+            rhythm, rhythm_text = VitalSample.parse_rhythm(parts[6] if len(parts) > 6 else "Unknown")
+            event, event_text = VitalSample.parse_event(parts[7] if len(parts) > 7 else "")
             
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'time': time_val,
-                'heart_rate': hr,
-                'spo2': spo2,
-                'etco2': etco2,
-                'respiratory_rate': rr,
-                'systolic_bp': systolic,
-                'diastolic_bp': diastolic,
-                'blood_pressure': nibp,
-                'rhythm': rhythm,
-                'event': event,
-                'temperature': '37.0'
-            }
+            # Temperature is not exported by VitalSignSim, so it stays unmeasured
+            return VitalSample(
+                time_s=FileBasedSimulatorBridge.parse_time_to_seconds(parts[0].strip()),
+                heart_rate=parse_number(parts[1]),
+                spo2=parse_number(parts[2]),
+                etco2=parse_number(parts[3]),
+                respiratory_rate=parse_number(parts[4]),
+                systolic_bp=systolic,
+                diastolic_bp=diastolic,
+                rhythm=rhythm,
+                rhythm_text=rhythm_text,
+                event=event,
+                event_text=event_text
+            )
             
         except Exception as e:
-            print(f"Parse error: {e}")
-            print(f"Line content: {line[:100]}")
+            logger.warning("Parse error: %s (line content: %r)", e, line[:100])
             return None
     
-    def parse_time_to_seconds(self, time_str):
+    @staticmethod
+    def parse_time_to_seconds(time_str):
         """
         Convert time string (MM:SS or HH:MM:SS) to total seconds
         
@@ -136,77 +255,157 @@ class FileBasedSimulatorBridge:
         except:
             return 0
     
-    def start_monitoring(self, callback=None):
+    def dispatch(self, vital_signs):
+        """Store a parsed row (latest data + history) and send it to the callbacks"""
+        self.latest_data = vital_signs
+        self.history.append(vital_signs)
+        
+        with span("bridge.callbacks"):
+            for cb in self.callbacks:
+                try:
+                    cb(vital_signs)
+                except Exception as e:
+                    logger.exception("Callback error: %s", e)
+    
+    def iter_replay(self, speed=1.0):
         """
-        Start iterating through the file rows sequentially with realistic timing
+        Yield the parsed rows of the file in order, paced by their Time column
+        
+        Samples keep their original time_s values; only the waiting is scaled.
+        Pacing follows an absolute schedule from the first row, so sleep
+        overshoot does not accumulate over a long recording. Waiting only
+        happens while the bridge is running (see replay / start_monitoring).
+        
+        Args:
+            speed: replay speed multiplier (1.0 = real time, 10.0 = ten times
+                   faster); None or 0 replays as fast as possible
+        """
+        start_wall = None
+        virtual_seconds = 0.0
+        prev_time_seconds = None
+        
+        with open(self.file_path, 'r') as f:
+            for line in f:
+                vital_signs = self.parse_tsv_line(line)
+                if not vital_signs:
+                    continue
+                
+                if speed:
+                    current_time_seconds = vital_signs.time_s
+                    
+                    if prev_time_seconds is None:
+                        start_wall = time.monotonic()
+                    else:
+                        time_diff = current_time_seconds - prev_time_seconds
+                        # Use time difference if positive, otherwise default to 1 second
+                        virtual_seconds += time_diff if time_diff > 0 else 1.0
+                    prev_time_seconds = current_time_seconds
+                    
+                    # Sleep in short slices so stop requests are honoured quickly
+                    target = start_wall + virtual_seconds / speed
+                    while self.is_running:
+                        remaining = target - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        time.sleep(min(remaining, 0.5))
+                
+                yield vital_signs
+    
+    def replay(self, callback=None, speed=None):
+        """
+        Replay the whole file through the callbacks on the calling thread
+        
+        Meant for regression runs and backfill over recorded exports.
+        
+        Args:
+            callback: optional function called with each parsed row
+            speed: replay speed multiplier, None = as fast as possible
+        
+        Returns:
+            number of rows delivered
+        """
+        if callback:
+            self.callbacks.append(callback)
+        
+        self.is_running = True
+        count = 0
+        try:
+            for vital_signs in self.iter_replay(speed):
+                if not self.is_running:
+                    break
+                self.dispatch(vital_signs)
+                count += 1
+        finally:
+            self.is_running = False
+        
+        return count
+    
+    def start_monitoring(self, callback=None, follow=False, from_end=False, poll_interval=0.25,
+                         speed=1.0):
+        """
+        Start delivering file rows to the callbacks on a background thread
+        
+        Args:
+            callback: optional function called with each parsed row
+            follow: False replays the file once, paced by its Time column,
+                    True tails the file and delivers rows as they are appended
+            from_end: (follow mode) skip the rows already in the file
+            poll_interval: (follow mode) seconds to wait when there is no new data
+            speed: (replay mode) speed multiplier, e.g. 1, 10 or 1000;
+                   None or 0 replays as fast as possible
         """
         if callback:
             self.callbacks.append(callback)
         
         self.is_running = True
         
+        def follow_loop():
+            print("✓ Following file for new rows...")
+            tailer = TsvFileTailer(self.file_path, from_end=from_end)
+            
+            try:
+                while self.is_running:
+                    lines = tailer.read_lines()
+                    
+                    for line in lines:
+                        if not self.is_running:
+                            break
+                        vital_signs = self.parse_tsv_line(line)
+                        if vital_signs:
+                            self.dispatch(vital_signs)
+                    
+                    if not lines:
+                        time.sleep(poll_interval)
+            
+            except Exception as e:
+                logger.exception("Follow error: %s", e)
+            finally:
+                tailer.close()
+        
         def monitor_loop():
-            print("✓ Starting sequential data playback...")
+            print(f"✓ Starting sequential data playback (speed: {speed or 'max'})...")
             
             try:
                 if not os.path.exists(self.file_path):
                     print("✗ File not found.")
                     return
-
-                with open(self.file_path, 'r') as f:
-                    lines = f.readlines()
-
-                # Filter out headers and empty lines
-                data_rows = [line for line in lines 
-                           if line.strip() and not line.startswith('Time')]
-                print(f"✓ Loaded {len(data_rows)} rows of data.")
-
-                # Track previous timestamp
-                prev_time_seconds = None
-
-                # Iterate through rows
-                for line in data_rows:
+                
+                count = 0
+                for vital_signs in self.iter_replay(speed):
                     if not self.is_running:
                         break
-                    
-                    vital_signs = self.parse_tsv_line(line)
-                    
-                    if vital_signs:
-                        self.latest_data = vital_signs
-                        
-                        # Send to callbacks
-                        for cb in self.callbacks:
-                            try:
-                                cb(vital_signs)
-                            except Exception as e:
-                                print(f"Callback error: {e}")
-                        
-                        # Calculate delay based on timestamp difference
-                        current_time_seconds = self.parse_time_to_seconds(vital_signs['time'])
-                        
-                        if prev_time_seconds is not None:
-                            time_diff = current_time_seconds - prev_time_seconds
-                            # Use time difference if positive, otherwise default to 1 second
-                            delay = time_diff if time_diff > 0 else 1.0
-                        else:
-                            # First row, use default delay
-                            delay = 1.0
-                        
-                        prev_time_seconds = current_time_seconds
-                        time.sleep(delay)
-                    else:
-                        # If parsing failed, use default delay
-                        time.sleep(1.0)
+                    self.dispatch(vital_signs)
+                    count += 1
                 
-                print("✓ End of data file reached.")
+                print(f"✓ End of data file reached ({count} rows).")
                 self.is_running = False
-
+            
             except Exception as e:
-                print(f"Playback error: {e}")
+                logger.exception("Playback error: %s", e)
         
-        thread = threading.Thread(target=monitor_loop, daemon=True)
+        thread = threading.Thread(target=follow_loop if follow else monitor_loop, daemon=True)
         thread.start()
     
     def get_latest_data(self):
-        """Get the most recent vital signs data"""
-        return self.latest_data.copy() if self.latest_data else None
\ No newline at end of file
+        """Get the most recent vital signs data (VitalSample, read-only)"""
+        return self.latest_data
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Logging and timing spans for the monitoring / prediction pipeline
+
+Hot-path code logs through the standard logging module and wraps its
+stages in span(). Until configure() is called, only warnings and errors
+reach stderr (Python's last-resort handler); debug/info output and span
+timings stay silent. When spans are disabled, span() returns a shared
+no-op object, so the cost is one flag check.
+
+Usage:
+    import telemetry
+    telemetry.configure(level="DEBUG", spans=True, jsonl_path="spans.jsonl")
+
+    with telemetry.span("model", rows=250):
+        ...
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+
+
+ROOT_LOGGER_NAME = "medguardian"
+
+_spans_enabled = False
+_sink = None
+_span_logger = logging.getLogger(f"{ROOT_LOGGER_NAME}.span")
+
+
+def get_logger(name):
+    """Logger for one module, under the shared 'medguardian' root"""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+class JsonLinesSink:
+    """Append one JSON object per line to a file (thread safe)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def configure(level="WARNING", spans=False, jsonl_path=None):
+    """
+    Enable logging output and (optionally) timing spans
+
+    Args:
+        level: logging level for the 'medguardian' loggers
+        spans: record per-stage timings
+        jsonl_path: if given, span and event records are appended
+                    to this file as JSON lines
+    """
+    global _spans_enabled, _sink
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(level)
+    if not any(type(h) is logging.StreamHandler for h in root.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        root.addHandler(handler)
+
+    if _sink:
+        _sink.close()
+        _sink = None
+    if jsonl_path:
+        _sink = JsonLinesSink(jsonl_path)
+
+    _spans_enabled = bool(spans)
+
+
+def spans_enabled():
+    return _spans_enabled
+
+
+def emit(event, **fields):
+    """Write a structured event to the JSON-lines sink (if one is configured)"""
+    if _sink:
+        fields["event"] = event
+        fields["ts"] = time.time()
+        _sink.write(fields)
+
+
+class _NullSpan:
+    """Shared do-nothing span used while spans are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times one pipeline stage and reports it on exit"""
+
+    __slots__ = ("name", "fields", "start_ns", "duration_ms")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.start_ns = 0
+        self.duration_ms = None
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter_ns() - self.start_ns) / 1e6
+        if _span_logger.isEnabledFor(logging.DEBUG):
+            _span_logger.debug("%s took %.3f ms %s", self.name, self.duration_ms, self.fields or "")
+        if _sink:
+            record = {"event": "span", "span": self.name,
+                      "duration_ms": round(self.duration_ms, 4), "ts": time.time()}
+            if exc_type is not None:
+                record["error"] = exc_type.__name__
+            record.update(self.fields)
+            _sink.write(record)
+        return False
+
+
+def span(name, **fields):
+    """
+    Context manager timing one stage (preprocess, model, interpret, ...)
+
+    Returns a no-op span when spans are disabled
+    """
+    if not _spans_enabled:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+@atexit.register
+def _close_sink():
+    if _sink:
+        _sink.close()
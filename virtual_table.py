@@ -0,0 +1,172 @@
+"""
+Virtual Table - scrollable table that only builds widgets for the visible rows
+Rows are fetched from the data source one page at a time while scrolling,
+so opening the table costs the same for 10 or 100k records
+"""
+
+import sys
+from collections import OrderedDict
+
+import customtkinter as ctk
+
+
+class PagedRows:
+    """
+    Read-through cache of table rows
+
+    Rows come from fetch(offset, limit) in pages of page_size; only the
+    last max_pages pages are kept, so memory does not grow with the
+    number of records.
+    """
+
+    def __init__(self, fetch, count, page_size=100, max_pages=8):
+        """
+        Args:
+            fetch: function(offset, limit) -> list of rows
+            count: function() -> total number of rows
+            page_size: rows fetched per call
+            max_pages: pages kept in memory
+        """
+        self.fetch = fetch
+        self.count = count
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._total = None
+
+    def __len__(self):
+        if self._total is None:
+            self._total = self.count()
+        return self._total
+
+    def refresh(self):
+        """Forget cached rows (after the data changed)"""
+        self._pages.clear()
+        self._total = None
+
+    def _page(self, index):
+        page = self._pages.get(index)
+        if page is None:
+            page = self.fetch(index * self.page_size, self.page_size)
+            self._pages[index] = page
+            if len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(index)
+        return page
+
+    def rows(self, start, n):
+        """Rows start .. start + n - 1 (fewer at the end of the data)"""
+        end = min(start + n, len(self))
+        rows = []
+        while start < end:
+            index, skip = divmod(start, self.page_size)
+            page = self._page(index)
+            if skip >= len(page):
+                break
+            taken = page[skip:skip + end - start]
+            rows.extend(taken)
+            start += len(taken)
+        return rows
+
+
+class VirtualTable(ctk.CTkFrame):
+    """
+    Table with a fixed grid of labels (visible_rows x columns) and a
+    scrollbar; scrolling only changes the label texts
+    """
+
+    def __init__(self, master, columns, fetch, count, visible_rows=15, page_size=100,
+                 font=("Arial", 16), header_font=("Arial", 25, "bold"), column_width=120,
+                 **kwargs):
+        """
+        Args:
+            master: parent widget
+            columns: list of (header text, row key or function(row)) pairs
+            fetch: function(offset, limit) -> list of row dicts
+            count: function() -> total number of rows
+            visible_rows: rows shown at once
+            page_size: rows fetched from the source per call
+        """
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.visible_rows = visible_rows
+        self.data = PagedRows(fetch, count, page_size=page_size)
+        self.first = 0
+
+        for col, (text, _) in enumerate(columns):
+            ctk.CTkLabel(self, text=text, font=header_font, width=column_width) \
+                .grid(row=0, column=col, padx=20, pady=10)
+
+        self.cells = []
+        for row in range(visible_rows):
+            labels = []
+            for col in range(len(columns)):
+                label = ctk.CTkLabel(self, text="", font=font, width=column_width)
+                label.grid(row=row + 1, column=col, padx=20, pady=5)
+                self._bind_wheel(label)
+                labels.append(label)
+            self.cells.append(labels)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=len(columns), rowspan=visible_rows, sticky="ns")
+        self._bind_wheel(self)
+
+        self.refresh()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
+
+    def _on_wheel(self, event):
+        if sys.platform.startswith("win"):
+            delta = -int(event.delta / 40)
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -1 if event.num == 4 else 1
+        self.scroll_to(self.first + delta)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(value) * len(self.data)))
+        elif unit == "pages":
+            self.scroll_to(self.first + int(value) * self.visible_rows)
+        else:
+            self.scroll_to(self.first + int(value))
+
+    def scroll_to(self, first):
+        """Show rows starting at index `first`"""
+        self.first = max(0, min(first, len(self.data) - self.visible_rows))
+        self._render()
+
+    def set_source(self, fetch, count):
+        """Show another data source (e.g. new search results) from the top"""
+        self.data = PagedRows(fetch, count, page_size=self.data.page_size)
+        self.first = 0
+        self._render()
+
+    def refresh(self):
+        """Reload from the data source (after records were added or deleted)"""
+        self.data.refresh()
+        self.scroll_to(self.first)
+
+    def _render(self):
+        rows = self.data.rows(self.first, self.visible_rows)
+        for i, labels in enumerate(self.cells):
+            row = rows[i] if i < len(rows) else None
+            for label, (_, key) in zip(labels, self.columns):
+                if row is None:
+                    text = ""
+                elif callable(key):
+                    text = key(row)
+                else:
+                    text = row.get(key, "")
+                label.configure(text=str(text))
+
+        total = len(self.data)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
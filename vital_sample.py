@@ -0,0 +1,222 @@
+"""
+Compact typed record for one VitalSignSim row
+Numeric vitals, integer times and small enums instead of a dict of strings
+"""
+
+import math
+import time
+from datetime import datetime
+from enum import IntEnum
+
+
+NAN = float('nan')
+
+
+class Rhythm(IntEnum):
+    UNKNOWN = 0
+    SINUS = 1
+    SINUS_TACHYCARDIA = 2
+    SINUS_BRADYCARDIA = 3
+    ATRIAL_FIBRILLATION = 4
+    ATRIAL_FLUTTER = 5
+    SVT = 6
+    VENTRICULAR_TACHYCARDIA = 7
+    VENTRICULAR_FIBRILLATION = 8
+    ASYSTOLE = 9
+    PEA = 10
+    OTHER = 99
+
+
+class Event(IntEnum):
+    NONE = 0
+    HR_CHANGED = 1
+    SPO2_CHANGED = 2
+    ETCO2_CHANGED = 3
+    RR_CHANGED = 4
+    NIBP_CHANGED = 5
+    RHYTHM_CHANGED = 6
+    OTHER = 99
+
+
+# Text used by the simulator (lower case) -> enum
+RHYTHM_NAMES = {
+    'unknown': Rhythm.UNKNOWN,
+    'sinus': Rhythm.SINUS,
+    'nsr': Rhythm.SINUS,
+    'sinus tachycardia': Rhythm.SINUS_TACHYCARDIA,
+    'sinus bradycardia': Rhythm.SINUS_BRADYCARDIA,
+    'afib': Rhythm.ATRIAL_FIBRILLATION,
+    'atrial fibrillation': Rhythm.ATRIAL_FIBRILLATION,
+    'aflutter': Rhythm.ATRIAL_FLUTTER,
+    'atrial flutter': Rhythm.ATRIAL_FLUTTER,
+    'svt': Rhythm.SVT,
+    'vtach': Rhythm.VENTRICULAR_TACHYCARDIA,
+    'ventricular tachycardia': Rhythm.VENTRICULAR_TACHYCARDIA,
+    'vfib': Rhythm.VENTRICULAR_FIBRILLATION,
+    'ventricular fibrillation': Rhythm.VENTRICULAR_FIBRILLATION,
+    'asystole': Rhythm.ASYSTOLE,
+    'pea': Rhythm.PEA,
+}
+
+EVENT_NAMES = {
+    '': Event.NONE,
+    'hr changed': Event.HR_CHANGED,
+    'spo2 changed': Event.SPO2_CHANGED,
+    'etco2 changed': Event.ETCO2_CHANGED,
+    'rr changed': Event.RR_CHANGED,
+    'nibp changed': Event.NIBP_CHANGED,
+    'rhythm changed': Event.RHYTHM_CHANGED,
+}
+
+
+# Display text for each enum value (first spelling in the tables above)
+RHYTHM_LABELS = {Rhythm.OTHER: 'Other'}
+for _name, _rhythm in RHYTHM_NAMES.items():
+    RHYTHM_LABELS.setdefault(_rhythm, _name.upper() if len(_name) <= 4 else _name.title())
+
+EVENT_LABELS = {
+    Event.NONE: '',
+    Event.HR_CHANGED: 'HR changed',
+    Event.SPO2_CHANGED: 'SpO2 changed',
+    Event.ETCO2_CHANGED: 'etCO2 changed',
+    Event.RR_CHANGED: 'RR changed',
+    Event.NIBP_CHANGED: 'NIBP changed',
+    Event.RHYTHM_CHANGED: 'Rhythm changed',
+}
+
+
+def parse_number(text):
+    """float value of a simulator field, NaN if it is empty or not a number"""
+    try:
+        return float(text)
+    except ValueError:
+        return NAN
+
+
+def format_time(seconds):
+    """Seconds -> 'MM:SS' (or 'HH:MM:SS' from one hour on), as in the export"""
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+class VitalSample:
+    """
+    One row of vital signs
+
+    Vitals are floats (NaN when not measured), time_s is the simulator
+    Time column in seconds and timestamp_ms the wall-clock receive time
+    in epoch milliseconds. Rhythm and event are enums; rhythm_text and
+    event_text keep the raw text only for values without an enum member.
+
+    Also answers the read-only dict interface the GUI and MLModelHandler
+    use (sample['heart_rate'], sample.get('spo2', 0), 'temperature' in
+    sample). Unmeasured vitals behave like missing keys.
+    """
+
+    __slots__ = (
+        'time_s', 'timestamp_ms',
+        'heart_rate', 'spo2', 'etco2', 'respiratory_rate',
+        'systolic_bp', 'diastolic_bp', 'temperature',
+        'rhythm', 'rhythm_text', 'event', 'event_text'
+    )
+
+    NUMERIC_FIELDS = (
+        'heart_rate', 'spo2', 'etco2', 'respiratory_rate',
+        'systolic_bp', 'diastolic_bp', 'temperature'
+    )
+
+    KEYS = (
+        'timestamp', 'time', 'heart_rate', 'spo2', 'etco2', 'respiratory_rate',
+        'systolic_bp', 'diastolic_bp', 'blood_pressure', 'rhythm', 'event', 'temperature'
+    )
+
+    def __init__(self, time_s=0, heart_rate=NAN, spo2=NAN, etco2=NAN, respiratory_rate=NAN,
+                 systolic_bp=NAN, diastolic_bp=NAN, temperature=NAN,
+                 rhythm=Rhythm.UNKNOWN, rhythm_text=None, event=Event.NONE, event_text=None,
+                 timestamp_ms=None):
+        self.time_s = time_s
+        self.timestamp_ms = timestamp_ms if timestamp_ms is not None else time.time_ns() // 1_000_000
+        self.heart_rate = heart_rate
+        self.spo2 = spo2
+        self.etco2 = etco2
+        self.respiratory_rate = respiratory_rate
+        self.systolic_bp = systolic_bp
+        self.diastolic_bp = diastolic_bp
+        self.temperature = temperature
+        self.rhythm = rhythm
+        self.rhythm_text = rhythm_text
+        self.event = event
+        self.event_text = event_text
+
+    @staticmethod
+    def parse_rhythm(text):
+        """(Rhythm, raw text or None)"""
+        rhythm = RHYTHM_NAMES.get(text.strip().lower(), Rhythm.OTHER)
+        return rhythm, (text.strip() if rhythm is Rhythm.OTHER else None)
+
+    @staticmethod
+    def parse_event(text):
+        """(Event, raw text or None)"""
+        event = EVENT_NAMES.get(text.strip().lower(), Event.OTHER)
+        return event, (text.strip() if event is Event.OTHER else None)
+
+    @property
+    def time(self):
+        return format_time(self.time_s)
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.timestamp_ms / 1000).isoformat()
+
+    @property
+    def blood_pressure(self):
+        if math.isnan(self.systolic_bp) or math.isnan(self.diastolic_bp):
+            return ""
+        return f"{self.systolic_bp:g}/{self.diastolic_bp:g}"
+
+    # ---- read-only mapping interface ----
+
+    def _value(self, key):
+        if key in self.NUMERIC_FIELDS:
+            value = getattr(self, key)
+            if math.isnan(value):
+                raise KeyError(key)
+            return value
+        if key == 'rhythm':
+            return self.rhythm_text if self.rhythm is Rhythm.OTHER else RHYTHM_LABELS[self.rhythm]
+        if key == 'event':
+            return self.event_text if self.event is Event.OTHER else EVENT_LABELS[self.event]
+        if key in ('time', 'timestamp', 'blood_pressure'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        return self._value(key)
+
+    def get(self, key, default=None):
+        try:
+            return self._value(key)
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def keys(self):
+        return [key for key in self.KEYS if key in self]
+
+    def to_dict(self):
+        """Plain dict (for JSON, logs or old callers)"""
+        return {key: self._value(key) for key in self.keys()}
+
+    def copy(self):
+        """Samples are never modified after parsing, so sharing is safe"""
+        return self
+
+    def __repr__(self):
+        return (f"VitalSample(time={self.time}, hr={self.heart_rate:g}, spo2={self.spo2:g}, "
+                f"etco2={self.etco2:g}, rr={self.respiratory_rate:g}, "
+                f"bp={self.blood_pressure or '-'}, rhythm={self.rhythm.name}, event={self.event.name})")
@@ -0,0 +1,166 @@
+"""
+Vitals History - fixed-capacity, NumPy-backed time series per patient
+Keeps the last N rows the simulator bridge parsed (HR, SpO2, etCO2,
+RR, SBP, DBP) so trends and windowed features can be computed
+"""
+
+import threading
+
+import numpy as np
+
+from vital_sample import VitalSample, parse_number
+
+
+COLUMNS = ('heart_rate', 'spo2', 'etco2', 'respiratory_rate', 'systolic_bp', 'diastolic_bp')
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+# 12 hours at one row per second
+DEFAULT_CAPACITY = 12 * 60 * 60
+
+
+class VitalsRingBuffer:
+    """
+    Ring buffer of the most recent `capacity` vital-sign rows
+
+    Every row is written twice (slot i and slot i + capacity), so the
+    last n rows are always one contiguous block: window() returns a
+    read-only view without copying, and append() is O(1). Memory is
+    fixed at creation, however long the stay: 128 bytes per row of
+    capacity (about 5.5 MB for 12 hours at one row per second), and
+    the operating system only commits the pages rows were written to.
+
+    Views share memory with the buffer: they show the rows of the moment
+    they were taken only until the next `capacity - n` appends. Copy a
+    window if you keep it longer.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        # Only rows that were written are ever exposed, so no need to initialise
+        self._values = np.empty((2 * capacity, len(COLUMNS)), dtype=np.float64)
+        self._time_s = np.empty(2 * capacity, dtype=np.int64)
+        self._timestamp_ms = np.empty(2 * capacity, dtype=np.int64)
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes + self._time_s.nbytes + self._timestamp_ms.nbytes
+
+    def append(self, vital_signs):
+        """
+        Add one row (VitalSample, or a dict with the same keys)
+        """
+        if isinstance(vital_signs, VitalSample):
+            row = (vital_signs.heart_rate, vital_signs.spo2, vital_signs.etco2,
+                   vital_signs.respiratory_rate, vital_signs.systolic_bp, vital_signs.diastolic_bp)
+            time_s = vital_signs.time_s
+            timestamp_ms = vital_signs.timestamp_ms
+        else:
+            row = tuple(parse_number(vital_signs.get(name, '')) for name in COLUMNS)
+            time_s = int(vital_signs.get('time_s', 0))
+            timestamp_ms = int(vital_signs.get('timestamp_ms', 0))
+
+        with self._lock:
+            i = self._head
+            mirror = i + self.capacity
+            self._values[i] = row
+            self._values[mirror] = row
+            self._time_s[i] = self._time_s[mirror] = time_s
+            self._timestamp_ms[i] = self._timestamp_ms[mirror] = timestamp_ms
+
+            self._head = i + 1 if i + 1 < self.capacity else 0
+            if self._count < self.capacity:
+                self._count += 1
+
+    def _span(self, n):
+        n = self._count if n is None else max(0, min(n, self._count))
+        end = self._head + self.capacity
+        return end - n, end
+
+    @staticmethod
+    def _read_only(view):
+        view.flags.writeable = False
+        return view
+
+    def window(self, n=None):
+        """
+        Last n rows, oldest first, as a (n, len(COLUMNS)) read-only view
+
+        Args:
+            n: number of rows (default: everything stored)
+        """
+        start, end = self._span(n)
+        return self._read_only(self._values[start:end])
+
+    def column(self, name, n=None):
+        """Last n values of one column (e.g. 'heart_rate') as a read-only view"""
+        start, end = self._span(n)
+        return self._read_only(self._values[start:end, COLUMN_INDEX[name]])
+
+    def times(self, n=None):
+        """Simulator Time column (seconds) of the last n rows, read-only view"""
+        start, end = self._span(n)
+        return self._read_only(self._time_s[start:end])
+
+    def timestamps_ms(self, n=None):
+        """Receive timestamps (epoch ms) of the last n rows, read-only view"""
+        start, end = self._span(n)
+        return self._read_only(self._timestamp_ms[start:end])
+
+    def latest(self):
+        """Most recent row as a 1-D view, or None if empty"""
+        if not self._count:
+            return None
+        return self.window(1)[0]
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._count = 0
+
+
+class VitalsHistory:
+    """One VitalsRingBuffer per patient / bed"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, patient_id):
+        """Ring buffer of a patient (created on first use)"""
+        buffer = self._buffers.get(patient_id)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.get(patient_id)
+                if buffer is None:
+                    buffer = self._buffers[patient_id] = VitalsRingBuffer(self.capacity)
+        return buffer
+
+    def append(self, patient_id, vital_signs):
+        self.buffer(patient_id).append(vital_signs)
+
+    def window(self, patient_id, n=None):
+        buffer = self._buffers.get(patient_id)
+        if buffer is None:
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+        return buffer.window(n)
+
+    def remove(self, patient_id):
+        with self._lock:
+            self._buffers.pop(patient_id, None)
+
+    def patients(self):
+        return list(self._buffers)
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in list(self._buffers.values()))